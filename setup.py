@@ -11,5 +11,8 @@ setup(
     license="MIT",
     packages=["spaceshots"],
     include_package_data=True,
+    package_data={"spaceshots": ["data/*.json"]},
+    extras_require={"numpy": ["numpy"], "msgpack": ["msgpack"]},
+    entry_points={"console_scripts": ["spaceshots=spaceshots.cli:main"]},
     zip_safe=True,
 )
@@ -1,6 +1,20 @@
+import gc
+import itertools
+import sys
+import types
+
 from typing import Any
+from .broadcast import BroadcastChannel
 from .game import Game
-from .scene import LevelBuilder
+from .inputs import InputBuffer
+from .scene import (
+    LevelBuilder,
+    LevelQueue,
+    Prefetcher,
+    ScaledLevels,
+    Scene,
+    SceneStream,
+)
 from random import randint
 
 
@@ -14,19 +28,32 @@ class Manager:
         fps=60,
     ):
 
+        self.size = (screen_x, screen_y)
+        self.hardest_difficulty = hardest_difficulty
+        self.n_levels = n_levels
+
         builder = LevelBuilder(screen_x, screen_y)
-        levels = [
-            builder.create(diff)
-            for diff in create_level_difficulties(hardest_difficulty, n_levels)
-        ]
+        if n_levels is None:
+            # Endless, the next level is built in the background as one is played
+            levels = Prefetcher(
+                builder.stream(endless_level_difficulties(hardest_difficulty))
+            )
+        else:
+            # Only the first level is built here, the rest are built in the background
+            levels = LevelQueue(
+                builder, create_level_difficulties(hardest_difficulty, n_levels)
+            )
 
         self.game = Game(scenes=levels, fps=fps)
         self.status = {}
+        self.channel = None  # spectators, see `spectate`
+        self.inputs = InputBuffer()
 
     def get_details(self) -> dict:
 
         scene = self.game.current_scene
         length, width = scene.size
+        proximity = scene.get_proximity()
 
         data = {
             "sc": {
@@ -40,7 +67,7 @@ class Manager:
                 # "min_dist_to_planet" : round(scene.sc.min_dist_to_planet,2),
                 # "gas_p_thrust" : scene.sc.gas_per_thrust,
                 "i_gas_level": scene.sc._initial_gas_level,
-                # "closest_dist_to_planet" : round(closest_dist_to_sc(scene.sc, scene.planets),1),
+                "closest_dist_to_planet": round(proximity.closest_dist, 1),
                 # "p" : [scene.sc.p.x, scene.sc.p.y],
                 "thrust": {
                     "mag": scene.sc.thrust_mag,
@@ -56,6 +83,7 @@ class Manager:
                 "pos": [round(i, 2) for i in (p.x, p.y)],
                 # "mass" : round(p.mass,1),
                 "radius": round(p.radius, 1),
+                "dist": round(proximity.dist[i], 1),
                 "orbit": {
                     "center": [
                         round(i, 1) for i in (p.orbit.center_x, p.orbit.center_y)
@@ -93,6 +121,178 @@ class Manager:
         won, fail, message = self.game.step(thrust_dir)
         self.status = dict(won=won, fail=fail, message=message)
 
+        if self.channel is not None and self.channel.subscribers:
+            self.channel.publish(self.get_details(), self.game.ticks)
+
+    def to_dict(self) -> dict:
+
+        """
+        JSON friendly session: the levels built so far, each one's progress and
+        dynamic state, what's left to build and the buffered input. See `from_dict`.
+        """
+
+        game, scenes = self.game, self.game.scenes
+        data = dict(
+            version=2,
+            size=list(self.size),
+            hardest_difficulty=self.hardest_difficulty,
+            n_levels=self.n_levels,
+            fps=game.fps,
+            current_index=game.current_index,
+            ticks=game.ticks,
+            done=game.done,
+            status=self.status,
+            inputs=self.inputs.to_dict(),
+        )
+
+        if isinstance(scenes, SceneStream):
+            held = list(scenes.window)
+            data.update(
+                source="stream",
+                offset=scenes.offset,
+                released=scenes.released,
+                released_score=list(scenes.released_score),
+            )
+        elif isinstance(scenes, LevelQueue):
+            held = list(scenes)
+            data.update(source="queue", difficulties=scenes.difficulties)
+        elif isinstance(scenes, ScaledLevels):
+            # The bank and which of its levels were built, the rest stay lazy
+            built = sorted(scenes.scenes)
+            held = [scenes.scenes[i] for i in built]
+            data.update(source="scaled", bank=list(scenes.levels), built=built)
+        else:
+            held = list(scenes)
+            data.update(source="list")
+
+        data["levels"] = [scene.to_dict() for scene in held]
+        data["progress"] = [[s.won, s.attempts, s.snapshot()] for s in held]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+
+        """
+        Session from `to_dict`, without building any of the levels it had. Pending
+        input carries over (the latency statistics start over), spectators don't:
+        they subscribe again with `spectate`.
+        """
+
+        manager = cls.__new__(cls)
+        manager.size = tuple(data["size"])
+        manager.hardest_difficulty = data["hardest_difficulty"]
+        manager.n_levels = data["n_levels"]
+        manager.status = data["status"]
+        manager.channel = None
+        manager.inputs = (
+            InputBuffer.from_dict(data["inputs"]) if "inputs" in data else InputBuffer()
+        )
+
+        held = []
+        for level, (won, attempts, state) in zip(data["levels"], data["progress"]):
+            scene = Scene.from_dict(level)
+            scene.won, scene.attempts = won, attempts
+            scene.restore(state)
+            held.append(scene)
+
+        builder = LevelBuilder(*manager.size)
+        # Version 1 sessions were streams or queues
+        source = data.get("source", "stream" if "offset" in data else "queue")
+        if source == "stream":
+            # Carry on with the mix, the easy first level was already played
+            difficulties = endless_level_difficulties(manager.hardest_difficulty)
+            upcoming = Prefetcher(
+                builder.stream(itertools.islice(difficulties, 1, None))
+            )
+            levels = SceneStream(itertools.chain(held, upcoming))
+            levels.offset = data["offset"]
+            levels.released = data["released"]
+            levels.released_score = tuple(data["released_score"])
+        elif source == "queue":
+            levels = LevelQueue(builder, data["difficulties"], levels=held)
+        elif source == "scaled":
+            levels = ScaledLevels(data["bank"], *manager.size)
+            levels.scenes = dict(zip(data["built"], held))
+        else:
+            levels = held
+
+        game = manager.game = Game(scenes=levels, fps=data["fps"], reset=False)
+        game.current_index = data["current_index"]
+        game.current_scene = levels[game.current_index]
+        game.ticks = data["ticks"]
+        game.done = data["done"]
+        return manager
+
+    def memory_report(self) -> dict:
+
+        """ Bytes this session holds, in total and by type """
+
+        total, by_type, objects = memory_size(self)
+        return dict(
+            total=total,
+            objects=objects,
+            levels=len(list(self.game.scenes)),
+            by_type=dict(sorted(by_type.items(), key=lambda item: -item[1])),
+        )
+
+    def submit(self, client_tick, thrust_dir) -> bool:
+
+        """
+        Buffers a command for the tick it was meant for (`game.ticks` when it should
+        run), from any thread. `tick` applies it, False if it was dropped.
+        """
+
+        return self.inputs.submit(client_tick, thrust_dir, self.game.ticks)
+
+    def tick(self) -> None:
+
+        """ Steps with the buffered command for this tick, or the last one again """
+
+        command = self.inputs.take(self.game.ticks)
+        # Applied every tick, a failed attempt resets the craft's thrust
+        self.step(self.inputs.command if command is None else command)
+
+    def latency(self) -> dict:
+        return self.inputs.stats()
+
+    def spectate(self, max_lag=None):
+
+        """ Subscriber to this session's frames, one encoded `get_details` a tick """
+
+        if self.channel is None:
+            self.channel = BroadcastChannel()
+        return self.channel.subscribe(max_lag)
+
+
+def memory_size(root):
+
+    """
+    (bytes, bytes by type name, number of objects) of everything reachable from
+    `root`, leaving out what's shared: classes, functions, code, modules and the
+    None / True / False singletons.
+    """
+
+    shared = (type, types.ModuleType, types.FunctionType, types.CodeType, bool)
+    skip = {id(vars(module)) for module in list(sys.modules.values())}
+    seen = set()
+    stack = [root]
+    total = 0
+    by_type = {}
+
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen or id(obj) in skip or isinstance(obj, shared):
+            continue
+        seen.add(id(obj))
+
+        size = sys.getsizeof(obj)
+        total += size
+        name = type(obj).__name__
+        by_type[name] = by_type.get(name, 0) + size
+        stack.extend(gc.get_referents(obj))
+
+    return total, by_type, len(seen)
+
 
 def create_level_difficulties(max_difficulty: str, n_levels: int):
 
@@ -113,3 +313,12 @@ def create_level_difficulties(max_difficulty: str, n_levels: int):
     return [
         _map[randint(0, max_level)] if i > 0 else "easy" for i in range(n_levels)
     ]  # put easy first
+
+
+def endless_level_difficulties(max_difficulty: str):
+
+    """ Easy first, then the same random mix as `create_level_difficulties` """
+
+    yield "easy"
+    while True:
+        yield create_level_difficulties(max_difficulty, 2)[1]
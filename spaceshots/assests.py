@@ -1,10 +1,14 @@
 import math
 
+from array import array
 from .physics import *
 from .utils import *
 
 
 class Asset:
+
+    __slots__ = ("x", "y", "name", "mass", "vel", "poly", "_p")
+
     def __init__(self, name, x=0.0, y=0.0, mass=0, vel=None):
 
         self.x = x
@@ -23,19 +27,27 @@ class Asset:
         self.x = 0
         self.y = 0
 
+    def fork(self):
+
+        """ Copy with its own position, velocity and polygon, the rest is shared """
+
+        clone = copy_slots(self)
+        clone.vel = self.vel.copy()
+        clone._p = self._p.copy()
+        if self.poly is not None:
+            clone.poly = self.poly.copy()
+        return clone
+
     def pos(self):
         return self.x, self.y
 
     def calc_distance(self, other_asset):
 
-        return sum([x ** 2 for x in self.calc_vector(other_asset)]) ** 0.5
+        return math.hypot(other_asset.x - self.x, other_asset.y - self.y)
 
     def calc_vector(self, other_asset):
 
-        dx = other_asset.x - self.x
-        dy = other_asset.y - self.y
-
-        return dx, dy
+        return Vec2(other_asset.x - self.x, other_asset.y - self.y)
 
     def calc_gravitational_force(self, other_asset):
 
@@ -44,9 +56,9 @@ class Asset:
         r = self.calc_distance(other_asset)
 
         mag = G * M * m / r ** 2
-        x, y = self.calc_vector(other_asset)
+        vec = self.calc_vector(other_asset)
 
-        return Force(x, y, mag)
+        return Force(vec.x, vec.y, mag)
 
     def intersects(self, other_asset):
         return self.poly.intersects(other_asset.poly)
@@ -58,13 +70,16 @@ class Asset:
     @p.setter
     def p(self, val):
         self._p = val
-        self.vel = Velocity(val.x / self.mass, val.y / self.mass)
+        self.vel.set(val.x / self.mass, val.y / self.mass)
 
     def __repr__(self):
-        return str(vars(self))
+        return str(slot_dict(self))
 
 
 class Planet(Asset):
+
+    __slots__ = ("orbit", "radius")
+
     def __init__(self, name, mass=0.0, orbit=Orbit, radius_per_kilogram=45 / 4e16):
 
         super().__init__(name, 0.0, 0.0, mass)
@@ -72,8 +87,19 @@ class Planet(Asset):
         self.radius = radius_per_kilogram * mass
         self.move()
 
+    def fork(self):
+
+        # Planets only follow their orbit, velocity and momentum can stay shared
+        clone = copy_slots(self)
+        clone.orbit = self.orbit.fork()
+        clone.poly = self.poly.copy()
+        return clone
+
     def make_poly(self):
-        self.poly = CirclePolygon(self.x, self.y, self.radius)
+        if self.poly is None:
+            self.poly = CirclePolygon(self.x, self.y, self.radius)
+        else:
+            self.poly.move_to(self.x, self.y)
 
     def move(self, dt=1.0):
         self.x, self.y = self.orbit.next_pos(dt)
@@ -81,12 +107,26 @@ class Planet(Asset):
         return self.pos()
 
     def save_state(self):
-        return "+".join(self.__dict__.values())
+        return "+".join(slot_dict(self).values())
 
     # def load_state(self, state=str)
 
 
 class Spacecraft(Asset):
+
+    __slots__ = (
+        "_theta",
+        "gas_level",
+        "_initial_gas_level",
+        "thrust",
+        "thrust_direction",
+        "thrust_mag",
+        "width",
+        "length",
+        "gas_per_thrust",
+        "min_dist_to_planet",
+    )
+
     def __init__(
         self,
         name,
@@ -115,8 +155,11 @@ class Spacecraft(Asset):
         self.draw_poly()
 
     def draw_poly(self):
-        effective_radius = self.width / 2 + self.length / 2
-        self.poly = CirclePolygon(self.x, self.y, effective_radius)
+        if self.poly is None:
+            effective_radius = self.width / 2 + self.length / 2
+            self.poly = CirclePolygon(self.x, self.y, effective_radius)
+        else:
+            self.poly.move_to(self.x, self.y)
 
     # def draw_poly_rect(self):
 
@@ -149,41 +192,32 @@ class Spacecraft(Asset):
 
             self.gas_level -= round(self.thrust_mag * self.gas_per_thrust)
 
-            # body_vec = self.vel.vec
-            body_vec = rotate(self.theta, [[1], [0]])
-            if vector_norm(self.vel.vec) == 0.0:
-                # body_vec = [0, -1]
-                body_vec = [[1], [0]]
-
-            if self.thrust_direction == "-y":
-                vector = rotate(math.pi * 1.5, body_vec)
-            elif self.thrust_direction == "+y":
-                vector = rotate(math.pi / 2, body_vec)
-            elif self.thrust_direction == "-x":
-                vector = rotate(math.pi, body_vec)
-            elif self.thrust_direction == "+x":
-                vector = rotate(0.0, body_vec)
-
-            force = Force(vector[0][0], vector[1][0], self.thrust_mag)
-
-            return Momentum.from_impulse(force, time)
+            x, y = thrust_vector(
+                self.theta,
+                self.vel.x != 0.0 or self.vel.y != 0.0,
+                self.thrust_direction,
+            )
+            return Momentum._make(
+                x * self.thrust_mag * time, y * self.thrust_mag * time
+            )
 
         return Momentum(0.0, 0.0)
 
     def set_net_momentum(self, impulse_time, external_force=None):
 
         # Thrust impulse
-        thrust_i = self.get_thrust_impulse(impulse_time)
+        self._p += self.get_thrust_impulse(impulse_time)
 
         # External impulse
-        if external_force:
-            external_i = Momentum.from_impulse(external_force, impulse_time)
-        else:
-            external_i = Momentum(0.0, 0.0)
+        if external_force is not None:
+            self._p.add_scaled(external_force, impulse_time)
+
+        self.p = self._p
 
-        self.p = self.p + thrust_i + external_i
+    def find_closest_planet(self, planets=list, proximity=None):
 
-    def find_closest_planet(self, planets=list):
+        if proximity is not None:
+            return planets[proximity.closest]
 
         current_distance = self.calc_distance(planets[0])
         # current_distance = self.min_dist_to_planet
@@ -202,23 +236,33 @@ class Spacecraft(Asset):
 
         return planets[index_of_closest]
 
-    def update_pos(self, impulse_time=float, planets=list, closest_only=True):
-
-        planet_f = Force(0, 0, 0)
+    def update_pos(
+        self, impulse_time=float, planets=list, closest_only=True, proximity=None
+    ):
 
-        if closest_only:
-            closes_planet = self.find_closest_planet(planets)
-            if closes_planet:
-                planet_f = self.calc_gravitational_force(closes_planet)
-        else:
-            for planet in planets:
-                planet_f += self.calc_gravitational_force(planet)
+        if proximity is None:
+            proximity = Proximity().update(self.x, self.y, planets)
 
+        planet_f = self.gravity_force(planets, proximity, closest_only)
         self.set_net_momentum(impulse_time, planet_f)
         self.move(impulse_time)
 
         return self.x, self.y
 
+    def gravity_force(self, planets, proximity, closest_only=False):
+
+        """ Same as calc_gravitational_force, reading the shared geometry """
+
+        planet_f = Force(0, 0, 0)
+        indices = [proximity.closest] if closest_only else range(len(planets))
+        for i in indices:
+            mag = G * self.mass * planets[i].mass / proximity.dist_sq[i]
+            ratio = mag / proximity.dist[i]
+            planet_f.x += proximity.dx[i] * ratio
+            planet_f.y += proximity.dy[i] * ratio
+
+        return planet_f
+
     def move(self, time):
 
         self.x += self.vel.x * time
@@ -229,12 +273,12 @@ class Spacecraft(Asset):
         self.thrust = False
         if sc_start_pos:
             self.x, self.y = sc_start_pos
-        self.p = Momentum(0.0, 0.0)
+        self.p = self._p.set(0.0, 0.0)
         self.gas_level = self._initial_gas_level
 
     def save_state(self):
 
-        dict_ = {i: j for i, j in self.__dict__.items() if i != "poly"}
+        dict_ = {i: j for i, j in slot_dict(self).items() if i != "poly"}
         return "+".join(dict_.values())
 
     # def load_state(self, state=list):
@@ -271,6 +315,157 @@ class Spacecraft(Asset):
     @p.setter
     def p(self, val):
         self._p = val
-        self.vel = Velocity(val.x / self.mass, val.y / self.mass)
+        self.vel.set(val.x / self.mass, val.y / self.mass)
         self.theta = self.vel.theta
         self.draw_poly()
+
+
+class Fleet:
+
+    """
+    N identical spacecraft stored as parallel per-craft arrays (struct of arrays).
+
+    Every craft follows exactly the same physics as `Spacecraft`. Only the per-craft
+    state is kept here, the mass, thrust, gas use and size are shared. Thrust
+    directions are kept as the 1-4 command that set them, see `DIRECTIONS`.
+    """
+
+    # Per-craft arrays and their type codes, everything a fork or a snapshot copies
+    STATE = dict(
+        x="d",
+        y="d",
+        px="d",
+        py="d",
+        vx="d",
+        vy="d",
+        theta="d",
+        gas_level="d",
+        thrust="b",
+        thrust_direction="b",
+        collided="b",
+        active="b",
+    )
+    DIRECTIONS = (None, "+y", "-x", "-y", "+x")
+
+    def __init__(self, template, n, start_pos=None):
+
+        self.n = n
+        self.mass = template.mass
+        self.thrust_mag = template.thrust_mag
+        self.gas_per_thrust = template.gas_per_thrust
+        self.radius = template.width / 2 + template.length / 2
+        self.initial_gas_level = template._initial_gas_level
+        self.start_pos = start_pos or (template.x, template.y)
+
+        for name, typecode in self.STATE.items():
+            setattr(self, name, array(typecode, [0] * n))
+        self.thrust_direction = array("b", [3] * n)  # "-y", as a new Spacecraft
+        self.active = array("b", [True] * n)
+
+        for i in range(n):
+            self.reset_craft(i)
+
+    def reset_craft(self, i):
+
+        self.x[i], self.y[i] = self.start_pos
+        self.px[i] = self.py[i] = 0.0
+        self.vx[i] = self.vy[i] = 0.0
+        self.theta[i] = math.pi / 2 - math.pi * 0.5  # same as Spacecraft.reset
+        self.gas_level[i] = self.initial_gas_level
+        self.thrust[i] = False
+        self.collided[i] = False
+
+    def reset(self):
+
+        for i in range(self.n):
+            self.reset_craft(i)
+            self.active[i] = True
+
+    def fork(self):
+
+        clone = Fleet.__new__(Fleet)
+        clone.__dict__.update(self.__dict__)
+        for name, typecode in self.STATE.items():
+            setattr(clone, name, array(typecode, getattr(self, name)))
+        return clone
+
+    def set_state(self, state):
+
+        """ Per-craft values by `STATE` name, e.g. from a snapshot """
+
+        for name, values in zip(self.STATE, state):
+            setattr(self, name, array(self.STATE[name], values))
+
+    def control(self, commands):
+
+        """ One 0-4 command per craft, anything else leaves that craft unchanged """
+
+        for i, command in enumerate(commands):
+            if command in (0, 1, 2, 3, 4):
+                self.thrust[i] = command != 0
+                if command:
+                    self.thrust_direction[i] = command
+
+    def update_pos(self, impulse_time, planets):
+
+        """ Same step as Spacecraft.update_pos(..., closest_only=False) for each craft """
+
+        mass = self.mass
+        gas_used = round(self.thrust_mag * self.gas_per_thrust)
+        planets = [(p.x, p.y, G * mass * p.mass, p.radius) for p in planets]
+
+        # The arrays as locals, the loop reads and writes them for every craft
+        xs, ys, pxs, pys, vxs, vys = self.x, self.y, self.px, self.py, self.vx, self.vy
+        thetas, gas_level, thrust = self.theta, self.gas_level, self.thrust
+
+        for i in range(self.n):
+            if not self.active[i]:
+                continue
+
+            x, y = xs[i], ys[i]
+
+            # Thrust
+            if gas_level[i] <= 0.0:
+                gas_level[i] = 0.0
+                thrust[i] = False
+
+            px, py = pxs[i], pys[i]
+            if thrust[i]:
+                gas_level[i] -= gas_used
+                moving = vxs[i] != 0.0 or vys[i] != 0.0
+                direction = self.DIRECTIONS[self.thrust_direction[i]]
+                tx, ty = thrust_vector(thetas[i], moving, direction)
+                px += tx * self.thrust_mag * impulse_time
+                py += ty * self.thrust_mag * impulse_time
+
+            # Gravity from every planet, the collision test uses this position too
+            fx = fy = 0.0
+            collided = False
+            for planet_x, planet_y, gmm, planet_r in planets:
+                dx, dy = planet_x - x, planet_y - y
+                r = math.hypot(dx, dy)
+                ratio = gmm / r ** 2 / r if r != 0.0 else 0.0
+                fx += dx * ratio
+                fy += dy * ratio
+                collided = collided or r <= self.radius + planet_r
+
+            px += fx * impulse_time
+            py += fy * impulse_time
+            vx, vy = px / mass, py / mass
+
+            # Same heading rule as the Spacecraft.theta setter
+            speed = math.hypot(vx, vy)
+            vel_theta = math.acos(clip(vx / speed, -1.0, 1.0)) if speed else math.pi / 2
+            if abs(vel_theta - thetas[i]) < math.pi * 2:
+                thetas[i] = vel_theta - math.pi * 0.5
+            else:
+                thetas[i] = vel_theta - math.pi * 2 - math.pi * 0.5
+
+            pxs[i], pys[i] = px, py
+            vxs[i], vys[i] = vx, vy
+            xs[i] = x + vx * impulse_time
+            ys[i] = y + vy * impulse_time
+            self.collided[i] = collided
+
+    def speed(self, i):
+        return math.hypot(self.vx[i], self.vy[i])
@@ -0,0 +1,178 @@
+"""
+Spectator fan-out: one channel per session, each tick's `Manager.get_details` is
+encoded to JSON once and the same immutable bytes go to every spectator.
+
+    with manager.spectate() as subscriber:
+        ...
+        for tick, data in subscriber.poll():   # frames published since the last poll
+            send(data)
+
+Frames sit in a fixed size ring. Subscribers only hold a cursor into it, so
+publishing costs the same however many are watching. A subscriber that falls more
+than `max_lag` frames behind skips straight to the newest ones (counted in
+`skipped`) instead of holding frames back for everyone else. The Manager publishes
+while anyone is subscribed, so close subscribers when done (it also happens when
+they're garbage collected).
+"""
+
+import json
+import threading
+import weakref
+
+
+def encode_details(details) -> bytes:
+    return json.dumps(details, separators=(",", ":")).encode()
+
+
+class BroadcastChannel:
+    def __init__(self, capacity=64, encode=encode_details):
+
+        assert capacity > 0, "Channel needs room for a frame!"
+
+        self.capacity = capacity
+        self.encode = encode
+        self.frames = [None] * capacity  # (tick, bytes), by sequence % capacity
+        self.next_seq = 0  # sequence number of the next frame
+        self.subscribers = 0
+        self.closed = False
+        self._new_frame = threading.Condition()
+
+    def publish(self, details, tick=None):
+
+        """ Encodes a frame once and makes it available to every subscriber """
+
+        data = self.encode(details)
+        with self._new_frame:
+            seq = self.next_seq
+            self.frames[seq % self.capacity] = (seq if tick is None else tick, data)
+            self.next_seq = seq + 1
+            self._new_frame.notify_all()
+
+        return data
+
+    def subscribe(self, max_lag=None, from_start=False):
+
+        """
+        New subscriber, starting at the next frame (or the oldest one still held).
+        `max_lag` (at most the capacity) is how far behind it may fall.
+        """
+
+        with self._new_frame:
+            self.subscribers += 1
+            start = self.oldest if from_start else self.next_seq
+        return Subscriber(self, start, max_lag)
+
+    def _unsubscribe(self):
+
+        with self._new_frame:
+            self.subscribers -= 1
+
+    def close(self):
+
+        """ Ends the broadcast, wakes up anyone waiting """
+
+        with self._new_frame:
+            self.closed = True
+            self._new_frame.notify_all()
+
+    @property
+    def oldest(self):
+        return max(self.next_seq - self.capacity, 0)
+
+    @property
+    def latest(self):
+
+        """ Newest (tick, bytes) frame, None before the first one """
+
+        with self._new_frame:
+            if self.next_seq == 0:
+                return None
+            return self.frames[(self.next_seq - 1) % self.capacity]
+
+
+class Subscriber:
+
+    """ One spectator's cursor into a BroadcastChannel """
+
+    def __init__(self, channel, cursor, max_lag=None):
+
+        self.channel = channel
+        self.cursor = cursor  # sequence number of the next frame to read
+        self.max_lag = min(max_lag or channel.capacity, channel.capacity)
+        self.received = 0
+        self.skipped = 0
+        # Runs once, on close() or when the subscriber is garbage collected
+        self._finalizer = weakref.finalize(self, channel._unsubscribe)
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    @property
+    def lag(self):
+        return self.channel.next_seq - self.cursor
+
+    def _catch_up(self):
+
+        # Too slow: drop the frames it can't keep up with
+        behind = self.channel.next_seq - self.max_lag
+        if self.cursor < behind:
+            self.skipped += behind - self.cursor
+            self.cursor = behind
+
+    def poll(self, limit=None) -> list:
+
+        """ Frames published since the last poll, oldest first, without waiting """
+
+        channel = self.channel
+        with channel._new_frame:
+            self._catch_up()
+            end = channel.next_seq
+            if limit is not None:
+                end = min(end, self.cursor + limit)
+            frames = [
+                channel.frames[seq % channel.capacity]
+                for seq in range(self.cursor, end)
+            ]
+            self.cursor = end
+
+        self.received += len(frames)
+        return frames
+
+    def latest(self):
+
+        """ Newest frame only, skipping any older ones still unread """
+
+        channel = self.channel
+        with channel._new_frame:
+            if self.cursor >= channel.next_seq:
+                return None
+            self.skipped += channel.next_seq - 1 - self.cursor
+            self.cursor = channel.next_seq
+            frame = channel.frames[(self.cursor - 1) % channel.capacity]
+
+        self.received += 1
+        return frame
+
+    def wait(self, timeout=None) -> list:
+
+        """ Like `poll`, but blocks until there is a frame or the channel closes """
+
+        channel = self.channel
+        with channel._new_frame:
+            channel._new_frame.wait_for(
+                lambda: channel.next_seq > self.cursor or channel.closed, timeout
+            )
+        return self.poll()
+
+    def close(self):
+
+        """ Stops counting as a spectator, closing again does nothing """
+
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
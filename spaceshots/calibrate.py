@@ -0,0 +1,203 @@
+import math
+import random
+
+from concurrent.futures import ProcessPoolExecutor
+from .game import Game
+from .physics import thrust_vector
+from .scene import Scene
+
+DIRECTIONS = {1: "+y", 2: "-x", 3: "-y", 4: "+x"}
+
+
+class RandomController:
+
+    """ Presses a random key, holding it for a few ticks """
+
+    def __init__(self, hold=10):
+
+        self.hold = hold
+
+    def __call__(self, scene, tick, rng):
+
+        if tick % self.hold == 0:
+            self.command = rng.randint(0, 4)
+
+        return self.command
+
+
+class HeuristicController:
+
+    """
+    Thrusts towards the middle of the win region until the craft is fast enough and
+    heading the right way, then coasts. `noise` is the chance of a random key press.
+    """
+
+    def __init__(self, noise=0.1, speed_margin=1.2, aim=0.9):
+
+        self.noise = noise
+        self.speed_margin = speed_margin
+        self.aim = aim
+
+    def __call__(self, scene, tick, rng):
+
+        if rng.random() < self.noise:
+            return rng.randint(0, 4)
+
+        sc = scene.sc
+        (x1, y1), (x2, y2) = scene.win_region
+        dx = (x1 + x2) / 2 - sc.x
+        dy = (y1 + y2) / 2 - sc.y
+        dist = math.hypot(dx, dy) or 1.0
+        dx, dy = dx / dist, dy / dist
+
+        speed = sc.vel.mag
+        if (
+            speed >= scene.win_min_velocity * self.speed_margin
+            and (sc.vel.x * dx + sc.vel.y * dy) / speed >= self.aim
+        ):
+            return 0
+
+        moving = speed != 0.0
+        best, best_dot = 0, -2.0
+        for command, direction in DIRECTIONS.items():
+            tx, ty = thrust_vector(sc.theta, moving, direction)
+            if tx * dx + ty * dy > best_dot:
+                best, best_dot = command, tx * dx + ty * dy
+
+        return best
+
+
+def default_population():
+
+    return [
+        HeuristicController(noise=0.0),
+        HeuristicController(noise=0.1),
+        HeuristicController(noise=0.3),
+        RandomController(),
+    ]
+
+
+def run_episode(scene, controller, rng, fps=60, max_ticks=1200):
+
+    """ Plays one attempt from the start position, returns (won, ticks) """
+
+    game = Game(fps=fps, scenes=[scene], reset=False)
+    scene.reset_pos()
+
+    for tick in range(max_ticks):
+        game.control_sc(controller(scene, tick, rng))
+        scene.update_all_pos(game.dt)
+        won, failed, _ = scene.check_status()
+        if won or failed:
+            scene.reset_pos()
+            return won, tick + 1
+
+    scene.reset_pos()
+    return False, max_ticks
+
+
+def estimate_difficulty(
+    scene, population=None, episodes=10, seed=0, fps=60, max_ticks=1200
+):
+
+    """
+    Monte-Carlo estimate of how hard a level plays.
+
+    `expected_attempts` is the mean of a geometric distribution using a smoothed win
+    probability ((wins + 1) / (n + 2)) so levels no controller beat stay finite.
+    """
+
+    population = population or default_population()
+    rng = random.Random(seed)
+
+    wins, runs, win_ticks = 0, 0, 0
+    for controller in population:
+        for _ in range(episodes):
+            won, ticks = run_episode(scene, controller, rng, fps, max_ticks)
+            runs += 1
+            if won:
+                wins += 1
+                win_ticks += ticks
+
+    return dict(
+        win_prob=wins / runs,
+        expected_attempts=(runs + 2) / (wins + 1),
+        mean_ticks_to_win=win_ticks / wins if wins else None,
+        episodes=runs,
+    )
+
+
+def _estimate_job(args):
+
+    level, population, episodes, seed, fps, max_ticks = args
+    scene = Scene.from_dict(level)
+    return estimate_difficulty(scene, population, episodes, seed, fps, max_ticks)
+
+
+def calibrate(
+    levels,
+    population=None,
+    episodes=10,
+    seed=0,
+    fps=60,
+    max_ticks=1200,
+    processes=None,
+    chunksize=16,
+) -> list:
+
+    """
+    Estimates difficulty for each level on all cores, stores it in
+    `level.metadata["calibration"]` and returns the results in order. Workers get
+    the levels as `to_dict()`, not whole scenes.
+    """
+
+    levels = list(levels)
+    jobs = (
+        (level.to_dict(), population, episodes, seed + i, fps, max_ticks)
+        for i, level in enumerate(levels)
+    )
+
+    with ProcessPoolExecutor(processes) as pool:
+        results = list(pool.map(_estimate_job, jobs, chunksize=chunksize))
+
+    for level, result in zip(levels, results):
+        level.metadata["calibration"] = result
+    return results
+
+
+def measured_win_prob(level):
+
+    return level.metadata["calibration"]["win_prob"]
+
+
+def filter_by_difficulty(levels, min_win_prob=0.0, max_win_prob=1.0):
+
+    """ Calibrated levels whose measured win probability is in the given range """
+
+    return [
+        level
+        for level in levels
+        if "calibration" in level.metadata
+        and min_win_prob <= measured_win_prob(level) <= max_win_prob
+    ]
+
+
+def bucket_by_difficulty(levels, thresholds=(("easy", 0.5), ("medium", 0.2))):
+
+    """
+    Re-buckets levels by measured win probability. `thresholds` are the minimum win
+    probability for each label from easiest to hardest, the rest are "hard".
+    """
+
+    buckets = {label: [] for label, _ in thresholds}
+    buckets["hard"] = []
+
+    for level in levels:
+        win_prob = measured_win_prob(level)
+        label = next(
+            (label for label, min_prob in thresholds if win_prob >= min_prob), "hard"
+        )
+        level.metadata["measured_difficulty"] = label
+        buckets[label].append(level)
+
+    return buckets
@@ -0,0 +1,391 @@
+"""
+Level catalogue: level features in compact columns with bitmap indexes, for queries
+like "hard, 2 planets, win velocity 120-150, measured win rate 30-50%".
+
+Bitmaps are Python ints (bit i = row i). Categorical features get one bitmap per
+value. Numeric features keep the rows sorted by value, and range-encoded bitmaps
+("value <= edge") at quantile edges so a range filter is one AND NOT of two bitmaps
+covering the range.
+
+Bisecting the sorted rows gives each range filter's exact match count. A selective
+one drives the query by walking just its rows, otherwise the filters' bitmaps are
+ANDed and the survivors are checked against the columns.
+"""
+
+import json
+import math
+import sys
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+DIFFICULTIES = {"easy": 0, "medium": 1, "hard": 2}
+WIN_SIDES = {"left": 0, "top": 1, "right": 2, "bottom": 3}
+CATEGORICAL = ("difficulty", "n_planets", "win_side")
+NUMERIC = (
+    "total_mass",
+    "max_mass",
+    "orbit_a_max",
+    "orbit_b_max",
+    "win_length",
+    "win_velocity",
+    "gas",
+    "thrust",
+    "sc_mass",
+    "completion_score",
+    "attempt_score_reduction",
+    "gas_bonus_score",
+    "win_prob",
+)
+FEATURES = CATEGORICAL + NUMERIC
+
+# Set bit positions of every byte value, for turning bitmaps back into rows
+_BYTE_BITS = [tuple(i for i in range(8) if byte >> i & 1) for byte in range(256)]
+_CHUNK = 1 << 16  # bits turned into rows at a time
+_CHUNK_MASK = (1 << _CHUNK) - 1
+MAGIC = b"spaceshots-catalogue\n"
+
+
+def win_side(scene):
+
+    (x1, y1), (x2, y2) = scene.win_region
+    if x1 == x2:
+        return WIN_SIDES["left"] if x1 == 0 else WIN_SIDES["right"]
+    return WIN_SIDES["bottom"] if y1 == 0 else WIN_SIDES["top"]
+
+
+def level_features(scene) -> dict:
+
+    """ Catalogue features of a Scene (win_prob is NaN until it's calibrated) """
+
+    planets, sc = scene.planets, scene.sc
+    (x1, y1), (x2, y2) = scene.win_region
+    calibration = scene.metadata.get("calibration", {})
+
+    return dict(
+        difficulty=DIFFICULTIES.get(scene.metadata.get("difficulty"), -1),
+        n_planets=len(planets),
+        win_side=win_side(scene),
+        total_mass=sum(planet.mass for planet in planets),
+        max_mass=max((planet.mass for planet in planets), default=0.0),
+        orbit_a_max=max((planet.orbit.a for planet in planets), default=0.0),
+        orbit_b_max=max((planet.orbit.b for planet in planets), default=0.0),
+        win_length=math.hypot(x2 - x1, y2 - y1),
+        win_velocity=scene.win_min_velocity,
+        gas=sc._initial_gas_level,
+        thrust=sc.thrust_mag,
+        sc_mass=sc.mass,
+        completion_score=scene.completion_score,
+        attempt_score_reduction=scene.attempt_score_reduction,
+        gas_bonus_score=scene.gas_bonus_score,
+        win_prob=calibration.get("win_prob", math.nan),
+    )
+
+
+def _bitmap(rows, n):
+
+    bits = bytearray((n + 7) // 8)
+    for row in rows:
+        bits[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _bisect(order, column, x, right):
+
+    """ bisect_left / bisect_right of x in the column values taken in `order` """
+
+    lo, hi = 0, len(order)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        value = column[order[mid]]
+        if value < x or (right and value == x):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def iter_rows(bitmap):
+
+    """ Set bit positions of a bitmap, ascending """
+
+    # A chunk at a time, so a query with a limit only converts the start of it
+    offset = 0
+    while bitmap:
+        data = (bitmap & _CHUNK_MASK).to_bytes(_CHUNK // 8, "little")
+        for i, byte in enumerate(data):
+            if byte:
+                base = offset + i * 8
+                for bit in _BYTE_BITS[byte]:
+                    yield base + bit
+        bitmap >>= _CHUNK
+        offset += _CHUNK
+
+
+class LevelCatalogue:
+
+    """
+    Append-only table of level features keyed by level id (e.g. the seed). Indexes
+    are rebuilt on the first query after levels were added.
+    """
+
+    def __init__(self, bins=32):
+
+        self.bins = bins
+        self.ids = array("q")
+        self.columns = {name: array("i") for name in CATEGORICAL}
+        self.columns.update((name, array("d")) for name in NUMERIC)
+        self._index = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, scene, level_id=None) -> int:
+
+        """ Adds a Scene, the id defaults to its seed or else its row number """
+
+        if level_id is None:
+            level_id = scene.metadata.get("seed", len(self.ids))
+        return self.add_features(level_features(scene), level_id)
+
+    def add_features(self, features, level_id) -> int:
+
+        for name, column in self.columns.items():
+            column.append(features[name])
+        self.ids.append(level_id)
+        self._index = None
+        return level_id
+
+    def build(self):
+
+        n = len(self.ids)
+        index = {}
+
+        for name in CATEGORICAL:
+            rows = {}
+            for row, value in enumerate(self.columns[name]):
+                rows.setdefault(value, []).append(row)
+            index[name] = {value: _bitmap(r, n) for value, r in rows.items()}
+
+        for name in NUMERIC:
+            column = self.columns[name]
+            order = sorted(
+                (row for row in range(n) if not math.isnan(column[row])),
+                key=column.__getitem__,
+            )
+            values = [column[row] for row in order]
+
+            edges = sorted(
+                {
+                    values[(j * len(values)) // self.bins - 1]
+                    for j in range(1, self.bins)
+                }
+                if values
+                else ()
+            )
+            bits = bytearray((n + 7) // 8)
+            below, done = [], 0
+            for edge in edges:
+                end = bisect_right(values, edge)
+                for row in order[done:end]:
+                    bits[row >> 3] |= 1 << (row & 7)
+                done = end
+                below.append(int.from_bytes(bits, "little"))
+
+            index[name] = (edges, below, _bitmap(order, n), array("i", order))
+
+        self._index = index
+        return self
+
+    def _categories(self, name, value):
+
+        """ Allowed codes of a categorical filter """
+
+        names = DIFFICULTIES if name == "difficulty" else WIN_SIDES
+
+        def code(v):
+            return names[v] if isinstance(v, str) else v
+
+        if isinstance(value, tuple):
+            # A range, like on numeric features
+            lo, hi = value
+            lo = -math.inf if lo is None else code(lo)
+            hi = math.inf if hi is None else code(hi)
+            return {c for c in self._index[name] if lo <= c <= hi}
+
+        values = value if isinstance(value, (list, set, frozenset)) else (value,)
+        return {code(v) for v in values}
+
+    def _candidates(self, name, bounds, bitmap=None):
+
+        """
+        Bitmap of the rows in the range-encoded bins that cover (lo, hi), ANDed
+        with `bitmap` if given
+        """
+
+        lo, hi = bounds
+        edges, below, present = self._index[name][:3]
+
+        j = bisect_left(edges, hi)
+        candidates = below[j] if j < len(edges) else present
+        bitmap = candidates if bitmap is None else bitmap & candidates
+        j = bisect_left(edges, lo) - 1
+        if j >= 0:
+            # x & ~y without ~, which copies a big int into a negative one
+            bitmap ^= bitmap & below[j]
+
+        return bitmap
+
+    def _rows(self, filters):
+
+        if self._index is None:
+            self.build()
+
+        n = len(self.ids)
+        categorical, ranges = [], []
+        for name, value in filters.items():
+            assert name in self.columns, "Unknown feature %r!" % name
+            if name in CATEGORICAL:
+                categorical.append((name, self._categories(name, value)))
+            else:
+                lo, hi = value if isinstance(value, tuple) else (value, value)
+                lo = -math.inf if lo is None else lo
+                hi = math.inf if hi is None else hi
+                order = self._index[name][3]
+                column = self.columns[name]
+                start = _bisect(order, column, lo, False)
+                end = _bisect(order, column, hi, True)
+                ranges.append((name, (lo, hi), (start, max(end, start))))
+
+        # Selective range: walk its rows and check the rest on the columns
+        if ranges:
+            name, _, (start, end) = min(ranges, key=lambda r: r[2][1] - r[2][0])
+            if end - start <= n // 16:
+                checks = [(self.columns[name], lo, hi) for name, (lo, hi), _ in ranges]
+                allowed = [(self.columns[name], codes) for name, codes in categorical]
+                for row in sorted(self._index[name][3][start:end]):
+                    if all(lo <= c[row] <= hi for c, lo, hi in checks) and all(
+                        c[row] in codes for c, codes in allowed
+                    ):
+                        yield row
+                return
+
+        bitmap = None if categorical or ranges else (1 << n) - 1
+        for name, codes in categorical:
+            mask = 0
+            for code in codes:
+                mask |= self._index[name].get(code, 0)
+            bitmap = mask if bitmap is None else bitmap & mask
+        for name, bounds, _ in ranges:
+            bitmap = self._candidates(name, bounds, bitmap)
+
+        # The range bitmaps are only exact at bin edges
+        checks = [(self.columns[name], lo, hi) for name, (lo, hi), _ in ranges]
+        for row in iter_rows(bitmap):
+            if all(lo <= c[row] <= hi for c, lo, hi in checks):
+                yield row
+
+    def query(self, limit=None, **filters) -> list:
+
+        """
+        Ids of the levels matching every filter. A filter is a value, a (lo, hi)
+        range (inclusive, None for open ended) on any feature or, for categorical
+        features, a list or set of values. Difficulty and win side can be given by
+        name, their ranges follow the codes (easy < medium < hard).
+
+            catalogue.query(difficulty=["medium", "hard"], n_planets=(2, None),
+                            win_velocity=(120, 150), win_prob=(0.3, 0.5))
+        """
+
+        ids = []
+        for row in self._rows(filters):
+            ids.append(self.ids[row])
+            if limit is not None and len(ids) >= limit:
+                break
+
+        return ids
+
+    def count(self, **filters) -> int:
+        return sum(1 for _ in self._rows(filters))
+
+    def features(self, row) -> dict:
+        return {name: column[row] for name, column in self.columns.items()}
+
+    def save(self, path):
+
+        """
+        Columns and indexes to one file: a JSON header, then the arrays and bitmaps
+        as raw little endian bytes. Loading it runs no code, unlike a pickle.
+        """
+
+        if self._index is None:
+            self.build()
+
+        n, index = len(self.ids), self._index
+        header = dict(
+            version=2,
+            bins=self.bins,
+            rows=n,
+            categories={name: sorted(index[name]) for name in CATEGORICAL},
+            edges={name: index[name][0] for name in NUMERIC},
+            sorted_rows={name: len(index[name][3]) for name in NUMERIC},  # no NaNs
+        )
+        arrays = [self.ids] + [self.columns[name] for name in FEATURES]
+        arrays += [index[name][3] for name in NUMERIC]
+        bitmaps = [
+            index[name][code]
+            for name in CATEGORICAL
+            for code in header["categories"][name]
+        ]
+        for name in NUMERIC:
+            bitmaps += index[name][1] + [index[name][2]]
+
+        with open(path, "wb") as f:
+            data = json.dumps(header).encode()
+            f.write(MAGIC + len(data).to_bytes(8, "little") + data)
+            for values in arrays:
+                if sys.byteorder != "little":
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                values.tofile(f)
+            for bitmap in bitmaps:
+                f.write(bitmap.to_bytes((n + 7) // 8, "little"))
+
+    @classmethod
+    def load(cls, path):
+
+        with open(path, "rb") as f:
+            assert f.read(len(MAGIC)) == MAGIC, "Not a level catalogue!"
+            header = json.loads(f.read(int.from_bytes(f.read(8), "little")))
+            n, nbytes = header["rows"], (header["rows"] + 7) // 8
+
+            def read_array(typecode, length=n):
+                values = array(typecode)
+                values.fromfile(f, length)
+                if sys.byteorder != "little":
+                    values.byteswap()
+                return values
+
+            def read_bitmap():
+                return int.from_bytes(f.read(nbytes), "little")
+
+            catalogue = cls(header["bins"])
+            catalogue.ids = read_array("q")
+            for name in FEATURES:
+                catalogue.columns[name] = read_array(catalogue.columns[name].typecode)
+            orders = {
+                name: read_array("i", header["sorted_rows"][name]) for name in NUMERIC
+            }
+
+            index = {}
+            for name in CATEGORICAL:
+                index[name] = {
+                    code: read_bitmap() for code in header["categories"][name]
+                }
+            for name in NUMERIC:
+                edges = header["edges"][name]
+                below = [read_bitmap() for _ in edges]
+                index[name] = (edges, below, read_bitmap(), orders[name])
+
+        catalogue._index = index
+        return catalogue
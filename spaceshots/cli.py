@@ -0,0 +1,400 @@
+"""
+`spaceshots` command line tool for headless batch jobs.
+
+    spaceshots generate -n 1000 -d mixed -o levels.jsonl
+    spaceshots simulate levels.jsonl --policy heuristic -o results.jsonl
+    spaceshots bench --levels 64 --ticks 2000
+    spaceshots sweep --grid G=5e-11,6.67e-11,8e-11 -o sweep.csv
+
+`simulate` reads JSONL, one session per line: `level` (from `generate`) or `seed`
+and `difficulty` to rebuild one, an optional `commands` list (0-4 per tick) to
+replay, otherwise the `--policy` plays. Work is spread over all cores unless
+`--jobs` says otherwise, progress goes to stderr and results stream to the output.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+from multiprocessing import Pool
+from .calibrate import HeuristicController, RandomController
+from .game import Game
+from .scene import LevelBuilder, Scene
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+def _idle(scene, tick, rng):
+    return 0
+
+
+POLICIES = {
+    "idle": lambda: _idle,
+    "random": RandomController,
+    "heuristic": HeuristicController,
+}
+
+
+def build_level(difficulty, seed, size=(500, 500)):
+
+    """ Seeded level, "mixed" picks the difficulty from the seed as well """
+
+    if difficulty == "mixed":
+        difficulty = random.Random(seed).choice(DIFFICULTIES)
+
+    with contextlib.redirect_stdout(io.StringIO()):  # create() prints its timing
+        return LevelBuilder(*size).create(difficulty, seed)
+
+
+def play(scene, commands=None, policy="heuristic", seed=0, fps=60, max_ticks=3600):
+
+    """
+    Plays a session on a fresh level until it's won, the commands run out or
+    `max_ticks` pass. Failed attempts restart the level like the game does.
+    """
+
+    game = Game(fps=fps, scenes=[scene])
+    controller = None if commands is not None else POLICIES[policy]()
+    rng = random.Random(seed)
+    n_ticks = min(len(commands), max_ticks) if commands is not None else max_ticks
+
+    tick = attempt_tick = 0
+    while tick < n_ticks and not scene.won:
+        if controller is None:
+            command = commands[tick]
+        else:
+            command = controller(scene, attempt_tick, rng)
+
+        _, failed, _ = game.step(command)
+        tick += 1
+        attempt_tick = 0 if failed else attempt_tick + 1
+
+    score, gas_bonus = game.calc_score()
+    return dict(
+        won=scene.won,
+        attempts=scene.attempts,
+        ticks=tick,
+        gas_level=scene.sc.gas_level,
+        score=score,
+        gas_bonus=gas_bonus,
+    )
+
+
+def _generate_job(args):
+
+    index, difficulty, seed, size = args
+    scene = build_level(difficulty, seed, size)
+    return dict(id=index, level=scene.to_dict())
+
+
+def _simulate_job(args):
+
+    index, record, options = args
+    if "level" in record:
+        scene = Scene.from_dict(record["level"])
+    else:
+        scene = build_level(
+            record.get("difficulty", "mixed"),
+            record["seed"],
+            tuple(record.get("size", options["size"])),
+        )
+
+    result = play(
+        scene,
+        record.get("commands"),
+        record.get("policy", options["policy"]),
+        options["seed"] + index,
+        options["fps"],
+        options["max_ticks"],
+    )
+    result["id"] = record.get("id", index)
+    return result
+
+
+def _bench_job(args):
+
+    difficulty, seed, ticks = args
+    game = Game(scenes=[build_level(difficulty, seed)])
+    controller = HeuristicController()
+    rng = random.Random(seed)
+
+    start = time.perf_counter()
+    for tick in range(ticks):
+        game.step(controller(game.current_scene, tick, rng))
+
+    return ticks, time.perf_counter() - start
+
+
+def parallel_map(func, items, jobs=None, chunksize=4):
+
+    """ Ordered, streaming map over `jobs` processes (all cores by default) """
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        yield from map(func, items)
+        return
+
+    with Pool(jobs) as pool:
+        yield from pool.imap(func, items, chunksize)
+
+
+class Progress:
+
+    """ Throttled `done/total (rate/s)` line on stderr """
+
+    def __init__(self, label, total=None, stream=sys.stderr, interval=0.5):
+
+        self.label = label
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.done = 0
+        self.start = self.last = time.perf_counter()
+
+    @property
+    def rate(self):
+        return self.done / max(time.perf_counter() - self.start, 1e-9)
+
+    def update(self, n=1):
+
+        self.done += n
+        now = time.perf_counter()
+        if self.stream is not None and now - self.last >= self.interval:
+            self.last = now
+            self._write("\r")
+
+    def close(self):
+
+        if self.stream is not None:
+            self._write("\r")
+            self.stream.write("\n")
+
+    def _write(self, prefix):
+
+        total = "/%d" % self.total if self.total is not None else ""
+        self.stream.write(
+            "%s%s: %d%s (%.1f/s)" % (prefix, self.label, self.done, total, self.rate)
+        )
+        self.stream.flush()
+
+
+def _open_output(path, fmt):
+
+    if path == "-":
+        return contextlib.nullcontext(
+            sys.stdout.buffer if fmt == "msgpack" else sys.stdout
+        )
+    return open(path, "wb" if fmt == "msgpack" else "w")
+
+
+def write_records(records, path="-", fmt="jsonl", progress=None):
+
+    """
+    Streams records as JSON lines, or back to back MessagePack maps for
+    `fmt="msgpack"` (needs `spaceshots[msgpack]`, read them with
+    `msgpack.Unpacker(f)`).
+    """
+
+    if fmt == "msgpack":
+        import msgpack
+
+        packer = msgpack.Packer()
+
+    with _open_output(path, fmt) as f:
+        for record in records:
+            if fmt == "msgpack":
+                f.write(packer.pack(record))
+            else:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            if progress is not None:
+                progress.update()
+
+    if progress is not None:
+        progress.close()
+
+
+def read_records(path):
+
+    """ JSON objects from a JSONL file (or stdin for "-"), blank lines skipped """
+
+    with contextlib.nullcontext(sys.stdin) if path == "-" else open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def cmd_generate(args):
+
+    jobs = (
+        (i, args.difficulty, args.seed + i, tuple(args.size)) for i in range(args.n)
+    )
+    progress = Progress("generate", args.n, None if args.quiet else sys.stderr)
+    write_records(
+        parallel_map(_generate_job, jobs, args.jobs), args.output, args.format, progress
+    )
+
+
+def cmd_simulate(args):
+
+    options = dict(
+        policy=args.policy,
+        seed=args.seed,
+        fps=args.fps,
+        max_ticks=args.max_ticks,
+        size=args.size,
+    )
+    jobs = ((i, record, options) for i, record in enumerate(read_records(args.input)))
+    progress = Progress("simulate", None, None if args.quiet else sys.stderr)
+    write_records(
+        parallel_map(_simulate_job, jobs, args.jobs), args.output, args.format, progress
+    )
+
+
+def cmd_bench(args):
+
+    jobs = [(args.difficulty, args.seed + i, args.ticks) for i in range(args.levels)]
+    progress = Progress("bench", args.levels, None if args.quiet else sys.stderr)
+
+    start = time.perf_counter()
+    ticks = busy = 0.0
+    for level_ticks, level_time in parallel_map(_bench_job, jobs, args.jobs, 1):
+        ticks += level_ticks
+        busy += level_time
+        progress.update()
+    wall = time.perf_counter() - start
+    progress.close()
+
+    summary = dict(
+        levels=args.levels,
+        ticks=int(ticks),
+        seconds=round(wall, 3),
+        ticks_per_second=round(ticks / wall, 1) if ticks else 0.0,
+        us_per_tick=round(1e6 * busy / ticks, 2) if ticks else None,  # single core
+    )
+    print(json.dumps(summary))
+
+
+def cmd_sweep(args):
+
+    from .sweep import (
+        METRICS,
+        check_point,
+        grid,
+        parse_axis,
+        random_design,
+        sweep,
+        write_table,
+    )
+
+    try:
+        if args.random:
+            ranges = dict(parse_axis(text, ":") for text in args.range)
+            for name, values in ranges.items():
+                if len(values) != 2:
+                    raise ValueError("Expected %s=lo:hi" % name)
+            points = random_design(args.random, args.seed, **ranges)
+        else:
+            points = grid(**dict(parse_axis(text) for text in args.grid))
+        if not (points and points[0]):
+            raise ValueError("Nothing to sweep, give --grid or --random/--range")
+        check_point(points[0], LevelBuilder(*args.size))
+    except ValueError as error:
+        args.parser.error(str(error))
+
+    rows = sweep(
+        points,
+        args.levels,
+        args.difficulty,
+        args.policy,
+        args.seed,
+        args.fps,
+        args.max_ticks,
+        args.size,
+        args.jobs,
+    )
+    columns = ["point"] + list(points[0]) + list(METRICS)
+    progress = Progress("sweep", len(points), None if args.quiet else sys.stderr)
+    with _open_output(args.output, "csv") as f:
+        write_table(rows, f, columns, progress)
+
+
+def build_parser():
+
+    parser = argparse.ArgumentParser(
+        prog="spaceshots", description=__doc__.split("\n")[1]
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "-j", "--jobs", type=int, default=None, help="default: all cores"
+    )
+    common.add_argument("-s", "--seed", type=int, default=0)
+    common.add_argument("-q", "--quiet", action="store_true", help="no progress")
+    common.add_argument("--size", type=float, nargs=2, default=(500, 500))
+
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("-o", "--output", default="-", help="default: stdout")
+    output.add_argument("-f", "--format", choices=("jsonl", "msgpack"), default="jsonl")
+
+    gen = sub.add_parser("generate", parents=[common, output], help="build levels")
+    gen.add_argument("-n", type=int, default=100, help="number of levels")
+    gen.add_argument(
+        "-d", "--difficulty", choices=DIFFICULTIES + ("mixed",), default="mixed"
+    )
+    gen.set_defaults(func=cmd_generate)
+
+    sim = sub.add_parser(
+        "simulate", parents=[common, output], help="replay logs or play policies"
+    )
+    sim.add_argument("input", help="JSONL sessions, - for stdin")
+    sim.add_argument("-p", "--policy", choices=sorted(POLICIES), default="heuristic")
+    sim.add_argument("--fps", type=float, default=60)
+    sim.add_argument("--max-ticks", type=int, default=3600)
+    sim.set_defaults(func=cmd_simulate)
+
+    bench = sub.add_parser("bench", parents=[common], help="measure tick throughput")
+    bench.add_argument("--levels", type=int, default=32)
+    bench.add_argument("--ticks", type=int, default=2000, help="per level")
+    bench.add_argument(
+        "-d", "--difficulty", choices=DIFFICULTIES + ("mixed",), default="medium"
+    )
+    bench.set_defaults(func=cmd_bench)
+
+    swp = sub.add_parser(
+        "sweep", parents=[common], help="compare physics constants and level ranges"
+    )
+    swp.add_argument("-o", "--output", default="-", help="CSV, default: stdout")
+    swp.add_argument(
+        "--grid", action="append", default=[], help="name=v1,v2,... (repeatable)"
+    )
+    swp.add_argument("--random", type=int, default=0, help="number of random points")
+    swp.add_argument(
+        "--range", action="append", default=[], help="name=lo:hi (repeatable)"
+    )
+    swp.add_argument("--levels", type=int, default=8, help="sessions per point")
+    swp.add_argument(
+        "-d", "--difficulty", choices=DIFFICULTIES + ("mixed",), default="mixed"
+    )
+    swp.add_argument("-p", "--policy", choices=sorted(POLICIES), default="heuristic")
+    swp.add_argument("--fps", type=float, default=60)
+    swp.add_argument("--max-ticks", type=int, default=1800)
+    swp.set_defaults(func=cmd_sweep, parser=swp)
+
+    return parser
+
+
+def main(argv=None):
+
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import time
+
+
+class FixedStepClock:
+
+    """
+    Accumulator based clock. Real time is fed in, fixed physics steps come out.
+
+    Time is accumulated against absolute timestamps so sleeping or rendering late
+    never drifts the physics rate. After a stall at most `max_steps` catch-up steps
+    are run per call and any remaining backlog is dropped.
+    """
+
+    def __init__(self, dt, max_steps=5, timer=time.perf_counter):
+
+        assert dt > 0, "Clock must have a positive time step!"
+
+        self.dt = dt
+        self.max_steps = max_steps
+        self.timer = timer
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.dropped = 0
+        self.last_time = None
+        self.next_deadline = None
+
+    def reset(self, now=None):
+
+        now = self.timer() if now is None else now
+        self.accumulator = 0.0
+        self.last_time = now
+        self.next_deadline = now + self.dt
+
+    def advance(self, now=None) -> int:
+
+        """ Feed the current time in, returns how many fixed steps should be run """
+
+        now = self.timer() if now is None else now
+        if self.last_time is None:
+            self.reset(now)
+            return 0
+
+        self.accumulator += max(now - self.last_time, 0.0)
+        self.last_time = now
+
+        steps = int(self.accumulator // self.dt)
+        if steps > self.max_steps:
+            # Too far behind, drop the backlog instead of spiralling
+            self.dropped += steps - self.max_steps
+            self.accumulator -= (steps - self.max_steps) * self.dt
+            steps = self.max_steps
+
+        self.accumulator -= steps * self.dt
+        self.ticks += steps
+
+        return steps
+
+    @property
+    def alpha(self) -> float:
+
+        """ Fraction of a step between the last two ticks, for render interpolation """
+
+        return min(self.accumulator / self.dt, 1.0)
+
+    def sleep_until_next(self):
+
+        """ Sleep until the next absolute tick deadline (no drift) """
+
+        now = self.timer()
+        if self.next_deadline is None:
+            self.next_deadline = now + self.dt
+
+        delay = self.next_deadline - now
+        self.next_deadline += self.dt
+
+        if delay > 0:
+            time.sleep(delay)
+        elif -delay > self.max_steps * self.dt:
+            # Fell too far behind, re-anchor rather than bursting
+            self.next_deadline = now + self.dt
+
+
+def lerp(a, b, alpha):
+    return a + (b - a) * alpha
@@ -0,0 +1,416 @@
+"""
+Deterministic fixed-point version of the game step, for clients that predict locally.
+
+Every quantity is an integer so other implementations (e.g. JS with BigInt) can
+reproduce it bit for bit:
+
+- Lengths, speeds and accelerations are Q16 fixed point (value * 2^16). Products are
+  scaled back with an arithmetic (floor) shift, divisions truncate towards zero.
+- Orbit angles are phases in 1 / 2^24 of a turn, sin / cos come from a 4097 entry
+  Q16 table with linear interpolation (both are in the conformance file).
+- Square roots are floor integer square roots.
+- The time step is 1 / fps with an integer fps, applied by truncating division.
+
+The step follows `Scene.update_all_pos` / `check_status`: planets move, gravity from
+every planet and thrust along the body axis of the previous velocity change the
+velocity, then the craft moves. Collisions use the craft position before the move.
+Float levels are converted once with `from_scene`, after that only the integer level
+dict (`to_dict`) is needed.
+"""
+
+import json
+import math
+import os
+
+from .physics import G
+
+FIXED_BITS = 16
+ONE = 1 << FIXED_BITS
+PHASE_BITS = 24
+FULL_TURN = 1 << PHASE_BITS
+SINE_BITS = 12  # table entries per turn = 2^SINE_BITS
+FNV_OFFSET = 0xCBF29CE484222325
+FNV_PRIME = 0x100000001B3
+MASK_64 = (1 << 64) - 1
+
+CONFORMANCE_PATH = os.path.join(os.path.dirname(__file__), "data", "conformance.json")
+DIRECTIONS = (None, "+y", "-x", "-y", "+x")
+
+
+def to_fixed(value):
+
+    """ Float to Q16, rounding half up. Only used when converting float levels """
+
+    return math.floor(value * ONE + 0.5)
+
+
+def to_phase(angle):
+
+    return math.floor(angle / (2 * math.pi) * FULL_TURN + 0.5) % FULL_TURN
+
+
+def tdiv(a, b):
+
+    """ Integer division truncating towards zero (like C and JS BigInt) """
+
+    q = abs(a) // abs(b)
+    return q if (a < 0) == (b < 0) else -q
+
+
+def fmul(a, b):
+    return (a * b) >> FIXED_BITS
+
+
+def fdiv(a, b):
+    return tdiv(a << FIXED_BITS, b)
+
+
+def _make_sine_table():
+
+    """ First quadrant from math.sin, the rest by symmetry so it is exactly odd """
+
+    quarter = 1 << (SINE_BITS - 2)
+    first = [
+        math.floor(math.sin(math.pi / 2 * i / quarter) * ONE + 0.5)
+        for i in range(quarter + 1)
+    ]
+    half = first + first[-2::-1]
+    return half + [-v for v in half[1:]]
+
+
+SINE_TABLE = _make_sine_table()
+
+
+def fsin(phase):
+
+    """ Q16 sine of a phase (1 / 2^24 turns), linearly interpolated """
+
+    phase %= FULL_TURN
+    shift = PHASE_BITS - SINE_BITS
+    i, frac = phase >> shift, phase & ((1 << shift) - 1)
+    s0, s1 = SINE_TABLE[i], SINE_TABLE[i + 1]
+    return s0 + (((s1 - s0) * frac) >> shift)
+
+
+def fcos(phase):
+    return fsin(phase + FULL_TURN // 4)
+
+
+def fnv1a(values, h=FNV_OFFSET):
+
+    """ 64 bit FNV-1a over signed integers, each as 8 little endian bytes """
+
+    for value in values:
+        for byte in (value & MASK_64).to_bytes(8, "little"):
+            h = ((h ^ byte) * FNV_PRIME) & MASK_64
+    return h
+
+
+class DeterministicScene:
+
+    """
+    One level played in fixed point. `step` takes the usual 0-4 commands and, like
+    `Game`, puts the craft back at the start after a win or a failure.
+    """
+
+    def __init__(self, level):
+
+        self.level = level
+        self.fps = level["fps"]
+        self.size = tuple(level["size"])
+        self.win_region = tuple(tuple(point) for point in level["win_region"])
+        self.win_velocity_sq = level["win_velocity"] ** 2
+        self.sc = dict(level["sc"])
+        self.planets = [dict(planet) for planet in level["planets"]]
+        self.attempts = 0
+        self.won = False
+        self.ticks = 0
+        self.reset_pos()
+
+    @classmethod
+    def from_scene(cls, scene, fps=60):
+
+        """ Fixed-point copy of a float Scene as it starts """
+
+        assert int(fps) == fps, "Deterministic mode needs an integer fps!"
+        fps = int(fps)
+        sc = scene.sc
+
+        planets = []
+        for planet, progress in zip(scene.planets, scene.initial_orbit_pos):
+            orbit = planet.orbit
+            step = to_phase(orbit.angular_step / fps)
+            if not orbit.cw:
+                step = -step
+            planets.append(
+                dict(
+                    gm=to_fixed(G * planet.mass),
+                    radius=to_fixed(planet.poly.r),
+                    a=to_fixed(orbit.a),
+                    b=to_fixed(orbit.b),
+                    center_x=to_fixed(orbit.center_x),
+                    center_y=to_fixed(orbit.center_y),
+                    phase=to_phase(progress),
+                    step=step,
+                )
+            )
+
+        level = dict(
+            fps=fps,
+            size=[to_fixed(v) for v in scene.size],
+            win_region=[[to_fixed(v) for v in point] for point in scene.win_region],
+            win_velocity=to_fixed(scene.win_min_velocity),
+            sc=dict(
+                x=to_fixed(scene.sc_start_pos[0]),
+                y=to_fixed(scene.sc_start_pos[1]),
+                radius=to_fixed(sc.poly.r),
+                gas=int(sc._initial_gas_level),
+                gas_per_tick=round(sc.thrust_mag * sc.gas_per_thrust),
+                thrust_dv=to_fixed(sc.thrust_mag / sc.mass / fps),
+            ),
+            planets=planets,
+        )
+        return cls(level)
+
+    def to_dict(self) -> dict:
+        return self.level
+
+    def reset_pos(self):
+
+        self.x, self.y = self.sc["x"], self.sc["y"]
+        self.vx = self.vy = 0
+        self.gas = self.sc["gas"]
+        self.thrust = False
+        self.thrust_direction = "-y"
+        for planet in self.planets:
+            planet["phase_now"] = planet["phase"]
+            self._place(planet)
+
+    @staticmethod
+    def _place(planet):
+
+        phase = planet["phase_now"]
+        planet["x"] = planet["center_x"] + fmul(planet["a"], fcos(phase))
+        planet["y"] = planet["center_y"] + fmul(planet["b"], fsin(phase))
+
+    def control(self, command):
+
+        if command in (0, 1, 2, 3, 4):
+            self.thrust = command != 0
+            if command:
+                self.thrust_direction = DIRECTIONS[command]
+
+    def _thrust(self):
+
+        """ Velocity change from the thrust, along the body axis of the old velocity """
+
+        if self.gas <= 0:
+            self.gas = 0
+            self.thrust = False
+        if not self.thrust:
+            return 0, 0
+
+        self.gas -= self.sc["gas_per_tick"]
+        speed = math.isqrt(self.vx * self.vx + self.vy * self.vy)
+        if speed:
+            bx, by = fdiv(abs(self.vy), speed), fdiv(-self.vx, speed)
+        else:
+            bx, by = ONE, 0
+
+        direction = self.thrust_direction
+        if direction == "-y":
+            tx, ty = by, -bx
+        elif direction == "+y":
+            tx, ty = -by, bx
+        elif direction == "-x":
+            tx, ty = -bx, -by
+        else:
+            tx, ty = bx, by
+
+        dv = self.sc["thrust_dv"]
+        return fmul(tx, dv), fmul(ty, dv)
+
+    def update_all_pos(self):
+
+        for planet in self.planets:
+            planet["phase_now"] = (planet["phase_now"] + planet["step"]) % FULL_TURN
+            self._place(planet)
+
+        dvx, dvy = self._thrust()
+
+        # Gravity (and the collision check) at the position before the move
+        ax = ay = 0
+        collided = False
+        reach = self.sc["radius"]
+        for planet in self.planets:
+            dx, dy = planet["x"] - self.x, planet["y"] - self.y
+            dist_sq = dx * dx + dy * dy
+            limit = reach + planet["radius"]
+            collided = collided or dist_sq <= limit * limit
+
+            dist = math.isqrt(dist_sq)
+            if dist:
+                acc = fdiv(fdiv(planet["gm"], dist), dist)
+                ax += tdiv(acc * dx, dist)
+                ay += tdiv(acc * dy, dist)
+
+        self.vx += dvx + tdiv(ax, self.fps)
+        self.vy += dvy + tdiv(ay, self.fps)
+        self.x += tdiv(self.vx, self.fps)
+        self.y += tdiv(self.vy, self.fps)
+        self.collided = collided
+
+    def check_status(self):
+
+        """ Same rules as Scene.edge_status plus the collision test """
+
+        x, y = self.x, self.y
+        screen_x, screen_y = self.size
+        (x1, y1), (x2, y2) = self.win_region
+        fast_enough = self.vx * self.vx + self.vy * self.vy >= self.win_velocity_sq
+        won, failed, message = False, False, ""
+
+        if x1 == x2 and ((x1 == 0 and x <= 0) or (x1 == screen_x and x >= screen_x)):
+            if y1 <= y <= y2 and fast_enough:
+                won, message = True, "Won!"
+
+        if y1 == y2 and ((y1 == 0 and y <= 0) or (y1 == screen_y and y >= screen_y)):
+            if x1 <= x <= x2 and fast_enough:
+                won, message = True, "Won!"
+
+        if not won and (not 0 < x < screen_x or not 0 < y < screen_y):
+            failed, message = True, "Failed: Out of bounds."
+
+        if not failed and self.collided:
+            failed, message = True, "Failed: Collision."
+
+        return won, failed, message
+
+    def step(self, command):
+
+        self.control(command)
+        self.update_all_pos()
+        won, failed, message = self.check_status()
+        self.ticks += 1
+
+        if won or failed:
+            self.won = self.won or won
+            self.attempts += 1
+            self.reset_pos()
+
+        return won, failed, message
+
+    def state(self):
+
+        """ Integers that define the dynamic state, in hashing order """
+
+        values = [self.x, self.y, self.vx, self.vy, self.gas, int(self.thrust)]
+        values += [planet["phase_now"] for planet in self.planets]
+        return values
+
+    def state_hash(self) -> str:
+        return "%016x" % fnv1a(self.state())
+
+
+def run_vector(level, commands):
+
+    """ Per-tick state hashes (after each step) of playing `commands` on a level """
+
+    scene = DeterministicScene(level)
+    hashes, events = [], []
+    for tick, command in enumerate(commands):
+        won, failed, message = scene.step(command)
+        hashes.append(scene.state_hash())
+        if won or failed:
+            events.append([tick, message])
+
+    return dict(hashes=hashes, events=events, final_state=scene.state())
+
+
+def make_conformance(cases, path=CONFORMANCE_PATH):
+
+    """ Writes the vector file from (name, level dict, commands) cases """
+
+    vectors = dict(
+        version=1,
+        fixed_bits=FIXED_BITS,
+        phase_bits=PHASE_BITS,
+        sine_bits=SINE_BITS,
+        sine_table=SINE_TABLE,
+        cases=[
+            dict(
+                name=name, level=level, commands=commands, **run_vector(level, commands)
+            )
+            for name, level, commands in cases
+        ],
+    )
+    with open(path, "w") as f:
+        json.dump(vectors, f, separators=(",", ":"))
+
+    return vectors
+
+
+def check_conformance(path=CONFORMANCE_PATH):
+
+    """
+    Replays every case in the vector file. Returns a list of (case name, first tick
+    whose hash differs) for the cases that don't match, empty when all do.
+    """
+
+    with open(path) as f:
+        vectors = json.load(f)
+
+    mismatches = []
+    if vectors["sine_table"] != SINE_TABLE:
+        mismatches.append(("sine_table", None))
+
+    for case in vectors["cases"]:
+        result = run_vector(case["level"], case["commands"])
+        if result["hashes"] != case["hashes"]:
+            pairs = enumerate(zip(result["hashes"], case["hashes"]))
+            tick = next((i for i, (a, b) in pairs if a != b), len(result["hashes"]))
+            mismatches.append((case["name"], tick))
+
+    return mismatches
+
+
+def default_cases():
+
+    """
+    Cases for the shipped vector file: coasting, every thrust direction, running out
+    of gas, out of bounds, collisions and a win.
+    """
+
+    from .cli import build_level
+
+    def level(difficulty, seed):
+        return DeterministicScene.from_scene(build_level(difficulty, seed)).to_dict()
+
+    cycle = [command for command in (1, 2, 3, 4, 0) for _ in range(15)]
+
+    # Straight up through the top edge, no planets to pull it off course
+    win = level("easy", 0)
+    width, height = win["size"]
+    win["planets"] = []
+    win["win_region"] = [[0, height], [width, height]]
+    win["win_velocity"] = to_fixed(10)
+    win["sc"].update(x=width // 2, y=height - to_fixed(40))
+
+    # Starts where a planet (one that's on screen) is
+    collision = level("medium", 0)
+    planet = DeterministicScene(collision).planets[1]
+    collision["sc"].update(x=planet["x"], y=planet["y"])
+
+    return [
+        ("coast", level("easy", 0), [0] * 300),
+        ("thrust_cycle", level("medium", 1), cycle * 8),
+        ("gas_out", level("hard", 6), [4] * 400),
+        ("out_of_bounds", level("easy", 1), [3] * 200),
+        ("collision", collision, [0] * 30),
+        ("win", win, [1] * 240),
+    ]
+
+
+if __name__ == "__main__":
+    make_conformance(default_cases())
+    print(check_conformance() or "ok")
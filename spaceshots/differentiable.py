@@ -0,0 +1,259 @@
+import math
+
+from .physics import G
+
+
+class TrajectoryModel:
+
+    """
+    Smooth model of a scene's spacecraft with exact gradients (hand written adjoint).
+
+    Controls are a continuous thrust schedule, one (forward, sideways) pair per tick
+    in the craft's body frame: (1, 0) is command 4 ("+x"), (0, 1) is command 1 ("+y"),
+    (-1, 0) is command 2 and (0, -1) is command 3. The step is the same as
+    `Spacecraft.update_pos` with gravity from every planet, but gas limits,
+    collisions and the screen edges are left out so the model stays smooth.
+    """
+
+    def __init__(self, scene, n_ticks, dt=1 / 60):
+
+        sc = scene.sc
+        self.n_ticks = n_ticks
+        self.dt = dt
+        self.mass = sc.mass
+        self.thrust_mag = sc.thrust_mag
+        self.gas_per_tick = round(sc.thrust_mag * sc.gas_per_thrust)
+        self.start = (sc.x, sc.y, sc.vel.x, sc.vel.y)
+        self.gm = [G * planet.mass for planet in scene.planets]
+
+        # Planet motion doesn't depend on the controls, so it's tabulated once
+        self.planet_pos = []
+        for planet in scene.planets:
+            orbit = planet.orbit
+            step = orbit.angular_step * dt if orbit.cw else -orbit.angular_step * dt
+            progress = orbit.progress
+            positions = []
+            for _ in range(n_ticks):
+                progress += step
+                positions.append((orbit.x(progress), orbit.y(progress)))
+            self.planet_pos.append(positions)
+
+    def _gravity(self, k, x, y):
+
+        """ Acceleration and its (symmetric) jacobian wrt position at tick k """
+
+        ax = ay = jxx = jxy = jyy = 0.0
+        for gm, positions in zip(self.gm, self.planet_pos):
+            px, py = positions[k]
+            dx, dy = px - x, py - y
+            r2 = dx * dx + dy * dy
+            r = math.sqrt(r2)
+            inv3 = gm / (r2 * r)
+            ax += dx * inv3
+            ay += dy * inv3
+            inv5 = 3 * inv3 / r2
+            jxx -= inv3 - dx * dx * inv5
+            jxy += dx * dy * inv5
+            jyy -= inv3 - dy * dy * inv5
+
+        return ax, ay, jxx, jxy, jyy
+
+    @staticmethod
+    def _body(vx, vy):
+
+        """ Body axis (same as the craft's theta) and its jacobian wrt velocity """
+
+        s2 = vx * vx + vy * vy
+        if s2 == 0.0:
+            return 1.0, 0.0, (0.0, 0.0, 0.0, 0.0)
+
+        s = math.sqrt(s2)
+        s3 = s2 * s
+        avy = abs(vy)
+        sign = 1.0 if vy >= 0 else -1.0
+        jac = (
+            -avy * vx / s3,  # dbx/dvx
+            sign * vx * vx / s3,  # dbx/dvy
+            -vy * vy / s3,  # dby/dvx
+            vx * vy / s3,  # dby/dvy
+        )
+
+        return avy / s, -vx / s, jac
+
+    def rollout(self, controls):
+
+        """ States (x, y, vx, vy) after each tick, starting with the initial state """
+
+        assert len(controls) == self.n_ticks, "Need one control per tick!"
+
+        dt, k_thrust = self.dt, self.thrust_mag / self.mass
+        x, y, vx, vy = self.start
+        states = [self.start]
+
+        for k, (u0, u1) in enumerate(controls):
+            bx, by, _ = self._body(vx, vy)
+            ax, ay, _, _, _ = self._gravity(k, x, y)
+            vx += dt * (k_thrust * (u0 * bx - u1 * by) + ax)
+            vy += dt * (k_thrust * (u0 * by + u1 * bx) + ay)
+            x += dt * vx
+            y += dt * vy
+            states.append((x, y, vx, vy))
+
+        return states
+
+    def final_state(self, controls):
+        return self.rollout(controls)[-1]
+
+    def gradient(self, controls, state_grad):
+
+        """
+        Vector-jacobian product: gradient wrt the controls of a loss whose gradient wrt
+        the final (x, y, vx, vy) is `state_grad`. Returns (final_state, grads).
+        """
+
+        states = self.rollout(controls)
+        return states[-1], self._backward(states, controls, state_grad)
+
+    def _backward(self, states, controls, state_grad):
+
+        dt, k_thrust = self.dt, self.thrust_mag / self.mass
+        lx, ly, lvx, lvy = state_grad
+        grads = [None] * self.n_ticks
+
+        for k in range(self.n_ticks - 1, -1, -1):
+            x, y, vx, vy = states[k]
+            u0, u1 = controls[k]
+
+            # r' = r + dt * v', so v' also feeds the position
+            lvx += dt * lx
+            lvy += dt * ly
+
+            bx, by, (bxx, bxy, byx, byy) = self._body(vx, vy)
+            grads[k] = (
+                dt * k_thrust * (bx * lvx + by * lvy),
+                dt * k_thrust * (-by * lvx + bx * lvy),
+            )
+
+            _, _, jxx, jxy, jyy = self._gravity(k, x, y)
+            lx += dt * (jxx * lvx + jxy * lvy)
+            ly += dt * (jxy * lvx + jyy * lvy)
+
+            # Thrust direction follows the velocity
+            tk = dt * k_thrust
+            dtx_dvx = u0 * bxx - u1 * byx
+            dtx_dvy = u0 * bxy - u1 * byy
+            dty_dvx = u0 * byx + u1 * bxx
+            dty_dvy = u0 * byy + u1 * bxy
+            lvx, lvy = (
+                lvx + tk * (dtx_dvx * lvx + dty_dvx * lvy),
+                lvy + tk * (dtx_dvy * lvx + dty_dvy * lvy),
+            )
+
+        return grads
+
+    def jacobian(self, controls):
+
+        """ d(final x, y, vx, vy) / d(controls), one row of per-tick pairs per output """
+
+        rows = []
+        for i in range(4):
+            state_grad = [0.0] * 4
+            state_grad[i] = 1.0
+            rows.append(self.gradient(controls, state_grad)[1])
+
+        return rows
+
+    def fuel(self, controls):
+
+        """ Gas the schedule would burn if every unit of throttle cost one thrust """
+
+        return self.gas_per_tick * sum(abs(u0) + abs(u1) for u0, u1 in controls)
+
+    def optimize(
+        self, loss, controls=None, steps=200, lr=0.05, fuel_weight=0.0, max_throttle=1.0
+    ):
+
+        """
+        Projected gradient descent (with momentum) on the thrust schedule.
+
+        `loss(state)` returns (value, gradient wrt state) for the final state.
+        `fuel_weight` adds fuel_weight * sum(u^2) to the loss. The step size halves
+        whenever the loss goes up. Returns the best (controls, loss value) seen.
+        """
+
+        controls = [tuple(u) for u in controls] if controls else [(0.0, 0.0)] * (
+            self.n_ticks
+        )
+        velocity = [(0.0, 0.0)] * self.n_ticks
+        best, best_value, previous = controls, None, None
+
+        for _ in range(steps + 1):
+            states = self.rollout(controls)
+            value, state_grad = loss(states[-1])
+            value += fuel_weight * sum(u0 * u0 + u1 * u1 for u0, u1 in controls)
+
+            if best_value is None or value < best_value:
+                best, best_value = controls, value
+            if previous is not None and value > previous:
+                # Overshot, the dynamics are far from linear here
+                lr /= 2
+                velocity = [(0.0, 0.0)] * self.n_ticks
+            previous = value
+
+            grads = self._backward(states, controls, state_grad)
+
+            # Normalised step so lr is in units of throttle
+            norm = math.sqrt(sum(g0 * g0 + g1 * g1 for g0, g1 in grads)) or 1.0
+            new_controls = []
+            for i, ((u0, u1), (g0, g1), (m0, m1)) in enumerate(
+                zip(controls, grads, velocity)
+            ):
+                g0 = g0 / norm + 2 * fuel_weight * u0
+                g1 = g1 / norm + 2 * fuel_weight * u1
+                m0, m1 = 0.9 * m0 - lr * g0, 0.9 * m1 - lr * g1
+                velocity[i] = (m0, m1)
+                new_controls.append(
+                    (
+                        min(max(u0 + m0, -max_throttle), max_throttle),
+                        min(max(u1 + m1, -max_throttle), max_throttle),
+                    )
+                )
+            controls = new_controls
+
+        return best, best_value
+
+
+def target_loss(x, y, vx=None, vy=None, velocity_weight=1.0):
+
+    """ Squared distance of the final position (and velocity if given) to a target """
+
+    def loss(state):
+
+        fx, fy, fvx, fvy = state
+        value = (fx - x) ** 2 + (fy - y) ** 2
+        grad = [2 * (fx - x), 2 * (fy - y), 0.0, 0.0]
+
+        if vx is not None:
+            value += velocity_weight * ((fvx - vx) ** 2 + (fvy - vy) ** 2)
+            grad[2] = 2 * velocity_weight * (fvx - vx)
+            grad[3] = 2 * velocity_weight * (fvy - vy)
+
+        return value, grad
+
+    return loss
+
+
+def to_commands(controls, threshold=0.5):
+
+    """ Rounds a continuous schedule to the game's 0-4 commands """
+
+    commands = []
+    for u0, u1 in controls:
+        if max(abs(u0), abs(u1)) < threshold:
+            commands.append(0)
+        elif abs(u0) >= abs(u1):
+            commands.append(4 if u0 > 0 else 2)
+        else:
+            commands.append(1 if u1 > 0 else 3)
+
+    return commands
@@ -1,24 +1,129 @@
-import time
+import copy
 
 from .assests import *
 from .scene import *
 from .physics import *
+from .clock import FixedStepClock, lerp
+
+
+class SinkGroup(list):
+
+    """ More than one telemetry sink on a game: `game.telemetry = SinkGroup([a, b])` """
+
+    def record(self, game, won, failed, message=""):
+
+        for sink in self:
+            sink.record(game, won, failed, message)
+
+
+class SceneForks:
+
+    """
+    Scenes of a forked Game. Each one is forked from the parent's the first time it's
+    used, then set back to the progress and dynamic state it had when the game was
+    forked (levels built since then start fresh).
+    """
+
+    def __init__(self, scenes, forks):
+
+        self.forks = forks
+        if isinstance(scenes, SceneForks):
+            # Forking a fork: the scenes it never got to are still as they were
+            self.scenes, self.states = scenes.scenes, dict(scenes.states)
+            built = scenes.forks.items()
+        else:
+            self.scenes, self.states = scenes, {}
+            built = zip(built_indices(scenes), scenes)
+
+        for i, scene in built:
+            if i not in forks:
+                self.states[i] = (scene.won, scene.attempts, scene.snapshot())
+
+    def __len__(self):
+        return len(self.scenes)
+
+    def __getitem__(self, i):
+
+        if i < 0:
+            i += len(self)
+
+        scene = self.forks.get(i)
+        if scene is None:
+            scene = self.scenes[i].fork()
+            if i in self.states:
+                scene.won, scene.attempts, state = self.states[i]
+                scene.restore(state)
+            else:
+                scene.reset()
+            self.forks[i] = scene
+
+        return scene
+
+    def __iter__(self):
+
+        # Same levels as iterating the parent's scenes (a LevelQueue only has some)
+        for i in built_indices(self.scenes):
+            yield self[i]
+
+
+def built_indices(scenes):
+
+    """ Indices of the scenes iterating `scenes` goes over """
+
+    if isinstance(scenes, ScaledLevels):
+        return sorted(scenes.scenes)
+    return range(len(list(scenes)))
 
 
 class Game:
-    def __init__(self, fps=60.0, scenes=list, reset=True):
+    def __init__(self, fps=60.0, scenes=list, reset=True, max_catchup_steps=5):
 
         assert fps > 0, "Game must have an FPS!"
 
+        if not hasattr(scenes, "__getitem__"):
+            # Iterator / generator of scenes, hold only a window of it
+            scenes = SceneStream(scenes)
+
         self.fps = fps
         self.dt = 1 / fps
         self.scenes = scenes
+        self.clock = FixedStepClock(self.dt, max_catchup_steps)
+        self._prev_positions = None
+        self.ticks = 0
+        self.telemetry = None  # e.g. telemetry.TelemetrySink
+        self.stepper = None  # e.g. AdaptiveStepper, None for one Euler step a tick
 
         # Reset each scene
         if reset:
             self.reset()
         else:
-            self.current_scene = self.scenes[0]
+            self.current_index = getattr(self.scenes, "offset", 0)
+            self.current_scene = self.scenes[self.current_index]
+            self.done = False
+
+    def fork(self):
+
+        """
+        Independent copy for what-if play (planners, previews). Only the current
+        scene is copied now, the others when the fork first gets to them, and the
+        level data is shared. Forks don't record telemetry.
+        """
+
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone.clock = copy.copy(self.clock)
+        clone.telemetry = None
+
+        if isinstance(self.scenes, SceneStream):
+            clone.scenes = self.scenes.fork()
+            clone.current_scene = clone.scenes[self.current_index]
+        else:
+            clone.current_scene = self.current_scene.fork()
+            clone.scenes = SceneForks(
+                self.scenes, {self.current_index: clone.current_scene}
+            )
+
+        return clone
 
     def control_sc(self, command: int):
 
@@ -42,66 +147,19 @@ class Game:
 
     def check_status(self):
 
-        sc = self.current_scene.sc
-        screen_x = self.current_scene.size[0]
-        screen_y = self.current_scene.size[1]
-        win_region_1 = self.current_scene.win_region[0]
-        win_region_2 = self.current_scene.win_region[1]
-        won = False
-        failed = False
-        message = ""
-
-        # Vertical
-        if win_region_1[0] == win_region_2[0]:
-            if (win_region_1[0] == 0.0 and sc.x <= 0) or (
-                win_region_1[0] == screen_x and sc.x >= screen_x
-            ):
-                if (
-                    win_region_1[1] <= sc.y <= win_region_2[1]
-                    and sc.vel.mag >= self.current_scene.win_min_velocity
-                ):
-                    won = True
-                    message = "Won!"
-
-        # Horizontal
-        if win_region_1[1] == win_region_2[1]:
-            if (win_region_1[1] == 0.0 and sc.y <= 0) or (
-                win_region_1[1] == screen_y and sc.y >= screen_y
-            ):
-                if (
-                    win_region_1[0] <= sc.x <= win_region_2[0]
-                    and sc.vel.mag >= self.current_scene.win_min_velocity
-                ):
-                    won = True
-                    message = "Won!"
-
-        # Out of bounds
-        if not won and (
-            not 0.0 < sc.x < self.current_scene.size[0]
-            or not 0.0 < sc.y < self.current_scene.size[1]
-        ):
-            failed = True
-            message = "Failed: Out of bounds."
-
-        # Collisions
-        if not failed:
-            for planet in self.current_scene.planets:
-                if sc.intersects(planet):
-                    failed = True
-                    message = "Failed: Collision."
-
-        return won, failed, message
+        return self.current_scene.check_status()
 
     def set_next_scene(self):
 
         if self.current_scene.won:
 
-            current_i = self.scenes.index(self.current_scene)
-
-            if current_i < len(self.scenes) - 1:
-                self.current_scene = self.scenes[current_i + 1]
-            else:
+            try:
+                next_scene = self.scenes[self.current_index + 1]
+            except IndexError:
                 self.done = True
+            else:
+                self.current_index += 1
+                self.current_scene = next_scene
 
     def _scene_won(self):
 
@@ -117,18 +175,10 @@ class Game:
 
     def calc_score(self):
 
-        gas_bonus = 0.0
-        total = 0.0
+        total, gas_bonus = getattr(self.scenes, "released_score", (0.0, 0.0))
 
         for scene in self.scenes:
-            if scene.won:
-                total += scene.completion_score
-                if scene.attempts > 1:
-                    total -= (scene.attempts - 1) * scene.attempt_score_reduction
-                if scene.attempts >= 1:
-                    gas_left = scene.sc.gas_level / scene.sc._initial_gas_level
-                    gas_bonus += gas_left * scene.gas_bonus_score
-                    total += gas_bonus
+            total, gas_bonus = scene.add_score(total, gas_bonus)
 
         if total < 0:
             total = 0.0
@@ -138,35 +188,118 @@ class Game:
     def reset(self):
 
         [s.reset() for s in self.scenes]
-        self.current_scene = self.scenes[0]
+        self.current_index = 0
+
+        if isinstance(self.scenes, SceneStream):
+            # A stream can't rewind, start over from the oldest scene still held
+            self.scenes.released_score = (0.0, 0.0)
+            self.current_index = self.scenes.offset
+
+        self.current_scene = self.scenes[self.current_index]
         self.done = False
 
-    def wait(self, time_to_remove):
+    def _positions(self):
+
+        scene = self.current_scene
+        return (scene.sc.x, scene.sc.y), [(p.x, p.y) for p in scene.planets]
 
-        dt = self.dt - time_to_remove
-        if dt < 0:
-            dt = 0
+    def interpolated_state(self, alpha=None):
 
-        time.sleep(dt)
+        """ Positions blended between the last two ticks, for rendering """
+
+        if alpha is None:
+            alpha = self.clock.alpha
+
+        current_sc, current_planets = self._positions()
+        if self._prev_positions is None:
+            return dict(sc=current_sc, planets=current_planets, alpha=alpha)
+
+        prev_sc, prev_planets = self._prev_positions
+        return dict(
+            sc=tuple(lerp(a, b, alpha) for a, b in zip(prev_sc, current_sc)),
+            planets=[
+                tuple(lerp(a, b, alpha) for a, b in zip(prev, current))
+                for prev, current in zip(prev_planets, current_planets)
+            ],
+            alpha=alpha,
+        )
+
+    def update(self, command: int, now=None):
+
+        """
+        Run as many fixed steps as real time allows (decoupled from the render rate).
+        Returns a list with the status of each step that was run.
+        """
+
+        results = []
+        for _ in range(self.clock.advance(now)):
+            scene = self.current_scene
+            self._prev_positions = self._positions()
+            result = self.step(command)
+
+            if result[0] or result[1] or self.current_scene is not scene:
+                # Positions were reset, don't blend across the jump
+                self._prev_positions = None
+
+            results.append(result)
+
+        return results
 
     def step(self, command: int, wait=False):
 
-        start = time.time()
         self.control_sc(command)
-        self.current_scene.update_all_pos(self.dt)
+        self.current_scene.update_all_pos(self.dt, self.stepper)
+        result = self._end_ticks(1)
+
+        if wait:
+            self.clock.sleep_until_next()
+
+        return result
+
+    def _end_ticks(self, ticks):
+
         level_won, level_failed, message = self.check_status()
+        self.ticks += ticks
+
+        if self.telemetry is not None:
+            self.telemetry.record(self, level_won, level_failed, message)
 
         if level_won:
             self._scene_won()
         elif level_failed:
             self._scene_failed()
 
-        time_elapsed = time.time() - start
+        return level_won, level_failed, message
 
-        if wait:
-            self.wait(time_elapsed)
+    def advance(self, command: int, max_ticks=60):
+
+        """
+        Headless fast path: holds `command` for up to `max_ticks` ticks, stopping
+        after the first one that wins or fails. With a stepper, coasting far from
+        the planets and the screen edges takes several ticks per step (telemetry
+        then sees only the last of them). Returns (ticks, (won, failed, message)).
+        """
+
+        ticks, result = 0, (False, False, "")
+        while ticks < max_ticks:
+            n = 1
+            if self.stepper is not None:
+                self.control_sc(command)
+                n = self.stepper.coast_ticks(
+                    self.current_scene, self.dt, max_ticks - ticks
+                )
+
+            if n == 1:
+                result = self.step(command)
+            else:
+                self.current_scene.update_all_pos(n * self.dt, self.stepper)
+                result = self._end_ticks(n)
 
-        return level_won, level_failed, message
+            ticks += n
+            if result[0] or result[1]:
+                break
+
+        return ticks, result
 
     def save_state(self):
 
@@ -181,3 +314,46 @@ class Game:
 # def str_to_game(_str):
 
 #     return dill.loads(ast.literal_eval(_str))
+
+
+class Race(Game):
+
+    """
+    Head-to-head play on RaceScenes: `step` takes one command per craft and returns
+    one (won, failed, message) per craft. A craft that fails goes back to the start,
+    a craft that wins waits for the others. The race moves to the next level once
+    every craft has won the current one.
+    """
+
+    def control_sc(self, commands):
+
+        self.current_scene.fleet.control(commands)
+
+    def step(self, commands, wait=False):
+
+        scene = self.current_scene
+        fleet = scene.fleet
+
+        self.control_sc(commands)
+        scene.update_all_pos(self.dt)
+        statuses = scene.check_status()
+        self.ticks += 1
+
+        for i, (won, failed, _) in enumerate(statuses):
+            if won:
+                fleet.active[i] = False
+                scene.attempts_per_craft[i] += 1
+            elif failed:
+                fleet.reset_craft(i)
+                scene.attempts_per_craft[i] += 1
+
+        if not any(fleet.active):
+            scene.won = True
+            scene.attempts += 1
+            self.set_next_scene()
+            self.current_scene.reset_pos()
+
+        if wait:
+            self.clock.sleep_until_next()
+
+        return statuses
@@ -0,0 +1,273 @@
+"""
+Golden trajectories: a recorded corpus of levels, command sequences and the state
+`Game.step` produced after every tick, plus a checker for other step engines.
+
+The bundled corpus was recorded with the original `Game.step`, from before the
+Vec2, proximity cache and fixed-step clock changes, so it pins down how the game
+played before any optimization. Today's `Game.step` matches it to about 1e-14. The
+default tolerances (1e-9, gas exactly) leave room for floating point differences
+between platforms while still catching any change in the physics.
+
+An engine is a class built from a level dict (`Scene.to_dict`) and the tick length
+`dt`, with `step(command)` returning (won, failed, message) like `Game.step`, and
+`state()` returning (x, y, vx, vy, gas_level) of the craft after that step.
+
+    python -m spaceshots.golden            # check the bundled engines
+    python -m spaceshots.golden --record   # re-record with today's engine (review!)
+"""
+
+import json
+import math
+import os
+import time
+
+from .deterministic import ONE, DeterministicScene
+from .game import Game
+from .scene import RaceScene, Scene
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "data", "golden.json")
+FIELDS = ("x", "y", "vx", "vy", "gas_level")
+DEFAULT_TOLERANCES = dict(x=1e-9, y=1e-9, vx=1e-9, vy=1e-9, gas_level=0)
+DEFAULT_DT = 1 / 60
+
+
+class GameEngine:
+
+    """ Today's `Game.step` """
+
+    def __init__(self, level, dt=DEFAULT_DT):
+
+        self.game = Game(fps=1 / dt, scenes=[Scene.from_dict(level)])
+
+    def step(self, command):
+        return self.game.step(command)
+
+    def state(self):
+
+        sc = self.game.current_scene.sc
+        return sc.x, sc.y, sc.vel.x, sc.vel.y, sc.gas_level
+
+
+class FleetEngine:
+
+    """ The race step path (`Fleet.update_pos`) with a single craft """
+
+    def __init__(self, level, dt=DEFAULT_DT):
+
+        self.scene = RaceScene.from_scene(Scene.from_dict(level), 1)
+        self.fleet = self.scene.fleet
+        self.dt = dt
+
+    def step(self, command):
+
+        scene, fleet = self.scene, self.fleet
+        fleet.control([command])
+        scene.update_all_pos(self.dt)
+        won, failed, message = scene.check_status()[0]
+        if won or failed:
+            # Same as Game: the whole level starts over
+            super(RaceScene, scene).reset_pos()
+            fleet.reset_craft(0)
+
+        return won, failed, message
+
+    def state(self):
+
+        fleet = self.fleet
+        return fleet.x[0], fleet.y[0], fleet.vx[0], fleet.vy[0], fleet.gas_level[0]
+
+
+class FixedPointEngine:
+
+    """ `DeterministicScene`, expected to need loose tolerances """
+
+    def __init__(self, level, dt=DEFAULT_DT):
+
+        self.scene = DeterministicScene.from_scene(Scene.from_dict(level), 1 / dt)
+
+    def step(self, command):
+        return self.scene.step(command)
+
+    def state(self):
+
+        scene = self.scene
+        return scene.x / ONE, scene.y / ONE, scene.vx / ONE, scene.vy / ONE, scene.gas
+
+
+ENGINES = dict(game=GameEngine, fleet=FleetEngine, fixed_point=FixedPointEngine)
+
+
+def run(engine_cls, level, commands, dt=DEFAULT_DT):
+
+    """ (statuses, states, seconds) of playing `commands` on a fresh engine """
+
+    engine = engine_cls(level, dt)
+    statuses, states = [], []
+
+    start = time.perf_counter()
+    for command in commands:
+        won, failed, _ = engine.step(command)
+        statuses.append([bool(won), bool(failed)])
+        states.append(list(engine.state()))
+
+    return statuses, states, time.perf_counter() - start
+
+
+def default_cases():
+
+    """
+    (name, level dict, commands): every thrust direction, coasting, running out of
+    gas, out of bounds, collisions and a win.
+    """
+
+    from .cli import build_level
+
+    def level(difficulty, seed):
+        return build_level(difficulty, seed).to_dict()
+
+    cycle = [command for command in (1, 2, 3, 4, 0) for _ in range(15)]
+
+    # Straight up through the top edge, no planets to pull it off course
+    win = level("easy", 0)
+    width, height = win["size"]
+    win["planets"] = []
+    win["win_region"] = [[0, height], [width, height]]
+    win["win_velocity"] = 10
+    win["sc"].update(x=width / 2, y=height - 40)
+
+    return [
+        ("coast", level("easy", 0), [0] * 300),
+        ("thrust_cycle", level("medium", 1), cycle * 6),
+        ("gas_out", level("hard", 6), [4] * 300),
+        ("out_of_bounds", level("easy", 1), [3] * 200),
+        ("collision", level("hard", 0), [4] * 300),
+        ("win", win, [1] * 200),
+    ]
+
+
+def record(cases=None, path=CORPUS_PATH, engine_cls=GameEngine, dt=DEFAULT_DT):
+
+    """
+    Runs an engine on the cases and writes the corpus. This freezes that engine's
+    behaviour as the reference, see the module docstring for the bundled one.
+    """
+
+    corpus = []
+    for name, level, commands in cases or default_cases():
+        statuses, states, _ = run(engine_cls, level, commands, dt)
+        corpus.append(
+            dict(
+                name=name,
+                level=level,
+                commands=commands,
+                dt=dt,
+                statuses=statuses,
+                states=states,
+            )
+        )
+
+    with open(path, "w") as f:
+        json.dump(dict(version=1, fields=FIELDS, cases=corpus), f)
+
+    return corpus
+
+
+def load(path=CORPUS_PATH):
+
+    with open(path) as f:
+        return json.load(f)["cases"]
+
+
+def compare(case, statuses, states, tolerances=None):
+
+    """
+    First divergence of a run from a recorded case: the tick, what differed and by
+    how much, or None when the run stays within the tolerances throughout.
+    """
+
+    tolerances = dict(DEFAULT_TOLERANCES, **(tolerances or {}))
+    max_error = {field: 0.0 for field in FIELDS}
+    first = None
+
+    for tick, (expected, actual) in enumerate(zip(case["states"], states)):
+        if first is None and statuses[tick] != case["statuses"][tick]:
+            first = dict(
+                tick=tick,
+                field="status",
+                expected=case["statuses"][tick],
+                actual=statuses[tick],
+            )
+
+        for field, a, b in zip(FIELDS, expected, actual):
+            error = abs(a - b) if math.isfinite(b) else math.inf
+            max_error[field] = max(max_error[field], error)
+            if first is None and error > tolerances[field]:
+                first = dict(tick=tick, field=field, expected=a, actual=b, error=error)
+
+    if first is None and len(states) != len(case["states"]):
+        first = dict(tick=min(len(states), len(case["states"])), field="length")
+
+    return first, max_error
+
+
+def check_engine(engine_cls, corpus=None, tolerances=None, repeat=3):
+
+    """
+    Runs `engine_cls` over the corpus. Returns a report per case with the first
+    divergence (None if it matched), the largest error per field and the speed
+    ratio (reference time / engine time, > 1 means the engine is faster; best of
+    `repeat` runs each).
+    """
+
+    reports = []
+    for case in corpus or load():
+        level, commands = case["level"], case["commands"]
+        dt = case.get("dt", DEFAULT_DT)
+
+        engine_time = reference_time = math.inf
+        for _ in range(repeat):
+            statuses, states, seconds = run(engine_cls, level, commands, dt)
+            engine_time = min(engine_time, seconds)
+            reference_time = min(
+                reference_time, run(GameEngine, level, commands, dt)[2]
+            )
+
+        first, max_error = compare(case, statuses, states, tolerances)
+        reports.append(
+            dict(
+                name=case["name"],
+                ticks=len(commands),
+                ok=first is None,
+                first_divergence=first,
+                max_error=max_error,
+                speed_ratio=reference_time / engine_time,
+            )
+        )
+
+    return reports
+
+
+def format_report(name, reports):
+
+    lines = ["%s:" % name]
+    for report in reports:
+        first = report["first_divergence"]
+        if first is None:
+            status = "ok"
+        else:
+            status = "diverges at tick %d (%s)" % (first["tick"], first["field"])
+        lines.append(
+            "  %-14s %-32s x%.2f speed, max |dx| %.3g"
+            % (report["name"], status, report["speed_ratio"], report["max_error"]["x"])
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--record" in sys.argv:
+        record()
+
+    for name, engine_cls in ENGINES.items():
+        print(format_report(name, check_engine(engine_cls)))
@@ -0,0 +1,202 @@
+"""
+Streaming heatmaps of where crafts fly, crash, leave the screen, run out of gas and
+win, per level, with NumPy (needs `spaceshots[numpy]`).
+
+Attach to a game like a telemetry sink (`game.telemetry = HeatmapAggregator()`, or
+next to one with `SinkGroup`). Each level gets one fixed size (channel, row, col)
+histogram, row 0 being the top of the screen like `raster`. Events are buffered as
+flat bin numbers and added with `np.bincount`, so memory stays the same however many
+sessions go through. Aggregates from other processes are combined with `merge`.
+"""
+
+import hashlib
+import json
+import weakref
+
+from array import array
+
+import numpy as np
+
+CHANNELS = ("visits", "collision", "out_of_bounds", "gas_out", "won")
+VISITS, COLLISION, OUT_OF_BOUNDS, GAS_OUT, WON = range(len(CHANNELS))
+
+
+def level_fingerprint(scene):
+
+    """ Short hash of the level as it starts, equal for identical levels """
+
+    data = scene.to_dict()
+    del data["metadata"]  # calibration and such get added to it later
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def level_key(game):
+
+    """
+    Hash of the level's layout. Seeds alone don't tell levels apart, the same seed
+    builds a different level at another difficulty, screen size or config.
+    """
+
+    return level_fingerprint(game.current_scene)
+
+
+class Session:
+
+    """ Sampling state of one game, so interleaved sessions don't mix """
+
+    __slots__ = ("ticks", "last_gas", "scene", "key")
+
+    def __init__(self):
+
+        self.ticks = 0
+        self.last_gas = None
+        self.scene = self.key = None  # keys are worked out once per level
+
+
+class LevelHeatmap:
+
+    def __init__(self, size, bins):
+
+        self.size = tuple(size)
+        self.bins = tuple(bins)  # columns, rows
+        self.counts = np.zeros((len(CHANNELS), bins[1], bins[0]), np.int64)
+        self.pending = array("q")
+
+    def bin(self, channel, x, y):
+
+        cols, rows = self.bins
+        col = min(max(int(x / self.size[0] * cols), 0), cols - 1)
+        row = min(max(rows - 1 - int(y / self.size[1] * rows), 0), rows - 1)
+        return (channel * rows + row) * cols + col
+
+    def flush(self):
+
+        if self.pending:
+            flat = np.frombuffer(self.pending, np.int64)
+            self.counts += np.bincount(flat, minlength=self.counts.size).reshape(
+                self.counts.shape
+            )
+            self.pending = array("q")
+
+    def channel(self, name):
+
+        self.flush()
+        return self.counts[CHANNELS.index(name)]
+
+
+class HeatmapAggregator:
+    def __init__(self, bins=(64, 64), every=1, flush_size=8192, key=level_key):
+
+        self.bins = tuple(bins)
+        self.every = every  # sample the trajectory every n ticks
+        self.flush_size = flush_size
+        self.key = key
+        self.levels = {}
+        self.ticks = 0
+        self.sessions = weakref.WeakKeyDictionary()  # game: Session
+
+    def level(self, key, size=None):
+
+        heatmap = self.levels.get(key)
+        if heatmap is None:
+            heatmap = self.levels[key] = LevelHeatmap(size, self.bins)
+        elif size is not None:
+            assert heatmap.size == tuple(size), "Different levels under one key!"
+        return heatmap
+
+    def record(self, game, won=False, failed=False, message=""):
+
+        """ Telemetry hook, called by `Game.step` before a finished attempt resets """
+
+        scene = game.current_scene
+        sc = scene.sc
+        session = self.sessions.get(game)
+        if session is None:
+            session = self.sessions[game] = Session()
+        if scene is not session.scene:
+            session.scene, session.key = scene, self.key(game)
+            session.last_gas = None
+        heatmap = self.level(session.key, scene.size)
+        pending = heatmap.pending
+
+        if session.ticks % self.every == 0:
+            pending.append(heatmap.bin(VISITS, sc.x, sc.y))
+        session.ticks += 1
+        self.ticks += 1
+
+        if failed:
+            channel = COLLISION if "Collision" in message else OUT_OF_BOUNDS
+            pending.append(heatmap.bin(channel, sc.x, sc.y))
+        elif won:
+            pending.append(heatmap.bin(WON, sc.x, sc.y))
+
+        if sc.gas_level <= 0 and (session.last_gas is None or session.last_gas > 0):
+            pending.append(heatmap.bin(GAS_OUT, sc.x, sc.y))
+        # Gas is refilled by the reset after a finished attempt
+        session.last_gas = None if won or failed else sc.gas_level
+
+        if len(pending) >= self.flush_size:
+            heatmap.flush()
+
+    def flush(self):
+
+        for heatmap in self.levels.values():
+            heatmap.flush()
+
+    def merge(self, other):
+
+        """ Adds another aggregate (e.g. from a worker process) into this one """
+
+        other.flush()
+        for key, theirs in other.levels.items():
+            ours = self.level(key, theirs.size)
+            assert ours.counts.shape == theirs.counts.shape, "Different bins!"
+            ours.flush()
+            ours.counts += theirs.counts
+
+        self.ticks += other.ticks
+        return self
+
+    def get(self, key) -> dict:
+
+        """ {channel name: (rows, cols) counts} of one level """
+
+        heatmap = self.levels[key]
+        heatmap.flush()
+        return dict(zip(CHANNELS, heatmap.counts))
+
+    def save(self, path):
+
+        """ One compressed .npz, level keys and sizes in a JSON header """
+
+        self.flush()
+        keys = list(self.levels)
+        header = dict(
+            bins=self.bins,
+            ticks=self.ticks,
+            keys=keys,
+            sizes=[self.levels[key].size for key in keys],
+        )
+        arrays = {"level_%d" % i: self.levels[key].counts for i, key in enumerate(keys)}
+        np.savez_compressed(path, header=np.array(json.dumps(header)), **arrays)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+
+        with np.load(path) as data:
+            header = json.loads(str(data["header"]))
+            aggregator = cls(bins=header["bins"], **kwargs)
+            aggregator.ticks = header["ticks"]
+            for i, (key, size) in enumerate(zip(header["keys"], header["sizes"])):
+                aggregator.level(key, size).counts += data["level_%d" % i]
+
+        return aggregator
+
+    @classmethod
+    def merge_files(cls, paths):
+
+        merged = None
+        for path in paths:
+            aggregate = cls.load(path)
+            merged = aggregate if merged is None else merged.merge(aggregate)
+        return merged
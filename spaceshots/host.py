@@ -0,0 +1,153 @@
+"""
+Many `Manager` sessions in one process, idle ones hibernated to disk.
+
+A session nobody has used for `idle_seconds` is written to `directory` as
+compressed JSON (`Manager.to_dict`: its levels, progress and dynamic state) and
+dropped from memory. The next `step`, `get_details` or `get` brings it back,
+exactly where it was. Idle sessions are looked for at most every `sweep_interval`
+seconds, on the back of normal calls or by calling `sweep` from a timer.
+
+Session ids end up in file names, keep them to letters, digits, - and _.
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+
+from .api import Manager
+
+
+class SessionHost:
+    def __init__(
+        self, directory, idle_seconds=300.0, sweep_interval=None, clock=time.monotonic
+    ):
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.idle_seconds = idle_seconds
+        self.sweep_interval = (
+            idle_seconds / 10 if sweep_interval is None else sweep_interval
+        )
+        self.clock = clock
+
+        self.sessions = {}  # id: Manager, the awake ones
+        self.last_used = {}
+        self.hibernated = set()
+        self._last_sweep = clock()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.sessions) + len(self.hibernated)
+
+    def __contains__(self, session_id):
+        return session_id in self.sessions or session_id in self.hibernated
+
+    def path(self, session_id):
+        return os.path.join(self.directory, "%s.session" % session_id)
+
+    def add(self, session_id, manager):
+
+        with self._lock:
+            assert session_id not in self, "Session %r already exists!" % session_id
+            self.sessions[session_id] = manager
+            self.last_used[session_id] = self.clock()
+        return manager
+
+    def create(self, session_id, *args, **kwargs):
+
+        """ New `Manager(*args, **kwargs)` session """
+
+        return self.add(session_id, Manager(*args, **kwargs))
+
+    def get(self, session_id):
+
+        """ The session's Manager, woken up if it was hibernated """
+
+        with self._lock:
+            now = self.clock()
+            manager = self.sessions.get(session_id)
+            if manager is None:
+                manager = self.restore(session_id)
+            self.last_used[session_id] = now
+
+            if now - self._last_sweep >= self.sweep_interval:
+                self.sweep(now)
+
+        return manager
+
+    __getitem__ = get
+
+    def step(self, session_id, thrust_dir):
+
+        manager = self.get(session_id)
+        manager.step(thrust_dir)
+        return manager.status
+
+    def get_details(self, session_id):
+        return self.get(session_id).get_details()
+
+    def remove(self, session_id):
+
+        with self._lock:
+            self.sessions.pop(session_id, None)
+            self.last_used.pop(session_id, None)
+            if session_id in self.hibernated:
+                self.hibernated.discard(session_id)
+                os.remove(self.path(session_id))
+
+    def hibernate(self, session_id):
+
+        """ Writes a session to disk and lets go of it, returns the bytes written """
+
+        with self._lock:
+            manager = self.sessions[session_id]
+            data = json.dumps(manager.to_dict(), separators=(",", ":")).encode()
+            data = zlib.compress(data)
+
+            path = self.path(session_id)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+
+            del self.sessions[session_id]
+            self.hibernated.add(session_id)
+
+        return len(data)
+
+    def restore(self, session_id):
+
+        with self._lock:
+            if session_id not in self.hibernated:
+                raise KeyError(session_id)
+
+            path = self.path(session_id)
+            with open(path, "rb") as f:
+                data = json.loads(zlib.decompress(f.read()))
+            manager = self.sessions[session_id] = Manager.from_dict(data)
+
+            self.hibernated.discard(session_id)
+            os.remove(path)
+
+        return manager
+
+    def sweep(self, now=None) -> int:
+
+        """ Hibernates the sessions idle for `idle_seconds`, returns how many """
+
+        with self._lock:
+            now = self.clock() if now is None else now
+            self._last_sweep = now
+
+            idle = []
+            for session_id, manager in self.sessions.items():
+                watched = manager.channel is not None and manager.channel.subscribers
+                since = now - self.last_used[session_id]
+                if since >= self.idle_seconds and not watched:
+                    idle.append(session_id)
+
+            for session_id in idle:
+                self.hibernate(session_id)
+
+        return len(idle)
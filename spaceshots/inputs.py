@@ -0,0 +1,159 @@
+"""
+Timestamped input buffer: clients send (client_tick, command) whenever the network
+delivers them, the tick loop takes the command meant for each tick.
+
+    manager.submit(client_tick, command)   # any thread, any time
+    manager.tick()                         # tick loop, fixed rate
+
+Commands that arrive early wait for their tick. Late ones (their tick already ran)
+are applied on the next tick, unless something newer ran already. When several are
+due at once only the newest is applied, it's the player's current intent. Ticks with
+nothing due apply the previous command again (`command`), so a crash or reset, which
+turns the craft's thrust off, doesn't drop a held one.
+"""
+
+import math
+import threading
+
+
+class RunningStats:
+
+    """ Count, mean, standard deviation, min and max without keeping the samples """
+
+    def __init__(self):
+
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2 / self.n) if self.n else 0.0
+
+    def as_dict(self) -> dict:
+
+        if not self.n:
+            return dict(n=0)
+        return dict(n=self.n, mean=self.mean, std=self.std, min=self.min, max=self.max)
+
+
+class InputBuffer:
+    def __init__(self, max_ahead=120):
+
+        self.max_ahead = max_ahead  # ticks, commands further ahead are rejected
+        self.pending = {}  # client tick: (command, margin)
+        self.last_tick = -1  # client tick of the last command applied
+        self.command = None  # last command applied, held until the next one
+
+        self.received = 0
+        self.applied = 0
+        self.late = 0  # arrived after their tick, applied on the next one
+        self.duplicates = 0
+        self.stale = 0  # older than a command that already ran
+        self.superseded = 0  # due together with a newer one
+        self.rejected = 0
+
+        self.margin = RunningStats()  # ticks an applied command arrived before its tick
+        self.delay = RunningStats()  # ticks between a command's tick and running it
+        self._lock = threading.Lock()
+
+    def submit(self, client_tick, command, server_tick) -> bool:
+
+        """ Queues a command for `client_tick`, False if it's dropped """
+
+        with self._lock:
+            self.received += 1
+
+            if client_tick in self.pending or client_tick == self.last_tick:
+                self.duplicates += 1
+                return False
+            if client_tick < self.last_tick:
+                self.stale += 1
+                return False
+            if client_tick > server_tick + self.max_ahead:
+                self.rejected += 1
+                return False
+
+            if client_tick < server_tick:
+                self.late += 1
+            self.pending[client_tick] = command, client_tick - server_tick
+            return True
+
+    def take(self, server_tick):
+
+        """ Command to apply on `server_tick`, None if nothing new is due """
+
+        with self._lock:
+            due = [tick for tick in self.pending if tick <= server_tick]
+            if not due:
+                return None
+
+            tick = max(due)
+            command, margin = self.pending.pop(tick)
+            for older in due:
+                if older != tick:
+                    del self.pending[older]
+
+            self.superseded += len(due) - 1
+            self.applied += 1
+            self.last_tick = tick
+            self.command = command
+            self.margin.add(margin)
+            self.delay.add(server_tick - tick)
+
+        return command
+
+    def to_dict(self) -> dict:
+
+        """ JSON friendly queue state, the statistics aren't kept, see `from_dict` """
+
+        with self._lock:
+            return dict(
+                max_ahead=self.max_ahead,
+                last_tick=self.last_tick,
+                command=self.command,
+                pending=[
+                    [tick, command, margin]
+                    for tick, (command, margin) in sorted(self.pending.items())
+                ],
+            )
+
+    @classmethod
+    def from_dict(cls, data):
+
+        """ Buffer from `to_dict`, with its statistics starting over """
+
+        inputs = cls(data["max_ahead"])
+        inputs.last_tick = data["last_tick"]
+        inputs.command = data["command"]
+        inputs.pending = {
+            tick: (command, margin) for tick, command, margin in data["pending"]
+        }
+        return inputs
+
+    def stats(self) -> dict:
+
+        with self._lock:
+            return dict(
+                received=self.received,
+                applied=self.applied,
+                late=self.late,
+                duplicates=self.duplicates,
+                stale=self.stale,
+                superseded=self.superseded,
+                rejected=self.rejected,
+                pending=len(self.pending),
+                margin=self.margin.as_dict(),
+                delay=self.delay.as_dict(),
+            )
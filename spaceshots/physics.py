@@ -5,63 +5,61 @@ from .utils import *
 G = 6.67408e-11  # m^3/kg*s^2
 
 
-class Velocity:
+class Velocity(Vec2):
+
+    __slots__ = ()
+
     def __init__(self, x_vel, y_vel):
 
         self.x = x_vel
         self.y = y_vel
-        self.vec = [self.x, self.y]
-        self.rot_matrix = get_rot_matrix(self.get_theta())
-        self.mag = (self.x ** 2 + self.y ** 2) ** 0.5
-        self.theta = self.get_theta()
+
+    @property
+    def theta(self):
+        return self.get_theta()
+
+    @property
+    def vec(self):
+        return self
+
+    @property
+    def rot_matrix(self):
+        return get_rot_matrix(self.get_theta())
 
     def get_theta(self):
 
-        angle = angle_between([1, 0], self.vec)
-        # if self.y < 0:
-        #     angle += math.pi
+        # Same as angle_between([1, 0], self.vec)
+        mag = math.hypot(self.x, self.y)
+        if mag == 0.0:
+            return math.pi / 2
 
-        return angle
+        return math.acos(clip(self.x / mag, -1.0, 1.0))
 
-    def __repr__(self):
 
-        return str((self.x, self.y))
+class Force(Vec2):
 
+    __slots__ = ()
 
-class Force:
     def __init__(self, x_vector, y_vector, mag):
 
-        ratio, mag = self._create_ratio(x_vector, y_vector, mag)
+        ratio = self._create_ratio(x_vector, y_vector, mag)
         self.x = x_vector * ratio
         self.y = y_vector * ratio
-        self.mag = mag
 
     def _create_ratio(self, x_vector, y_vector, mag):
 
-        hyp = (x_vector ** 2 + y_vector ** 2) ** 0.5
+        hyp = math.hypot(x_vector, y_vector)
 
         if hyp != 0.0:
-            ratio = mag / hyp
-        else:
-            ratio = 0.0
-            mag = 0.0
-
-        return ratio, mag
+            return mag / hyp
 
-    def __add__(self, new):
+        return 0.0
 
-        self.x += new.x
-        self.y += new.y
-        self.mag = (self.x ** 2 + self.y ** 2) ** 0.5
 
-        return self
+class Momentum(Vec2):
 
-    def __repr__(self):
+    __slots__ = ()
 
-        return str((self.x, self.y))
-
-
-class Momentum:
     def __init__(self, x_vel, y_vel, mass=1):
 
         self.x = mass * x_vel
@@ -70,28 +68,63 @@ class Momentum:
     @classmethod
     def from_impulse(cls, force=Force, duration=float):
 
-        x = force.x * duration
-        y = force.y * duration
-
-        return cls(x, y)
+        return cls._make(force.x * duration, force.y * duration)
 
     def save_state(self):
 
-        return "+".join(self.__dict__.values())
+        return "+".join(str(i) for i in self)
 
-    def __add__(self, new):
 
-        self.x += new.x
-        self.y += new.y
+class Proximity:
+
+    """
+    Spacecraft to planet geometry for one tick, computed once and shared by gravity,
+    closest planet, collisions and the client details.
+    """
+
+    __slots__ = ("x", "y", "dx", "dy", "dist", "dist_sq", "closest", "valid")
+
+    def __init__(self):
+
+        self.x = self.y = 0.0
+        self.dx, self.dy, self.dist, self.dist_sq = [], [], [], []
+        self.closest = 0
+        self.valid = False
+
+    def update(self, x, y, planets):
+
+        dx, dy, dist, dist_sq = [], [], [], []
+        closest, closest_dist = 0, None
+        for i, planet in enumerate(planets):
+            px, py = planet.x - x, planet.y - y
+            r = math.hypot(px, py)
+            dx.append(px)
+            dy.append(py)
+            dist.append(r)
+            dist_sq.append(r ** 2)
+            if closest_dist is None or r < closest_dist:
+                closest, closest_dist = i, r
+
+        self.x, self.y = x, y
+        self.dx, self.dy, self.dist, self.dist_sq = dx, dy, dist, dist_sq
+        self.closest = closest
+        self.valid = True
 
         return self
 
-    def __repr__(self):
+    @property
+    def inv_sq(self):
+        return [1 / r2 for r2 in self.dist_sq]
 
-        return str((self.x, self.y))
+    @property
+    def closest_dist(self):
+        return self.dist[self.closest] if self.dist else None
 
 
 class Orbit:
+
+    __slots__ = ("a", "b", "center_x", "center_y", "progress", "cw", "angular_step")
+
     def __init__(
         self, a, b, center_x, center_y, progress=0.0, CW=True, angular_step=3.14 / 900
     ):
@@ -100,20 +133,31 @@ class Orbit:
         self.center_x = center_x
         self.center_y = center_y
         self.progress = progress
-        self._ang_step = angular_step
         self.cw = CW
 
-        self.make_poly(a, b, center_x, center_y)
         self.change_angular_step(angular_step)
 
     def make_poly(self, a, b, center_x, center_y):
         # circ = Point((center_x, center_y)).buffer(1)
         # poly  = shapely.affinity.scale(circ, int(a), int(b))
-        self.poly = RectPolygon(
+        return RectPolygon(
             [center_x - a, center_y + b],  # top left
             [center_x + a, center_y - b],  # bottom right
         )
 
+    @property
+    def poly(self):
+
+        """ Bounding box of the ellipse, only needed while generating levels """
+
+        return self.make_poly(self.a, self.b, self.center_x, self.center_y)
+
+    def fork(self):
+
+        """ Copy sharing the shape, progress and direction are its own """
+
+        return copy_slots(self)
+
     def change_angular_step(self, angular_step=float):
         self.angular_step = angular_step % 2 * math.pi
 
@@ -150,7 +194,7 @@ class Orbit:
         return self.x(self.progress), self.y(self.progress)
 
     def __repr__(self):
-        return str(vars(self))
+        return str(slot_dict(self))
 
 
 class OrbitCollection:
@@ -206,31 +250,44 @@ class OrbitCollection:
 
 def distance_between_points(p1, p2) -> float:
 
-    new_vec = [j - i for i, j in zip(p1, p2)]
-    return vector_norm(new_vec)
+    return math.hypot(p2[0] - p1[0], p2[1] - p1[1])
 
 
 class CirclePolygon:
+
+    __slots__ = ("x", "y", "r")
+
     def __init__(self, center_x: float, center_y: float, r: float):
 
         self.x = center_x
         self.y = center_y
         self.r = r
 
+    def move_to(self, center_x: float, center_y: float):
+
+        self.x = center_x
+        self.y = center_y
+
+    def copy(self):
+        return CirclePolygon(self.x, self.y, self.r)
+
     def intersects(self, other_poly) -> bool:
 
         if isinstance(other_poly, CirclePolygon):
 
             return (
-                distance_between_points([self.x, self.y], [other_poly.x, other_poly.y])
+                math.hypot(other_poly.x - self.x, other_poly.y - self.y)
                 <= self.r + other_poly.r
             )
 
 
 class RectPolygon:
+
+    __slots__ = ("tl", "br")
+
     def __init__(self, tl: list, br: list) -> None:
-        self.tl = tl
-        self.br = br
+        self.tl = Vec2(*tl)
+        self.br = Vec2(*br)
 
     def intersects(self, other_rect):
 
@@ -258,8 +315,8 @@ class RectPolygon:
 
         if isinstance(other_rect, RectPolygon):
 
-            x1, y1, x1b, y1b = self.tl + self.br
-            x2, y2, x2b, y2b = other_rect.tl + other_rect.br
+            (x1, y1), (x1b, y1b) = self.tl, self.br
+            (x2, y2), (x2b, y2b) = other_rect.tl, other_rect.br
 
             left = x2b < x1
             right = x1b < x2
@@ -287,6 +344,9 @@ class RectPolygon:
 
 def unit_vector(vector):
     """ Returns the unit vector of the vector.  """
+    if isinstance(vector, Vec2):
+        return vector.unit()
+
     norm = vector_norm(vector)
     if norm > 0:
         return [i / norm for i in vector]
@@ -310,6 +370,9 @@ def dot(v1: list, v2: list) -> float:
         float: dot product
     """
 
+    if isinstance(v1, Vec2) and isinstance(v2, Vec2):
+        return v1.dot(v2)
+
     return sum([i * j for i, j in zip(v1, v2)])
 
 
@@ -325,12 +388,15 @@ def rotate(theta, vec, custom=False):
     """
     Args:
     - theta: float
-    - vec: list = 2 x 1 vector
+    - vec: list = 2 x 1 vector, or a Vec2
 
     Returns:
-        [type]: [description]
+        2 x 1 nested list, or a Vec2 if a Vec2 was given
     """
 
+    if isinstance(vec, Vec2):
+        return vec.rotate(theta)
+
     rot_matrix = get_rot_matrix(theta)  # 2 x 2
     return matmul(rot_matrix, vec)
 
@@ -348,3 +414,27 @@ def angle_between(v1, v2):
     v1_u = unit_vector(v1)
     v2_u = unit_vector(v2)
     return math.acos(clip(dot(v1_u, v2_u), -1.0, 1.0))
+
+
+def thrust_vector(theta, moving, direction):
+
+    """
+    Unit vector of the thrust in world coordinates.
+
+    The body points along `theta` (or +x when the craft is not moving yet) and the
+    direction ("+x", "+y", "-x", "-y") is applied as an exact quarter turn.
+    """
+
+    if moving:
+        bx, by = math.cos(theta), math.sin(theta)
+    else:
+        bx, by = 1.0, 0.0
+
+    if direction == "-y":
+        return by, -bx
+    elif direction == "+y":
+        return -by, bx
+    elif direction == "-x":
+        return -bx, -by
+
+    return bx, by
@@ -0,0 +1,143 @@
+import math
+import time
+
+WIN_SCORE = 1e6
+
+
+def distance_to_segment(x, y, p1, p2):
+
+    (x1, y1), (x2, y2) = p1, p2
+    dx, dy = x2 - x1, y2 - y1
+    length_sq = dx * dx + dy * dy
+    t = 0.0
+    if length_sq > 0:
+        t = min(max(((x - x1) * dx + (y - y1) * dy) / length_sq, 0.0), 1.0)
+
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+
+class Planner:
+
+    """
+    Receding-horizon planner for the hint / autopilot mode.
+
+    Each call rolls a batch of candidate command sequences forward on the current
+    scene (the previous plan shifted by one tick first, then variations of it) and
+    returns the first command of the best one. Rollouts stop at the time budget and
+    the horizon shrinks when the budget was blown, or grows back when there was
+    time to spare.
+    """
+
+    def __init__(
+        self,
+        game,
+        budget=0.002,
+        horizon=60,
+        min_horizon=6,
+        max_horizon=240,
+        block=6,
+        timer=time.perf_counter,
+    ):
+
+        self.game = game
+        self.budget = budget
+        self.horizon = horizon
+        self.min_horizon = min_horizon
+        self.max_horizon = max_horizon
+        self.block = block
+        self.timer = timer
+        self.plan = []
+        self.plan_scene = None
+        self.over_budget = 0
+
+    def candidates(self):
+
+        """ Previous plan first so there is always something to fall back on """
+
+        previous = self.plan[1:] if self.plan_scene is self.game.current_scene else []
+        previous = (previous + [previous[-1] if previous else 0] * self.horizon)[
+            : self.horizon
+        ]
+
+        yield previous
+        for command in range(5):
+            if previous[: self.block] != [command] * self.block:
+                yield [command] * self.block + previous[self.block :]
+        for command in range(5):
+            yield [command] * self.horizon
+
+    def score(self, scene, won, failed, ticks):
+
+        if won:
+            return WIN_SCORE - ticks
+        if failed:
+            return -WIN_SCORE + ticks
+
+        sc = scene.sc
+        dist = distance_to_segment(sc.x, sc.y, *scene.win_region)
+        return -dist + min(sc.vel.mag, scene.win_min_velocity)
+
+    def rollout(self, plan, deadline):
+
+        """ Score of playing `plan` from the current state, None if out of time """
+
+        game = self.game
+        scene = game.current_scene
+
+        for tick, command in enumerate(plan):
+            if tick % self.block == 0 and self.timer() > deadline:
+                return None
+
+            game.control_sc(command)
+            scene.update_all_pos(game.dt)
+            won, failed, _ = scene.check_status()
+            if won or failed:
+                return self.score(scene, won, failed, tick + 1)
+
+        return self.score(scene, False, False, len(plan))
+
+    def suggest(self) -> int:
+
+        """ Best next command (0-4) within the time budget, doesn't change the game """
+
+        deadline = self.timer() + self.budget
+        scene = self.game.current_scene
+        state = scene.snapshot()
+
+        best, best_score, finished = None, None, True
+        try:
+            for plan in self.candidates():
+                score = self.rollout(plan, deadline)
+                scene.restore(state)
+                if score is None:
+                    finished = False
+                    break
+                if best_score is None or score > best_score:
+                    best, best_score = plan, score
+        finally:
+            scene.restore(state)
+
+        self._adapt(finished, deadline)
+
+        if best is None:
+            # Not even the previous plan fit, keep doing what it said
+            best = self.plan[1:] if self.plan_scene is scene and self.plan[1:] else [0]
+
+        self.plan = best
+        self.plan_scene = scene
+
+        return best[0]
+
+    def _adapt(self, finished, deadline):
+
+        if not finished:
+            self.over_budget += 1
+            self.horizon = max(self.min_horizon, int(self.horizon * 0.75))
+        elif deadline - self.timer() > self.budget / 2:
+            self.horizon = min(self.max_horizon, self.horizon + self.block)
+
+    def step(self, wait=False):
+
+        """ Autopilot: play the suggested command """
+
+        return self.game.step(self.suggest(), wait)
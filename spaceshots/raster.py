@@ -0,0 +1,168 @@
+"""
+Headless occupancy-grid rendering of scenes with NumPy (needs `spaceshots[numpy]`).
+
+Channels are planets, spacecraft, win region and optionally gravity magnitude. Row 0
+is the top of the screen (largest y) so grids can be viewed as images directly.
+"""
+
+import numpy as np
+
+from .physics import G
+
+PLANETS, SPACECRAFT, WIN_REGION, GRAVITY = range(4)
+
+
+def scene_arrays(scenes, max_planets=None):
+
+    """ Packs the drawable parts of many scenes into arrays, padding missing planets """
+
+    n_planets = max_planets or max(len(scene.planets) for scene in scenes)
+    batch = len(scenes)
+
+    planets = np.zeros((batch, n_planets, 4))  # x, y, radius, G * mass
+    sc = np.zeros((batch, 3))  # x, y, radius
+    win = np.zeros((batch, 4))  # x1, y1, x2, y2
+    size = np.zeros((batch, 2))
+
+    for i, scene in enumerate(scenes):
+        for j, planet in enumerate(scene.planets[:n_planets]):
+            planets[i, j] = planet.x, planet.y, planet.radius, G * planet.mass
+        sc[i] = scene.sc.x, scene.sc.y, scene.sc.poly.r
+        (win[i, 0], win[i, 1]), (win[i, 2], win[i, 3]) = scene.win_region
+        size[i] = scene.size
+
+    return dict(planets=planets, sc=sc, win=win, size=size)
+
+
+def _pixel_centers(size, height, width):
+
+    """ (B, W) x and (B, H) y coordinates of the pixel centres, and pixel size """
+
+    cols = (np.arange(width) + 0.5) / width
+    rows = 1.0 - (np.arange(height) + 0.5) / height
+    xs = (size[:, :1] * cols).astype(np.float32)
+    ys = (size[:, 1:] * rows).astype(np.float32)
+    pixel = np.maximum(size[:, 0] / width, size[:, 1] / height).astype(np.float32)
+
+    return xs, ys, pixel
+
+
+def _draw_discs(out, xs, ys, cx, cy, r):
+
+    """
+    Union of discs into `out` (B, H, W), centres and radii are (B, N). A negative
+    radius draws nothing.
+    """
+
+    dx2 = (xs[:, None, :] - cx[:, :, None]) ** 2  # B, N, W
+    dy2 = (ys[:, None, :] - cy[:, :, None]) ** 2  # B, N, H
+    r2 = np.where(r < 0, np.float32(-1), r * r)[:, :, None, None]
+
+    for j in range(cx.shape[1]):
+        dist2 = np.add(dy2[:, j, :, None], dx2[:, j, None, :])
+        if j == 0:
+            np.less_equal(dist2, r2[:, j], out=out, casting="unsafe")
+        else:
+            np.maximum(out, dist2 <= r2[:, j], out=out, casting="unsafe")
+
+
+def _rasterize_chunk(arrays, out, gravity):
+
+    height, width = out.shape[-2:]
+    planets, win = arrays["planets"], arrays["win"]
+    sc = arrays["sc"].astype(np.float32)
+    xs, ys, pixel = _pixel_centers(arrays["size"], height, width)
+
+    # Shapes smaller than a pixel still cover the pixel they are in
+    min_r = pixel[:, None] / 2
+    present = planets[:, :, 2] > 0
+    radius = np.where(present, np.maximum(planets[:, :, 2], min_r), -1.0)
+    centers = planets[:, :, :2].astype(np.float32)
+    _draw_discs(
+        out[:, PLANETS],
+        xs,
+        ys,
+        centers[..., 0],
+        centers[..., 1],
+        radius.astype(np.float32),
+    )
+
+    sc_r = np.maximum(sc[:, 2:3], min_r)
+    _draw_discs(out[:, SPACECRAFT], xs, ys, sc[:, 0:1], sc[:, 1:2], sc_r)
+
+    # Win regions lie along a screen edge, so the distance to the segment (an axis
+    # aligned box) is separable into x and y parts
+    x_lo, x_hi = np.minimum(win[:, 0], win[:, 2]), np.maximum(win[:, 0], win[:, 2])
+    y_lo, y_hi = np.minimum(win[:, 1], win[:, 3]), np.maximum(win[:, 1], win[:, 3])
+    ex = np.maximum(np.maximum(x_lo[:, None] - xs, xs - x_hi[:, None]), 0) ** 2
+    ey = np.maximum(np.maximum(y_lo[:, None] - ys, ys - y_hi[:, None]), 0) ** 2
+    np.less_equal(
+        np.add(ey[:, :, None], ex[:, None, :], dtype=np.float32),
+        (pixel ** 2)[:, None, None],
+        out=out[:, WIN_REGION],
+        casting="unsafe",
+    )
+
+    if gravity:
+        px, py = xs[:, None, :], ys[:, :, None]
+        acc_x = np.zeros((len(planets), height, width))
+        acc_y = np.zeros_like(acc_x)
+        for j in range(planets.shape[1]):
+            dx = planets[:, j, 0, None, None] - px
+            dy = planets[:, j, 1, None, None] - py
+            # Clamp inside the planet so the field stays finite
+            r2 = np.maximum(
+                dx * dx + dy * dy, planets[:, j, 2, None, None] ** 2 + 1e-12
+            )
+            scale = planets[:, j, 3, None, None] / (r2 * np.sqrt(r2))
+            acc_x += dx * scale
+            acc_y += dy * scale
+
+        field = np.hypot(acc_x, acc_y)
+        if np.issubdtype(out.dtype, np.integer):
+            # Raw magnitudes would wrap around, scale each scene's strongest pull to
+            # the top of the dtype's range instead
+            top = np.iinfo(out.dtype).max
+            peak = field.max(axis=(1, 2), keepdims=True)
+            field *= top / np.maximum(peak, np.finfo(field.dtype).tiny)
+            np.clip(np.rint(field), 0, top, out=field)
+        out[:, GRAVITY] = field
+
+
+def rasterize_arrays(arrays, out, gravity=False, chunk=256):
+
+    """
+    Draws packed scenes into `out` of shape (B, C, H, W), C >= 3 (or 4 with
+    `gravity`). `out` can be any numeric dtype, uint8 is the fastest. With an integer
+    dtype the gravity channel is relative to the strongest pull in each scene, 0 to
+    the dtype's max. Scenes are drawn in chunks so the temporaries stay in cache.
+    """
+
+    for start in range(0, len(out), chunk):
+        part = {name: value[start : start + chunk] for name, value in arrays.items()}
+        _rasterize_chunk(part, out[start : start + chunk], gravity)
+
+    return out
+
+
+def rasterize_batch(scenes, out=None, resolution=(84, 84), gravity=False):
+
+    """ Renders many scenes into `out` (B, C, H, W), allocated if not given """
+
+    if out is None:
+        out = np.zeros(
+            (len(scenes), 4 if gravity else 3) + tuple(resolution), np.float32
+        )
+
+    return rasterize_arrays(scene_arrays(scenes), out, gravity)
+
+
+def rasterize(scene, out=None, resolution=(84, 84), gravity=False):
+
+    """ Renders one scene into `out` (C, H, W), allocated if not given """
+
+    if out is None:
+        out = np.zeros((4 if gravity else 3,) + tuple(resolution), np.float32)
+
+    rasterize_arrays(scene_arrays([scene]), out[None], gravity)
+    return out
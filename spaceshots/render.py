@@ -0,0 +1,145 @@
+import json
+import math
+import os
+import sys
+
+from array import array
+from functools import lru_cache
+
+# Segments per orbit / planet circle for each level of detail
+LOD_SEGMENTS = (16, 32, 64, 128)
+
+
+def _float32(values):
+
+    buffer = array("f", values)
+    if sys.byteorder != "little":
+        buffer.byteswap()  # blobs are always little endian
+    return buffer
+
+
+def orbit_polyline(a, b, center_x, center_y, segments):
+
+    """ Closed line strip around the orbit ellipse, x/y pairs """
+
+    points = []
+    for i in range(segments + 1):
+        angle = 2 * math.pi * i / segments
+        points += [a * math.cos(angle) + center_x, b * math.sin(angle) + center_y]
+
+    return _float32(points)
+
+
+@lru_cache(maxsize=None)
+def unit_circle_mesh(segments):
+
+    """ Triangle list of a unit circle around the origin, x/y pairs """
+
+    points = []
+    for i in range(segments):
+        a1 = 2 * math.pi * i / segments
+        a2 = 2 * math.pi * (i + 1) / segments
+        points += [0.0, 0.0, math.cos(a1), math.sin(a1), math.cos(a2), math.sin(a2)]
+
+    return tuple(points)
+
+
+def circle_mesh(radius, segments):
+
+    """ Planet disc around the origin, clients translate it to the planet position """
+
+    return _float32(v * radius for v in unit_circle_mesh(segments))
+
+
+class LevelGeometry:
+
+    """ Packed float32 vertex buffers for a level, ready to upload """
+
+    def __init__(self, lod, buffers):
+
+        self.lod = lod
+        self.buffers = buffers  # list of (name, primitive, array)
+
+    def to_bytes(self) -> bytes:
+
+        return b"".join(buffer.tobytes() for _, _, buffer in self.buffers)
+
+    def manifest(self) -> dict:
+
+        entries, offset = [], 0
+        for name, primitive, buffer in self.buffers:
+            entries.append(
+                dict(
+                    name=name,
+                    primitive=primitive,
+                    offset=offset,  # bytes
+                    count=len(buffer) // 2,  # vertices
+                    components=2,
+                )
+            )
+            offset += len(buffer) * buffer.itemsize
+
+        return dict(lod=self.lod, dtype="float32", byteorder="little", buffers=entries)
+
+
+def _geometry_key(scene, lod):
+
+    orbits = tuple(
+        (p.orbit.a, p.orbit.b, p.orbit.center_x, p.orbit.center_y, p.radius)
+        for p in scene.planets
+    )
+    goal = tuple(tuple(point) for point in scene.win_region)
+    return orbits, goal, lod
+
+
+@lru_cache(maxsize=1024)
+def _build_geometry(key):
+
+    orbits, goal, lod = key
+    segments = LOD_SEGMENTS[lod]
+
+    buffers = []
+    for i, (a, b, center_x, center_y, radius) in enumerate(orbits):
+        buffers.append(
+            (
+                "orbit_%d" % i,
+                "line_strip",
+                orbit_polyline(a, b, center_x, center_y, segments),
+            )
+        )
+        buffers.append(("planet_%d" % i, "triangles", circle_mesh(radius, segments)))
+
+    buffers.append(("goal", "lines", _float32(v for point in goal for v in point)))
+
+    return LevelGeometry(lod, buffers)
+
+
+def level_geometry(scene, lod=1) -> LevelGeometry:
+
+    """ Geometry of a level, built once per distinct level and level of detail """
+
+    assert 0 <= lod < len(LOD_SEGMENTS), "Unknown level of detail!"
+
+    return _build_geometry(_geometry_key(scene, lod))
+
+
+def export_level(scene, directory, name, lod=1):
+
+    """
+    Writes `<name>.bin` (all buffers back to back) and a `<name>.json` manifest with
+    the buffer layout. Returns both paths.
+    """
+
+    geometry = level_geometry(scene, lod)
+    bin_path = os.path.join(directory, name + ".bin")
+    manifest_path = os.path.join(directory, name + ".json")
+
+    with open(bin_path, "wb") as f:
+        f.write(geometry.to_bytes())
+
+    manifest = dict(geometry=geometry.manifest(), blob=os.path.basename(bin_path))
+    manifest["geometry"]["size"] = list(scene.size)
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+    return manifest_path, bin_path
@@ -1,9 +1,14 @@
+import itertools
 import math
+import random
 import time
+import threading
+
+from collections import deque
 
-from random import randint, choices, uniform
 from .assests import *
 from .physics import *
+from .stepping import AdaptiveStepper
 from .utils import *
 
 
@@ -44,6 +49,8 @@ class Scene:
         #     self.sc.x, self.sc.y = sc_start_pos
 
         self.initial_orbit_pos = [planet.orbit.progress for planet in planets]
+        self.metadata = {}
+        self.proximity = Proximity()
 
         if reset:
             self.reset_pos()
@@ -58,6 +65,7 @@ class Scene:
     def reset_pos(self):
 
         self.sc.reset(self.sc_start_pos)
+        self.proximity.valid = False
 
         for i in range(len(self.planets)):
             self.planets[i].orbit.progress = self.initial_orbit_pos[i]
@@ -68,143 +76,622 @@ class Scene:
         self.attempts = 0
         self.won = False
 
-    def update_all_pos(self, impulse_time):
+    def fork(self):
+
+        """
+        Copy for what-if play. Level data (sizes, scoring, orbit shapes, masses) is
+        shared, the craft, planet positions and progress are copied.
+        """
+
+        clone = self.__class__.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone.sc = self.sc.fork()
+        clone.planets = [planet.fork() for planet in self.planets]
+        clone.proximity = Proximity()
+        return clone
+
+    def snapshot(self):
+
+        """ Dynamic state only, restore it with `restore` """
+
+        sc = self.sc
+        return (
+            sc.x,
+            sc.y,
+            sc.p.x,
+            sc.p.y,
+            sc.gas_level,
+            sc.thrust,
+            sc.thrust_direction,
+            sc._theta,
+            tuple(planet.orbit.progress for planet in self.planets),
+            tuple((planet.x, planet.y) for planet in self.planets),
+        )
+
+    def restore(self, state):
+
+        sc = self.sc
+        sc.x, sc.y, px, py, sc.gas_level, sc.thrust, sc.thrust_direction = state[:7]
+        sc._theta = state[7]
+        sc._p.set(px, py)
+        sc.vel.set(px / sc.mass, py / sc.mass)
+        sc.draw_poly()
+        self.proximity.valid = False
+
+        for planet, progress, pos in zip(self.planets, state[8], state[9]):
+            planet.orbit.progress = progress
+            planet.x, planet.y = pos
+            planet.make_poly()
+
+    def get_proximity(self):
+
+        """ This tick's spacecraft-planet geometry (where the collision circle is) """
+
+        if not self.proximity.valid:
+            self.proximity.update(self.sc.poly.x, self.sc.poly.y, self.planets)
+        return self.proximity
+
+    def check_status(self):
+
+        sc = self.sc
+        won, failed, message = self.edge_status(sc.x, sc.y, sc.vel.mag)
+
+        # Collisions, same as sc.intersects(planet)
+        if not failed:
+            dist = self.get_proximity().dist
+            for i, planet in enumerate(self.planets):
+                if dist[i] <= sc.poly.r + planet.poly.r:
+                    failed = True
+                    message = "Failed: Collision."
+
+        return won, failed, message
+
+    def edge_status(self, x, y, speed):
+
+        """ Win / out of bounds check for a craft at (x, y) """
+
+        screen_x = self.size[0]
+        screen_y = self.size[1]
+        win_region_1 = self.win_region[0]
+        win_region_2 = self.win_region[1]
+        won = False
+        failed = False
+        message = ""
+
+        # Vertical
+        if win_region_1[0] == win_region_2[0]:
+            if (win_region_1[0] == 0.0 and x <= 0) or (
+                win_region_1[0] == screen_x and x >= screen_x
+            ):
+                if (
+                    win_region_1[1] <= y <= win_region_2[1]
+                    and speed >= self.win_min_velocity
+                ):
+                    won = True
+                    message = "Won!"
+
+        # Horizontal
+        if win_region_1[1] == win_region_2[1]:
+            if (win_region_1[1] == 0.0 and y <= 0) or (
+                win_region_1[1] == screen_y and y >= screen_y
+            ):
+                if (
+                    win_region_1[0] <= x <= win_region_2[0]
+                    and speed >= self.win_min_velocity
+                ):
+                    won = True
+                    message = "Won!"
+
+        # Out of bounds
+        if not won and (not 0.0 < x < screen_x or not 0.0 < y < screen_y):
+            failed = True
+            message = "Failed: Out of bounds."
+
+        return won, failed, message
+
+    def update_all_pos(self, impulse_time, stepper=None):
+
+        if stepper is not None:
+            # Error controlled substeps, see stepping.AdaptiveStepper
+            return stepper.update(self, impulse_time)
 
         [planet.move(impulse_time) for planet in self.planets]
-        self.sc.update_pos(impulse_time, self.planets, False)
+
+        # Gravity and this tick's collision check both use the pre-move position
+        proximity = self.proximity.update(self.sc.x, self.sc.y, self.planets)
+        self.sc.update_pos(impulse_time, self.planets, False, proximity)
+
+    def add_score(self, total, gas_bonus):
+
+        """ Adds this scene to running (total, gas_bonus) sums, see `Game.calc_score` """
+
+        if self.won:
+            total += self.completion_score
+            if self.attempts > 1:
+                total -= (self.attempts - 1) * self.attempt_score_reduction
+            if self.attempts >= 1:
+                gas_left = self.sc.gas_level / self.sc._initial_gas_level
+                gas_bonus += gas_left * self.gas_bonus_score
+                total += gas_bonus
+
+        return total, gas_bonus
 
     def save_state(self):
 
         return "+".join(self.__dict__.values())
 
+    def to_dict(self) -> dict:
+
+        """ JSON friendly description of the level as it starts, see `from_dict` """
+
+        sc = self.sc
+        return dict(
+            size=list(self.size),
+            win_region=[list(point) for point in self.win_region],
+            win_velocity=self.win_min_velocity,
+            completion_score=self.completion_score,
+            attempt_score_reduction=self.attempt_score_reduction,
+            gas_bonus_score=self.gas_bonus_score,
+            sc=dict(
+                mass=sc.mass,
+                gas_level=sc._initial_gas_level,
+                thrust_force=sc.thrust_mag,
+                width=sc.width,
+                length=sc.length,
+                gas_per_thrust=sc.gas_per_thrust,
+                x=self.sc_start_pos[0],
+                y=self.sc_start_pos[1],
+            ),
+            planets=[
+                dict(
+                    mass=planet.mass,
+                    radius=planet.radius,
+                    orbit=dict(
+                        a=planet.orbit.a,
+                        b=planet.orbit.b,
+                        center_x=planet.orbit.center_x,
+                        center_y=planet.orbit.center_y,
+                        cw=planet.orbit.cw,
+                        angular_step=planet.orbit.angular_step,
+                        progress=progress,
+                    ),
+                )
+                for planet, progress in zip(self.planets, self.initial_orbit_pos)
+            ],
+            metadata=dict(self.metadata),
+        )
+
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+
+        """ Rebuilds a level from `to_dict`, it plays out exactly like the original """
+
+        sc = Spacecraft("", **data["sc"])
+
+        planets = []
+        for planet_data in data["planets"]:
+            o = planet_data["orbit"]
+            orbit = Orbit(o["a"], o["b"], o["center_x"], o["center_y"], CW=o["cw"])
+            orbit.angular_step = o["angular_step"]  # already went through the setter
+            planet = Planet(
+                "",
+                mass=planet_data["mass"],
+                orbit=orbit,
+                radius_per_kilogram=planet_data["radius"] / planet_data["mass"],
+            )
+            planet.radius = planet_data["radius"]
+            orbit.progress = o["progress"]
+            planet.x, planet.y = orbit.get_pos()
+            planet.poly = None
+            planet.make_poly()
+            planets.append(planet)
+
+        scene = cls(
+            tuple(data["size"]),
+            sc,
+            planets,
+            win_region=tuple(tuple(point) for point in data["win_region"]),
+            win_velocity=data["win_velocity"],
+            completion_score=data["completion_score"],
+            attempt_score_reduction=data["attempt_score_reduction"],
+            gas_bonus_score=data["gas_bonus_score"],
+            **kwargs
+        )
+        scene.metadata.update(data.get("metadata", {}))
+        if scene.metadata.get("rescaled"):
+            # The rounding in __init__ is for built levels, e.g. a normalized
+            # level's win velocity is well under 10
+            scene.win_min_velocity = data["win_velocity"]
+        return scene
+
+    def rescale(self, x_size, y_size):
+
+        """ The same level (as it starts) on another screen size, see `rescale_level` """
+
+        return self.__class__.from_dict(rescale_level(self.to_dict(), x_size, y_size))
+
     def __repr__(self):
         print(vars(self))
         return ""
 
 
+def _scale_coord(value, old, new):
+
+    # Screen edges have to stay exactly on the edge for the win / bounds checks
+    if value == old:
+        return new
+    return value * (new / old)
+
+
+def rescale_level(data, x_size, y_size):
+
+    """
+    Maps a `Scene.to_dict` level to another screen size, marked "rescaled" in its
+    metadata so `Scene.from_dict` keeps its exact win velocity.
+
+    Positions, orbits and the win region scale per axis. Lengths, speeds and forces
+    scale with s = sqrt(sx * sy), masses with s^3 so gravity still gives s times the
+    acceleration at s times the distance, and gas per thrust by 1 / s so the same
+    burn costs the same gas. For sx == sy the level plays out exactly scaled.
+    """
+
+    old_x, old_y = data["size"]
+    sx, sy = x_size / old_x, y_size / old_y
+    s = math.sqrt(sx * sy)
+
+    sc = dict(data["sc"])
+    sc.update(
+        x=sc["x"] * sx,
+        y=sc["y"] * sy,
+        width=sc["width"] * s,
+        length=sc["length"] * s,
+        thrust_force=sc["thrust_force"] * s,
+        gas_per_thrust=sc["gas_per_thrust"] / s,
+    )
+
+    planets = []
+    for planet in data["planets"]:
+        orbit = dict(planet["orbit"])
+        orbit.update(
+            a=orbit["a"] * sx,
+            b=orbit["b"] * sy,
+            center_x=orbit["center_x"] * sx,
+            center_y=orbit["center_y"] * sy,
+        )
+        planets.append(
+            dict(
+                planet,
+                mass=planet["mass"] * s ** 3,
+                radius=planet["radius"] * s,
+                orbit=orbit,
+            )
+        )
+
+    return dict(
+        data,
+        size=[x_size, y_size],
+        win_region=[
+            [_scale_coord(x, old_x, x_size), _scale_coord(y, old_y, y_size)]
+            for x, y in data["win_region"]
+        ],
+        win_velocity=data["win_velocity"] * s,
+        sc=sc,
+        planets=planets,
+        metadata=dict(data.get("metadata", {}), rescaled=True),
+    )
+
+
+def normalize_level(data):
+
+    """ Level dict on a 1 x 1 screen, for banks that serve any resolution """
+
+    return rescale_level(data, 1.0, 1.0)
+
+
+class ScaledLevels:
+
+    """
+    Read-only view of a bank of level dicts (e.g. normalized ones) at one screen
+    size. Scenes are built the first time they are used and then kept, iterating
+    only goes over those.
+    """
+
+    def __init__(self, levels, x_size, y_size):
+
+        self.levels = levels
+        self.size = (x_size, y_size)
+        self.scenes = {}
+
+    def __len__(self):
+        return len(self.levels)
+
+    def __getitem__(self, i):
+
+        if i < 0:
+            i += len(self)
+        scene = self.scenes.get(i)
+        if scene is None:
+            data = rescale_level(self.levels[i], *self.size)
+            scene = self.scenes[i] = Scene.from_dict(data)
+        return scene
+
+    def __iter__(self):
+        return iter([self.scenes[i] for i in sorted(self.scenes)])
+
+
+class RaceScene(Scene):
+
+    """
+    Scene with N copies of the spacecraft racing through the same planets.
+
+    Planets are moved once per tick for everyone, `check_status` returns one
+    (won, failed, message) per craft. `sc` is kept as the template craft.
+    """
+
+    def __init__(self, size, spacecraft, planets, n_spacecraft=2, **kwargs):
+
+        self.fleet = Fleet(spacecraft, n_spacecraft, (spacecraft.x, spacecraft.y))
+        self.attempts_per_craft = [0] * n_spacecraft
+        super().__init__(size, spacecraft, planets, **kwargs)
+
+    @classmethod
+    def from_scene(cls, scene, n_spacecraft=2):
+
+        """ Race on a fork of `scene`, playing it leaves `scene` as it was """
+
+        race = cls.__new__(cls)
+        race.__dict__.update(scene.fork().__dict__)
+        race.metadata = dict(scene.metadata)
+        race.fleet = Fleet(scene.sc, n_spacecraft, scene.sc_start_pos)
+        race.attempts_per_craft = [0] * n_spacecraft
+        return race
+
+    def rescale(self, x_size, y_size):
+
+        data = rescale_level(self.to_dict(), x_size, y_size)
+        return self.__class__.from_dict(data, n_spacecraft=self.fleet.n)
+
+    def fork(self):
+
+        clone = super().fork()
+        clone.fleet = self.fleet.fork()
+        clone.attempts_per_craft = list(self.attempts_per_craft)
+        return clone
+
+    def snapshot(self):
+
+        fleet = self.fleet
+        return super().snapshot() + (
+            tuple(tuple(getattr(fleet, name)) for name in Fleet.STATE),
+            tuple(self.attempts_per_craft),
+        )
+
+    def restore(self, state):
+
+        super().restore(state)
+        self.fleet.set_state(state[10])
+        self.attempts_per_craft = list(state[11])
+
+    def reset_pos(self):
+
+        super().reset_pos()
+        self.fleet.reset()
+
+    def reset(self):
+
+        super().reset()
+        self.attempts_per_craft = [0] * self.fleet.n
+
+    def update_all_pos(self, impulse_time, stepper=None):
+
+        assert stepper is None, "Races take one fixed step a tick!"
+
+        [planet.move(impulse_time) for planet in self.planets]
+        self.fleet.update_pos(impulse_time, self.planets)
+
+    def check_status(self):
+
+        fleet = self.fleet
+        statuses = []
+        for i in range(fleet.n):
+            if not fleet.active[i]:
+                statuses.append((False, False, ""))
+                continue
+
+            won, failed, message = self.edge_status(
+                fleet.x[i], fleet.y[i], fleet.speed(i)
+            )
+            if not failed and fleet.collided[i]:
+                failed, message = True, "Failed: Collision."
+            statuses.append((won, failed, message))
+
+        return statuses
+
+
 class LevelBuilder:
 
     """
     Generates spacecraft, planets, and scene based on some config options.
     """
 
-    def __init__(self, x_size, y_size, timeout=5):
+    __slots__ = (
+        "x_size",
+        "y_size",
+        "size",
+        "diag",
+        "padding",
+        "timeout",
+        "max_tries",
+        "poly",
+    )
+
+    # Ranges drawn with randint
+    INTEGER_RANGES = frozenset(
+        (
+            "planet.n",
+            "scene.completion_score",
+            "scene.attempt_score_reduction",
+            "scene.gas_bonus_score",
+        )
+    )
+
+    def __init__(self, x_size, y_size, timeout=5, max_tries=100000):
 
         self.x_size = x_size
         self.y_size = y_size
         self.size = self.x_size * self.y_size
         self.diag = (self.x_size ** 2 + self.y_size ** 2) ** 0.5
         self.padding = min(x_size, y_size) / 8
-        self.timeout = timeout
+        self.timeout = timeout  # seconds of orbit layouts to try, unseeded levels
+        self.max_tries = max_tries  # the same for seeded ones, machine independent
         self.poly = RectPolygon((0, y_size), (x_size, 0))
 
-        # Initialization dicts
+    @property
+    def easy(self):
+        return self.config("easy")
 
-        self.easy = dict(
-            planet=dict(n=(1, 1), mass=(3e16, 4e16)),
-            orbit=dict(
-                a=(x_size / 3, x_size / 2),
-                b=(y_size / 3, y_size / 2),
-                angular_step=(2 * math.pi / 200, 2 * math.pi / 200),  # speed
-                center_x=(0, self.x_size),
-                center_y=(0, self.y_size / 2),
-            ),
-            sc=dict(
-                mass=(100, 125),
-                gas_level=(350, 450),
-                thrust_force=(3000, 3000),
-                size=(self.size * 30 / (942 * 539), self.size * 35 / (942 * 539)),
-                start_pos=(
-                    (self.x_size / 4, self.x_size * 0.75),
-                    (0, self.y_size * 0.3),
+    @property
+    def medium(self):
+        return self.config("medium")
+
+    @property
+    def hard(self):
+        return self.config("hard")
+
+    def config(self, option, overrides=None):
+
+        """
+        Generation ranges of a difficulty, built when they're needed. `overrides`
+        replaces some, by "section.name" (e.g. {"sc.thrust_force": (3000, 4000)}),
+        a single number is a fixed value. Integer ranges are rounded.
+        """
+
+        config = self._ranges(option)
+        for key, value in (overrides or {}).items():
+            section, name = key.split(".")
+            assert name in config[section], "Unknown config %r!" % key
+            if isinstance(value, (int, float)):
+                value = (value, value)
+            if key in self.INTEGER_RANGES:
+                value = tuple(round(v) for v in value)
+            config[section][name] = value
+
+        return config
+
+    def _ranges(self, option):
+
+        x_size, y_size = self.x_size, self.y_size
+
+        if option == "easy":
+            return dict(
+                planet=dict(n=(1, 1), mass=(3e16, 4e16)),
+                orbit=dict(
+                    a=(x_size / 3, x_size / 2),
+                    b=(y_size / 3, y_size / 2),
+                    angular_step=(2 * math.pi / 200, 2 * math.pi / 200),  # speed
+                    center_x=(0, self.x_size),
+                    center_y=(0, self.y_size / 2),
                 ),
-            ),
-            scene=dict(
-                win_region_length=sorted((self.x_size / 2, self.y_size / 2)),
-                win_region_pos_prob=[0.1, 0.8, 0.1, 0],
-                win_velocity=(90, 125),
-                completion_score=(50, 100),
-                attempt_score_reduction=(1, 3),
-                gas_bonus_score=(5, 5),
-            ),
-        )
-        self.medium = dict(
-            planet=dict(n=(1, 2), mass=(4e16, 5e16)),
-            orbit=dict(
-                a=(x_size / 4, x_size * 0.75),
-                b=(y_size / 4, y_size * 0.75),
-                angular_step=(1.5 * math.pi / 200, 3 * math.pi / 200),
-                center_x=(0, self.x_size),
-                center_y=(0, self.y_size),
-            ),
-            sc=dict(
-                mass=(100, 125),
-                gas_level=(300, 450),
-                thrust_force=(3500, 4500),
-                size=(self.size * 30 / (942 * 539), self.size * 35 / (942 * 539)),
-                start_pos=(
-                    (self.x_size / 4, self.x_size * 0.75),
-                    (0, self.y_size * 0.3),
+                sc=dict(
+                    mass=(100, 125),
+                    gas_level=(350, 450),
+                    thrust_force=(3000, 3000),
+                    size=(self.size * 30 / (942 * 539), self.size * 35 / (942 * 539)),
+                    start_pos=(
+                        (self.x_size / 4, self.x_size * 0.75),
+                        (0, self.y_size * 0.3),
+                    ),
                 ),
-            ),
-            scene=dict(
-                win_region_length=sorted((self.x_size / 3, self.y_size / 3)),
-                win_region_pos_prob=[1 / 3, 1 / 3, 1 / 3, 0],
-                win_velocity=(100, 150),
-                completion_score=(100, 150),
-                attempt_score_reduction=(5, 7),
-                gas_bonus_score=(10, 15),
-            ),
-        )
-        self.hard = dict(
-            planet=dict(n=(1, 2), mass=(4e16, 5e16)),
-            orbit=dict(
-                a=(x_size / 4, x_size * 0.75),
-                b=(y_size / 4, y_size * 0.75),
-                angular_step=(1.5 * math.pi / 200, 3 * math.pi / 200),
-                center_x=(0, self.x_size),
-                center_y=(0, self.y_size),
-            ),
-            sc=dict(
-                mass=(100, 125),
-                gas_level=(300, 450),
-                thrust_force=(3500, 4500),
-                size=(self.size * 30 / (942 * 539), self.size * 35 / (942 * 539)),
-                start_pos=(
-                    (self.x_size / 4, self.x_size * 0.75),
-                    (self.y_size / 4, self.y_size * 0.75),
+                scene=dict(
+                    win_region_length=sorted((self.x_size / 2, self.y_size / 2)),
+                    win_region_pos_prob=[0.1, 0.8, 0.1, 0],
+                    win_velocity=(90, 125),
+                    completion_score=(50, 100),
+                    attempt_score_reduction=(1, 3),
+                    gas_bonus_score=(5, 5),
                 ),
-            ),
-            scene=dict(
-                win_region_length=sorted((self.x_size / 3, self.y_size / 3)),
-                win_region_pos_prob=[1 / 3, 0, 1 / 3, 1 / 3],
-                win_velocity=(100, 150),
-                completion_score=(100, 150),
-                attempt_score_reduction=(5, 7),
-                gas_bonus_score=(10, 15),
-            ),
-        )
+            )
+        elif option == "medium":
+            return dict(
+                planet=dict(n=(1, 2), mass=(4e16, 5e16)),
+                orbit=dict(
+                    a=(x_size / 4, x_size * 0.75),
+                    b=(y_size / 4, y_size * 0.75),
+                    angular_step=(1.5 * math.pi / 200, 3 * math.pi / 200),
+                    center_x=(0, self.x_size),
+                    center_y=(0, self.y_size),
+                ),
+                sc=dict(
+                    mass=(100, 125),
+                    gas_level=(300, 450),
+                    thrust_force=(3500, 4500),
+                    size=(self.size * 30 / (942 * 539), self.size * 35 / (942 * 539)),
+                    start_pos=(
+                        (self.x_size / 4, self.x_size * 0.75),
+                        (0, self.y_size * 0.3),
+                    ),
+                ),
+                scene=dict(
+                    win_region_length=sorted((self.x_size / 3, self.y_size / 3)),
+                    win_region_pos_prob=[1 / 3, 1 / 3, 1 / 3, 0],
+                    win_velocity=(100, 150),
+                    completion_score=(100, 150),
+                    attempt_score_reduction=(5, 7),
+                    gas_bonus_score=(10, 15),
+                ),
+            )
+        elif option == "hard":
+            return dict(
+                planet=dict(n=(1, 2), mass=(4e16, 5e16)),
+                orbit=dict(
+                    a=(x_size / 4, x_size * 0.75),
+                    b=(y_size / 4, y_size * 0.75),
+                    angular_step=(1.5 * math.pi / 200, 3 * math.pi / 200),
+                    center_x=(0, self.x_size),
+                    center_y=(0, self.y_size),
+                ),
+                sc=dict(
+                    mass=(100, 125),
+                    gas_level=(300, 450),
+                    thrust_force=(3500, 4500),
+                    size=(self.size * 30 / (942 * 539), self.size * 35 / (942 * 539)),
+                    start_pos=(
+                        (self.x_size / 4, self.x_size * 0.75),
+                        (self.y_size / 4, self.y_size * 0.75),
+                    ),
+                ),
+                scene=dict(
+                    win_region_length=sorted((self.x_size / 3, self.y_size / 3)),
+                    win_region_pos_prob=[1 / 3, 0, 1 / 3, 1 / 3],
+                    win_velocity=(100, 150),
+                    completion_score=(100, 150),
+                    attempt_score_reduction=(5, 7),
+                    gas_bonus_score=(10, 15),
+                ),
+            )
+
+        raise ValueError("Unknown difficulty %r!" % option)
 
-    def generate_win_region(self, pos, length):
+    def generate_win_region(self, pos, length, rng=random):
 
         """ Randomly generate a win region. 0=left, 1=top, 2=right """
 
         if pos == 0:
-            p1 = [0, uniform(self.y_size / 3, self.y_size * 0.75)]
+            p1 = [0, rng.uniform(self.y_size / 3, self.y_size * 0.75)]
             p2 = [0, clip(p1[1] + length, None, self.y_size)]
 
         if pos == 1:
             # top
-            p1 = [uniform(0, self.x_size / 2), self.y_size]
+            p1 = [rng.uniform(0, self.x_size / 2), self.y_size]
             p2 = [clip(p1[0] + length, None, self.x_size), self.y_size]
 
         if pos == 2:
-            p1 = [self.x_size, uniform(self.y_size / 3, self.y_size * 0.75)]
+            p1 = [self.x_size, rng.uniform(self.y_size / 3, self.y_size * 0.75)]
             p2 = [self.x_size, clip(p1[1] + length, None, self.y_size)]
 
         if pos == 3:
             # bottom
-            p1 = [uniform(0, self.x_size / 2), 0]
+            p1 = [rng.uniform(0, self.x_size / 2), 0]
             p2 = [clip(p1[0] + length, None, self.x_size), 0]
 
         return p1, p2
@@ -226,53 +713,63 @@ class LevelBuilder:
     #         planet.orbit.set_progress(sorted_positions[-1])
     #         planet.move(0)
 
-    def create(self, option):
+    def create(self, option, seed=None, overrides=None):
 
+        """
+        A random level, the same one every time for a given `seed`. See `config`
+        for `overrides`.
+        """
+
+        rng = random if seed is None else random.Random(seed)
         start = time.time()
-        init_config = dict_to_class(self.__dict__[option.lower()])
+        init_config = dict_to_class(self.config(option.lower(), overrides))
 
         # Orbits
         orbits = []
-        n = randint(*init_config.planet.n)
+        n = rng.randint(*init_config.planet.n)
         orbits_valid = False
-        dur = 0
-        while not orbits_valid and dur <= self.timeout:
+        dur = tries = 0
+        # A seeded level can't depend on how fast this machine is
+        while not orbits_valid and (
+            tries < self.max_tries if seed is not None else dur <= self.timeout
+        ):
             s = time.time()
+            tries += 1
             orbits = OrbitCollection(
                 [
                     Orbit(
-                        uniform(*init_config.orbit.a),
-                        uniform(*init_config.orbit.b),
-                        uniform(*init_config.orbit.center_x),
-                        uniform(*init_config.orbit.center_y),
-                        progress=uniform(0, 2 * math.pi),
-                        angular_step=uniform(*init_config.orbit.angular_step),
+                        rng.uniform(*init_config.orbit.a),
+                        rng.uniform(*init_config.orbit.b),
+                        rng.uniform(*init_config.orbit.center_x),
+                        rng.uniform(*init_config.orbit.center_y),
+                        progress=rng.uniform(0, 2 * math.pi),
+                        angular_step=rng.uniform(*init_config.orbit.angular_step),
                     )
                     for i in range(n)
                 ]
             )
             orbits_valid = orbits.orbits_valid(
-                uniform(self.x_size / 2, self.y_size / 2),
-                uniform(self.diag / 2, self.diag * 0.75),
+                rng.uniform(self.x_size / 2, self.y_size / 2),
+                rng.uniform(self.diag / 2, self.diag * 0.75),
             )
             dur += time.time() - s
 
         # SC
-        size = uniform(*init_config.sc.size)
+        size = rng.uniform(*init_config.sc.size)
         sc = Spacecraft(
             "",
-            uniform(*init_config.sc.mass),
-            uniform(*init_config.sc.gas_level),
-            uniform(*init_config.sc.thrust_force),
+            rng.uniform(*init_config.sc.mass),
+            rng.uniform(*init_config.sc.gas_level),
+            rng.uniform(*init_config.sc.thrust_force),
             width=size,
             length=size,
-            x=uniform(*init_config.sc.start_pos[0]),
-            y=clip(uniform(*init_config.sc.start_pos[1]), size / 2, None),
+            x=rng.uniform(*init_config.sc.start_pos[0]),
+            y=clip(rng.uniform(*init_config.sc.start_pos[1]), size / 2, None),
         )
 
         # Planets
         planets = [
-            Planet(name="", mass=uniform(*init_config.planet.mass), orbit=orbit)
+            Planet(name="", mass=rng.uniform(*init_config.planet.mass), orbit=orbit)
             for orbit in orbits.orbits
         ]
         # FIXME: Enable this after implementing custom Polygon methods
@@ -281,19 +778,240 @@ class LevelBuilder:
 
         # Scene
         win_region = self.generate_win_region(
-            choices([0, 1, 2, 3], weights=init_config.scene.win_region_pos_prob)[0],
-            uniform(*init_config.scene.win_region_length),
+            rng.choices([0, 1, 2, 3], weights=init_config.scene.win_region_pos_prob)[0],
+            rng.uniform(*init_config.scene.win_region_length),
+            rng,
         )
         scene = Scene(
             (self.x_size, self.y_size),
             sc,
             planets,
             win_region=win_region,
-            win_velocity=uniform(*init_config.scene.win_velocity),
-            completion_score=randint(*init_config.scene.completion_score),
-            attempt_score_reduction=randint(*init_config.scene.attempt_score_reduction),
-            gas_bonus_score=randint(*init_config.scene.gas_bonus_score),
+            win_velocity=rng.uniform(*init_config.scene.win_velocity),
+            completion_score=rng.randint(*init_config.scene.completion_score),
+            attempt_score_reduction=rng.randint(
+                *init_config.scene.attempt_score_reduction
+            ),
+            gas_bonus_score=rng.randint(*init_config.scene.gas_bonus_score),
         )
+        scene.metadata["difficulty"] = option.lower()
+        if seed is not None:
+            scene.metadata["seed"] = seed
 
         print("Took", time.time() - start)
         return scene
+
+    def stream(self, difficulties, seed=None):
+
+        """
+        Generator of levels for `Game`, built as they're needed. `difficulties` can
+        be a single option for an endless campaign, or any (possibly infinite)
+        iterable of options. With a `seed`, level i uses seed + i.
+        """
+
+        if isinstance(difficulties, str):
+            difficulties = itertools.repeat(difficulties)
+
+        for i, option in enumerate(difficulties):
+            yield self.create(option, None if seed is None else seed + i)
+
+
+class LevelQueue:
+
+    """
+    Sequence of levels generated by a background worker.
+
+    Indexing blocks until that level has been built, iterating only goes over the
+    levels built so far (the rest are fresh and have nothing to reset or score).
+    """
+
+    def __init__(self, builder, difficulties, eager=1, levels=()):
+
+        self.builder = builder
+        self.difficulties = list(difficulties)
+        self.levels = list(levels)  # already built ones, e.g. restored
+        self.levels += [
+            builder.create(diff) for diff in self.difficulties[len(self.levels) : eager]
+        ]
+        self.error = None
+        self._ready = threading.Condition()
+
+        # Not kept, a finished worker would only hold on to its Thread object
+        threading.Thread(target=self._generate, daemon=True).start()
+
+    def _generate(self):
+
+        try:
+            for diff in self.difficulties[len(self.levels) :]:
+                level = self.builder.create(diff)
+                with self._ready:
+                    self.levels.append(level)
+                    self._ready.notify_all()
+        except Exception as e:
+            with self._ready:
+                self.error = e
+                self._ready.notify_all()
+
+    @property
+    def done(self):
+        return len(self.levels) == len(self.difficulties)
+
+    def __len__(self):
+        return len(self.difficulties)
+
+    def __getitem__(self, i):
+
+        if i < 0:
+            i += len(self)
+
+        if not 0 <= i < len(self):
+            raise IndexError("level index out of range")
+
+        with self._ready:
+            while i >= len(self.levels):
+                if self.error:
+                    raise self.error
+                self._ready.wait()
+
+        return self.levels[i]
+
+    def __iter__(self):
+        return iter(list(self.levels))
+
+
+class Prefetcher:
+
+    """
+    Iterator over `source` that builds the next item on a worker thread while the
+    current one is in use, like LevelQueue but for endless campaigns. Taking an item
+    only blocks if it isn't built yet.
+    """
+
+    def __init__(self, source):
+
+        self.source = iter(source)
+        self._next = None  # (item, error) once built
+        self._ready = threading.Condition()
+        self._start()
+
+    def _start(self):
+
+        # Not kept, like LevelQueue's worker
+        threading.Thread(target=self._pull, daemon=True).start()
+
+    def _pull(self):
+
+        try:
+            built = (next(self.source), None)
+        except Exception as e:  # StopIteration too, it ends this iterator as well
+            built = (None, e)
+
+        with self._ready:
+            self._next = built
+            self._ready.notify_all()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+
+        with self._ready:
+            self._ready.wait_for(lambda: self._next is not None)
+            item, error = self._next
+            if error is not None:
+                raise error
+            self._next = None
+
+        self._start()
+        return item
+
+
+def fresh_fork(scene):
+
+    """ Fork of a scene as it starts, not played yet """
+
+    clone = scene.fork()
+    clone.reset()
+    return clone
+
+
+class SceneStream:
+
+    """
+    Window over an iterator of scenes for long or endless campaigns.
+
+    Scenes are indexed by their position in the campaign like a list, but only
+    `history` finished scenes and `lookahead` upcoming ones are held. Released scenes
+    are folded into `released_score` so `Game.calc_score` still counts them.
+    Iterating goes over the scenes held right now.
+    """
+
+    def __init__(self, scenes, history=1, lookahead=1):
+
+        self.source = iter(scenes)
+        self.history = history
+        self.lookahead = lookahead
+        self.window = deque()
+        self.offset = 0  # campaign index of window[0]
+        self.released = 0
+        self.released_score = (0.0, 0.0)
+        self.exhausted = False
+        self._fill(0)
+
+    def _fill(self, i):
+
+        """ Pulls scenes until index i is held (if the source has that many) """
+
+        while not self.exhausted and self.offset + len(self.window) <= i:
+            try:
+                self.window.append(next(self.source))
+            except StopIteration:
+                self.exhausted = True
+
+    def _release(self, i):
+
+        """ Drops scenes more than `history` behind index i """
+
+        while self.window and self.offset < i - self.history:
+            scene = self.window.popleft()
+            self.released_score = scene.add_score(*self.released_score)
+            self.released += 1
+            self.offset += 1
+
+    @property
+    def seen(self):
+        return self.offset + len(self.window)
+
+    def fork(self):
+
+        """
+        Independent stream over the same campaign: held scenes are forked now, the
+        upcoming ones as the fork pulls them from a tee it shares with this stream.
+        This stream still gets the very same scenes, so the fork starts its copies
+        fresh, whatever was played on them by then.
+        """
+
+        self.source, other = itertools.tee(self.source)
+
+        clone = SceneStream.__new__(SceneStream)
+        clone.__dict__.update(self.__dict__)
+        clone.source = map(fresh_fork, other)
+        clone.window = deque(scene.fork() for scene in self.window)
+        return clone
+
+    def __getitem__(self, i):
+
+        if i < 0:
+            raise IndexError("streams can't be indexed from the end")
+        if i < self.offset:
+            raise IndexError("scene %d was already released" % i)
+
+        self._fill(i + self.lookahead)
+        if i >= self.seen:
+            raise IndexError("scene stream ended")
+
+        self._release(i)
+        return self.window[i - self.offset]
+
+    def __iter__(self):
+        return iter(list(self.window))
@@ -0,0 +1,145 @@
+"""
+Adaptive time stepping for the spacecraft integrator.
+
+`Scene.update_all_pos` normally takes one Euler step per tick. With a stepper
+(`game.stepper = AdaptiveStepper()`) a tick is split into as many leapfrog
+(kick-drift-kick) substeps as the local error estimate asks for, so close flybys
+are integrated finely. Far from every planet `Game.advance` goes further and coasts
+over several ticks in one step. Either way the craft is only ever observed on
+`Game.dt` tick boundaries.
+
+Leapfrog is exact under constant acceleration, its error over a step of length h
+comes from the rate of change j of the acceleration, about j * h^3 / 6 in position.
+j is bounded straight from the planets' geometry, and the gravity at the end of a
+step is kept in `scene.proximity` for the next one, so a substep costs one gravity
+evaluation like the fixed step and the stepper keeps no state of its own. Once a
+step is done `scene.proximity` holds the fixed step's collision geometry instead,
+the craft where the step started against the planets where it ended, so both
+steppers fail a level on the same rule.
+"""
+
+import math
+
+from .physics import G
+
+
+def planet_speed(planet):
+
+    """ Speed of a planet along its orbit, per unit of time """
+
+    orbit = planet.orbit
+    return orbit.angular_step * math.hypot(
+        orbit.a * math.sin(orbit.progress), orbit.b * math.cos(orbit.progress)
+    )
+
+
+class AdaptiveStepper:
+    def __init__(self, tolerance=0.01, max_substeps=32, max_coast_ticks=30):
+
+        assert tolerance > 0, "Tolerance must be positive!"
+
+        self.tolerance = tolerance  # position error per step
+        self.max_substeps = max_substeps  # per tick
+        self.max_coast_ticks = max_coast_ticks
+        self.steps = 0  # integration steps taken, for measuring the work
+
+    def step_size(self, scene):
+
+        """ Longest step that keeps the estimated error within the tolerance """
+
+        sc = scene.sc
+        proximity = self._proximity(scene)
+        speed = sc.vel.mag
+
+        jerk = 0.0
+        for i, planet in enumerate(scene.planets):
+            a = G * planet.mass / proximity.dist_sq[i]
+            # |d/dt (r / |r|^3)| <= 2 |v| / |r|^3, with the planet's motion included
+            jerk += 2 * a * (speed + planet_speed(planet)) / proximity.dist[i]
+
+        if jerk > 0:
+            return (6 * self.tolerance / jerk) ** (1 / 3)
+        return math.inf
+
+    def _proximity(self, scene):
+
+        """ Geometry where the craft is now, reusing the last step's if it's there """
+
+        sc, proximity = scene.sc, scene.proximity
+        if not (proximity.valid and proximity.x == sc.x and proximity.y == sc.y):
+            proximity.update(sc.x, sc.y, scene.planets)
+        return proximity
+
+    def update(self, scene, duration):
+
+        """ Moves the planets and the craft on by `duration`, in substeps """
+
+        sc, planets = scene.sc, scene.planets
+        x, y = sc.x, sc.y
+        n = min(max(math.ceil(duration / self.step_size(scene)), 1), self.max_substeps)
+        h = duration / n
+
+        # Thrust (and its gas) is per tick, spread evenly over the substeps
+        thrust = sc.get_thrust_impulse(duration)
+
+        force = sc.gravity_force(planets, self._proximity(scene))
+        for _ in range(n):
+            # Kick, drift, kick: exact under constant acceleration
+            sc._p.add_scaled(force, h / 2)
+            sc._p.add_scaled(thrust, 1 / n)
+            sc.p = sc._p
+            sc.move(h)
+            [planet.move(h) for planet in planets]
+
+            scene.proximity.valid = False
+            force = sc.gravity_force(planets, self._proximity(scene))
+            sc._p.add_scaled(force, h / 2)
+
+        sc.p = sc._p
+        self.steps += n
+
+        # Collisions follow the fixed step: the craft where the step started
+        # against the planets where it ended
+        sc.poly.move_to(x, y)
+        scene.proximity.update(x, y, planets)
+
+    def coast_ticks(self, scene, dt, max_ticks):
+
+        """
+        Whole ticks the craft can coast in one step: within the error tolerance and
+        short enough that it can't reach a screen edge or a planet in between.
+        """
+
+        sc = scene.sc
+        if max_ticks <= 1 or (sc.thrust and sc.gas_level > 0):
+            return 1
+
+        ticks = min(int(self.step_size(scene) / dt), max_ticks, self.max_coast_ticks)
+        if ticks <= 1:
+            return 1
+
+        speed = sc.vel.mag
+        x_size, y_size = scene.size
+        clearance = min(sc.x, x_size - sc.x, sc.y, y_size - sc.y)
+        closing = speed
+
+        proximity = self._proximity(scene)
+        accel = 0.0
+        for i, planet in enumerate(scene.planets):
+            r = proximity.dist[i]
+            accel += G * planet.mass / proximity.dist_sq[i]
+            gap = r - sc.poly.r - planet.poly.r
+            if gap < clearance:
+                clearance, closing = gap, speed + planet_speed(planet)
+
+        if clearance <= 0:
+            return 1
+
+        # Time to close half the clearance, speeding up at the current acceleration
+        clearance /= 2
+        if accel > 0:
+            t = (math.sqrt(closing ** 2 + 2 * accel * clearance) - closing) / accel
+        else:
+            t = clearance / closing if closing > 0 else math.inf
+
+        return max(min(ticks, int(t / dt)), 1)
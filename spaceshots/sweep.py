@@ -0,0 +1,274 @@
+"""
+Parameter sweeps for physics tuning: play the same seeded levels headless under
+many settings of the constants and compare win rate, fuel use and time to goal.
+
+    spaceshots sweep --grid G=5e-11,6.67e-11,8e-11 --grid thrust_force=3000,4000
+    spaceshots sweep --random 1000 --range G=5e-11:8e-11 \\
+                     --range orbit.angular_step=0.01:0.05 -o sweep.csv
+
+A point sets any of:
+
+    G, radius_per_kilogram, gas_per_thrust  physics constants, set on each level
+    thrust_force                            the craft's thrust (sc.thrust_force)
+    section.name                            a `LevelBuilder.config` range
+
+Every point plays the same `levels` seeds, so differences come from the settings
+and not from the levels drawn. Each row has the share of sessions won, the mean
+fraction of a tank burnt per attempt, the mean seconds to win (of the sessions
+won) and the mean number of attempts. Points are spread over all cores and each one's row
+goes to the CSV as soon as it's done.
+"""
+
+import contextlib
+import csv
+import io
+import itertools
+import math
+import random
+
+from .cli import POLICIES, parallel_map
+from .game import Game
+from .physics import G as DEFAULT_G
+from .scene import LevelBuilder
+
+CONSTANTS = ("G", "radius_per_kilogram", "gas_per_thrust")
+ALIASES = {"thrust_force": "sc.thrust_force"}
+METRICS = ("sessions", "win_rate", "fuel_used", "time_to_goal", "attempts")
+
+
+def grid(**axes) -> list:
+
+    """ Every combination of the given values: grid(G=[...], thrust_force=[...]) """
+
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def random_design(n, seed=0, **ranges) -> list:
+
+    """
+    n points over (lo, hi) ranges, Latin hypercube sampled so each range is
+    covered evenly even for small n.
+    """
+
+    rng = random.Random(seed)
+    columns = {}
+    for name, (lo, hi) in ranges.items():
+        strata = list(range(n))
+        rng.shuffle(strata)
+        columns[name] = [lo + (hi - lo) * (i + rng.random()) / n for i in strata]
+
+    return [{name: columns[name][i] for name in ranges} for i in range(n)]
+
+
+def apply_constants(scene, G=None, radius_per_kilogram=None, gas_per_thrust=None):
+
+    """
+    Physics constants on a built level. Gravity only ever uses G * mass, so a
+    different G scales the planet masses (after sizing them by the original mass).
+    """
+
+    for planet in scene.planets:
+        if radius_per_kilogram is not None:
+            planet.radius = radius_per_kilogram * planet.mass
+            planet.poly = None
+            planet.make_poly()
+        if G is not None:
+            planet.mass *= G / DEFAULT_G
+
+    if gas_per_thrust is not None:
+        scene.sc.gas_per_thrust = gas_per_thrust
+
+    return scene
+
+
+def setting_names(builder) -> list:
+
+    """ Every name a point can set, see the module docstring """
+
+    config = builder.config("easy")
+    sections = [
+        "%s.%s" % (section, name) for section in config for name in config[section]
+    ]
+    return list(CONSTANTS) + list(ALIASES) + sections
+
+
+def check_point(point, builder):
+
+    """ Raises ValueError for a name `build_point_level` has no setting for """
+
+    known = setting_names(builder)
+    unknown = [name for name in point if name not in known]
+    if unknown:
+        raise ValueError(
+            "Unknown sweep setting %s, expected one of: %s"
+            % (", ".join(map(repr, unknown)), ", ".join(known))
+        )
+
+
+def build_point_level(point, difficulty, seed, size=(500, 500)):
+
+    builder = LevelBuilder(*size)
+    check_point(point, builder)
+
+    constants = {name: point[name] for name in CONSTANTS if name in point}
+    overrides = {
+        ALIASES.get(name, name): value
+        for name, value in point.items()
+        if name not in CONSTANTS
+    }
+
+    if difficulty == "mixed":
+        difficulty = random.Random(seed).choice(("easy", "medium", "hard"))
+
+    with contextlib.redirect_stdout(io.StringIO()):  # create() prints its timing
+        scene = builder.create(difficulty, seed, overrides)
+    return apply_constants(scene, **constants)
+
+
+class FuelGauge:
+
+    """ Telemetry sink adding up the gas burnt over every attempt """
+
+    def __init__(self, sc):
+
+        self.initial = sc._initial_gas_level
+        self.last = sc.gas_level
+        self.burnt = 0.0
+
+    def record(self, game, won, failed, message=""):
+
+        gas = max(game.current_scene.sc.gas_level, 0.0)
+        self.burnt += self.last - gas
+        # Finished attempts start over with a full tank
+        self.last = self.initial if won or failed else gas
+
+
+def play(scene, policy="heuristic", seed=0, fps=60, max_ticks=1800):
+
+    """ Headless session until the level is won or `max_ticks` pass """
+
+    game = Game(fps=fps, scenes=[scene])
+    game.telemetry = gauge = FuelGauge(scene.sc)
+    controller = POLICIES[policy]()
+    rng = random.Random(seed)
+
+    tick = attempt_tick = 0
+    while tick < max_ticks and not scene.won:
+        _, failed, _ = game.step(controller(scene, attempt_tick, rng))
+        tick += 1
+        attempt_tick = 0 if failed else attempt_tick + 1
+
+    started = scene.attempts + (0 if scene.won else 1)
+    return dict(
+        won=scene.won,
+        seconds=tick / fps,
+        attempts=started,
+        fuel=gauge.burnt / gauge.initial / started if gauge.initial else 0.0,
+    )
+
+
+def run_point(args) -> dict:
+
+    """ Row of one point: its settings and the metrics over its sessions """
+
+    index, point, options = args
+    sessions = []
+    for i in range(options["levels"]):
+        seed = options["seed"] + i
+        scene = build_point_level(point, options["difficulty"], seed, options["size"])
+        sessions.append(
+            play(scene, options["policy"], seed, options["fps"], options["max_ticks"])
+        )
+
+    wins = [session for session in sessions if session["won"]]
+    n = len(sessions)
+    row = dict(point=index, **point)
+    row.update(
+        sessions=n,
+        win_rate=len(wins) / n,
+        fuel_used=sum(session["fuel"] for session in sessions) / n,
+        time_to_goal=(
+            sum(session["seconds"] for session in wins) / len(wins)
+            if wins
+            else math.nan
+        ),
+        attempts=sum(session["attempts"] for session in sessions) / n,
+    )
+    return row
+
+
+def sweep(
+    points,
+    levels=8,
+    difficulty="mixed",
+    policy="heuristic",
+    seed=0,
+    fps=60,
+    max_ticks=1800,
+    size=(500, 500),
+    jobs=None,
+):
+
+    """ Rows of `run_point` in order, as they finish (all cores by default) """
+
+    options = dict(
+        levels=levels,
+        difficulty=difficulty,
+        policy=policy,
+        seed=seed,
+        fps=fps,
+        max_ticks=max_ticks,
+        size=tuple(size),
+    )
+    jobs_args = ((i, point, options) for i, point in enumerate(points))
+    yield from parallel_map(run_point, jobs_args, jobs, chunksize=1)
+
+
+def write_table(rows, f, columns, progress=None):
+
+    """ Streams rows as CSV, metrics rounded to 4 significant digits """
+
+    writer = csv.DictWriter(f, columns, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for row in rows:
+        # The point's own settings are written exactly, to rebuild its levels
+        writer.writerow(
+            {
+                key: (
+                    "%.4g" % value
+                    if key in METRICS and isinstance(value, float)
+                    else value
+                )
+                for key, value in row.items()
+            }
+        )
+        f.flush()
+        if progress is not None:
+            progress.update()
+
+    if progress is not None:
+        progress.close()
+
+
+def parse_number(text):
+
+    """ int when it looks like one, so counts stay whole, else float """
+
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_axis(text, separator=","):
+
+    """ "name=1,2.5" -> ("name", [1, 2.5]), "name=1:2" with separator ":" """
+
+    name, equals, values = text.partition("=")
+    if not (name and equals):
+        raise ValueError("Expected name=values, got %r" % text)
+    try:
+        return name, [parse_number(value) for value in values.split(separator)]
+    except ValueError:
+        raise ValueError("Expected numbers in %r" % text) from None
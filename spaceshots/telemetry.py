@@ -0,0 +1,187 @@
+"""
+Columnar per-tick telemetry with NumPy (needs `spaceshots[numpy]`).
+
+Attach a sink with `game.telemetry = TelemetrySink(directory)`. Every `Game.step`
+appends one record to a preallocated buffer, full buffers are written as numbered
+`.npy` shards, optionally from a background thread. `TelemetryReader` memory maps
+the shards back.
+"""
+
+import glob
+import os
+import queue
+import threading
+
+import numpy as np
+
+DIRECTIONS = {"+y": 1, "-x": 2, "-y": 3, "+x": 4}
+
+
+def record_dtype(max_planets=2):
+
+    return np.dtype(
+        [
+            ("tick", "<i8"),
+            ("scene", "<i4"),
+            ("x", "<f4"),
+            ("y", "<f4"),
+            ("vx", "<f4"),
+            ("vy", "<f4"),
+            ("theta", "<f4"),
+            ("gas", "<f4"),
+            ("thrust", "i1"),  # 0 off, else the 1-4 command
+            ("status", "i1"),  # 0 playing, 1 won, 2 failed
+            ("planets", "<f4", (max_planets, 2)),
+        ]
+    )
+
+
+class TelemetrySink:
+    def __init__(
+        self,
+        directory,
+        chunk_size=8192,
+        max_planets=2,
+        background=False,
+        prefix="telemetry",
+    ):
+
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.max_planets = max_planets
+        self.dtype = record_dtype(max_planets)
+        self.buffer = np.zeros(chunk_size, self.dtype)
+        self.n = 0
+        self.shards = 0
+        self.records = 0
+        self.error = None  # first failed background write, raised by flush / close
+
+        self._queue = None
+        if background:
+            self._queue = queue.Queue(maxsize=4)
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+
+    def record(self, game, won=False, failed=False, message=""):
+
+        scene = game.current_scene
+        sc = scene.sc
+        row = self.buffer[self.n]
+
+        row["tick"] = game.ticks
+        row["scene"] = game.current_index
+        row["x"], row["y"] = sc.x, sc.y
+        row["vx"], row["vy"] = sc.vel.x, sc.vel.y
+        row["theta"] = sc.theta
+        row["gas"] = sc.gas_level
+        row["thrust"] = DIRECTIONS[sc.thrust_direction] if sc.thrust else 0
+        row["status"] = 1 if won else 2 if failed else 0
+        planets = row["planets"]
+        planets[:] = np.nan  # slots past this level's planets, the buffer is reused
+        for i, planet in enumerate(scene.planets[: self.max_planets]):
+            planets[i] = planet.x, planet.y
+
+        self.n += 1
+        self.records += 1
+        if self.n == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+
+        self._raise_error()
+        if not self.n:
+            return
+
+        chunk = self.buffer[: self.n]
+        path = os.path.join(self.directory, "%s-%06d.npy" % (self.prefix, self.shards))
+        self.shards += 1
+
+        if self._queue is not None:
+            # Hand the full buffer to the writer and start filling a fresh one
+            self._queue.put((path, chunk))
+            self.buffer = np.zeros(self.chunk_size, self.dtype)
+        else:
+            np.save(path, chunk)
+
+        self.n = 0
+
+    def _write_loop(self):
+
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                # After a failure, keep taking chunks so the tick loop never blocks
+                if self.error is None:
+                    np.save(*item)
+            except Exception as e:
+                self.error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+
+        try:
+            self.flush()
+        finally:
+            if self._queue is not None:
+                self._queue.put(None)
+                self._writer.join()
+                self._queue = None
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class TelemetryReader:
+
+    """ Read only, memory mapped view over the shards in a directory """
+
+    def __init__(self, directory, prefix="telemetry"):
+
+        self.paths = sorted(
+            glob.glob(os.path.join(directory, "%s-[0-9]*.npy" % prefix))
+        )
+        self._shards = [np.load(path, mmap_mode="r") for path in self.paths]
+        self._offsets = np.cumsum([0] + [len(shard) for shard in self._shards])
+
+    def shards(self):
+        return list(self._shards)
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def __iter__(self):
+
+        for shard in self._shards:
+            yield from shard
+
+    def __getitem__(self, i):
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("record index out of range")
+
+        shard = int(np.searchsorted(self._offsets, i, side="right")) - 1
+        return self._shards[shard][i - self._offsets[shard]]
+
+    def column(self, name):
+
+        """ One field across all shards (this one does copy into memory) """
+
+        if not self._shards:
+            return np.zeros(0)
+        return np.concatenate([shard[name] for shard in self._shards])
@@ -1,3 +1,176 @@
+import math
+
+from functools import lru_cache
+
+
+class Vec2:
+
+    """ Compact 2D vector. Operators return new vectors, i-operators work in place """
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0.0, y=0.0):
+
+        self.x = x
+        self.y = y
+
+    @classmethod
+    def polar(cls, theta, mag=1.0):
+        return cls._make(mag * math.cos(theta), mag * math.sin(theta))
+
+    @classmethod
+    def _make(cls, x, y):
+
+        # Skips subclass __init__ so results keep their type (Force, Momentum, ...)
+        vec = cls.__new__(cls)
+        vec.x = x
+        vec.y = y
+        return vec
+
+    def set(self, x, y):
+
+        self.x = x
+        self.y = y
+        return self
+
+    def copy(self):
+        return self._make(self.x, self.y)
+
+    @property
+    def mag(self):
+        return math.hypot(self.x, self.y)
+
+    @property
+    def mag_sq(self):
+        return self.x * self.x + self.y * self.y
+
+    def dot(self, other):
+        return self.x * other.x + self.y * other.y
+
+    def cross(self, other):
+        return self.x * other.y - self.y * other.x
+
+    def unit(self):
+
+        norm = math.hypot(self.x, self.y)
+        if norm > 0:
+            return self._make(self.x / norm, self.y / norm)
+        return self._make(0.0, 0.0)
+
+    def rotate(self, theta):
+
+        c, s = math.cos(theta), math.sin(theta)
+        return self._make(c * self.x - s * self.y, s * self.x + c * self.y)
+
+    def perp(self):
+        """ Rotated by +90 degrees, exactly """
+        return self._make(-self.y, self.x)
+
+    def angle(self):
+        return math.atan2(self.y, self.x)
+
+    def add_scaled(self, other, k):
+
+        """ In place self += other * k """
+
+        self.x += other.x * k
+        self.y += other.y * k
+        return self
+
+    def __add__(self, other):
+        return self._make(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other):
+        return self._make(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, k):
+        return self._make(self.x * k, self.y * k)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, k):
+        return self._make(self.x / k, self.y / k)
+
+    def __neg__(self):
+        return self._make(-self.x, -self.y)
+
+    def __iadd__(self, other):
+
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def __isub__(self, other):
+
+        self.x -= other.x
+        self.y -= other.y
+        return self
+
+    def __imul__(self, k):
+
+        self.x *= k
+        self.y *= k
+        return self
+
+    def __eq__(self, other):
+
+        try:
+            return self.x == other[0] and self.y == other[1]
+        except (TypeError, IndexError, KeyError):
+            return NotImplemented
+
+    __hash__ = None
+
+    def __iter__(self):
+
+        yield self.x
+        yield self.y
+
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, i):
+        return (self.x, self.y)[i]
+
+    def __repr__(self):
+        return str((self.x, self.y))
+
+
+@lru_cache(maxsize=None)
+def slot_names(cls) -> tuple:
+
+    """ Every __slots__ entry of a class and its bases """
+
+    names = []
+    for klass in reversed(cls.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        names += [slots] if isinstance(slots, str) else slots
+    return tuple(names)
+
+
+def slot_dict(obj) -> dict:
+
+    """ vars() for __slots__ objects """
+
+    return {
+        name: getattr(obj, name)
+        for name in slot_names(obj.__class__)
+        if hasattr(obj, name)
+    }
+
+
+def copy_slots(obj):
+
+    """ Shallow copy of a __slots__ object, without going through __init__ """
+
+    clone = obj.__class__.__new__(obj.__class__)
+    for name, value in slot_dict(obj).items():
+        setattr(clone, name, value)
+    if hasattr(obj, "__dict__"):
+        clone.__dict__.update(obj.__dict__)
+    return clone
+
+
 def dict_to_class(_dict):
     """ Works only on a one nested level dict """
 
@@ -19,7 +192,10 @@ def round_to_nearest(num, nearest):
     return round(num / nearest) * nearest
 
 
-def closest_dist_to_sc(sc, planets):
+def closest_dist_to_sc(sc, planets, proximity=None):
+
+    if proximity is not None:
+        return proximity.closest_dist
 
     min_dist = 1e6
     for planet in planets:
@@ -31,6 +207,8 @@ def closest_dist_to_sc(sc, planets):
 
 
 def vector_norm(array: list) -> float:
+    if isinstance(array, Vec2):
+        return array.mag
     return sum([i ** 2 for i in array]) ** 0.5
 
 
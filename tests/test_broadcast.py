@@ -0,0 +1,73 @@
+import gc
+import json
+import threading
+
+from spaceshots.api import Manager
+from spaceshots.broadcast import BroadcastChannel
+
+
+def test_frames_are_encoded_once_and_shared():
+
+    manager = Manager(500, 500, n_levels=1)
+    spectators = [manager.spectate() for _ in range(100)]
+    manager.step(1)
+    manager.step(0)
+
+    frames = [spectator.poll() for spectator in spectators]
+    assert [tick for tick, _ in frames[0]] == [1, 2]
+    assert all(f[1][1] is frames[0][1][1] for f in frames)  # the same bytes object
+    assert json.loads(frames[0][1][1]) == json.loads(json.dumps(manager.get_details()))
+    assert spectators[0].poll() == []
+
+
+def test_slow_subscribers_skip_frames():
+
+    channel = BroadcastChannel(capacity=8)
+    fast, slow = channel.subscribe(), channel.subscribe(max_lag=3)
+    for tick in range(20):
+        channel.publish({"tick": tick}, tick)
+        fast.poll()
+
+    assert fast.received == 20 and fast.skipped == 0
+    assert [tick for tick, _ in slow.poll()] == [17, 18, 19]
+    assert slow.skipped == 17
+
+    channel.publish({"tick": 20}, 20)
+    channel.publish({"tick": 21}, 21)
+    assert slow.latest()[0] == 21 and slow.skipped == 18
+    assert slow.latest() is None
+
+
+def test_waiting_subscriber():
+
+    channel = BroadcastChannel()
+    subscriber = channel.subscribe()
+    received = []
+
+    def watch():
+        while not channel.closed:
+            received.extend(subscriber.wait(timeout=1))
+        received.extend(subscriber.poll())
+
+    thread = threading.Thread(target=watch)
+    thread.start()
+    for tick in range(50):
+        channel.publish({"tick": tick}, tick)
+    channel.close()
+    thread.join()
+
+    assert [tick for tick, _ in received] == list(range(50))
+
+
+def test_closing_subscribers():
+
+    channel = BroadcastChannel()
+    with channel.subscribe() as subscriber:
+        assert channel.subscribers == 1 and not subscriber.closed
+    assert subscriber.closed and channel.subscribers == 0
+    subscriber.close()
+    assert channel.subscribers == 0
+
+    channel.subscribe()  # dropped without closing
+    gc.collect()
+    assert channel.subscribers == 0
@@ -0,0 +1,30 @@
+from spaceshots.calibrate import (
+    bucket_by_difficulty,
+    calibrate,
+    estimate_difficulty,
+    filter_by_difficulty,
+)
+from spaceshots.scene import LevelBuilder
+
+
+def test_calibrate_levels():
+    builder = LevelBuilder(500, 500)
+    levels = [builder.create("easy"), builder.create("hard")]
+
+    results = calibrate(levels, episodes=2, max_ticks=200, processes=2)
+    for level, result in zip(levels, results):
+        assert 0.0 <= result["win_prob"] <= 1.0
+        assert result["expected_attempts"] >= 1.0
+        assert level.metadata["calibration"] is result
+    assert results[0] == estimate_difficulty(levels[0], episodes=2, max_ticks=200)
+
+    buckets = bucket_by_difficulty(levels)
+    assert sum(len(b) for b in buckets.values()) == 2
+    assert len(filter_by_difficulty(levels, 0.0, 1.0)) == 2
+
+
+def test_estimate_is_seeded():
+    level = LevelBuilder(500, 500).create("medium")
+    assert estimate_difficulty(level, episodes=2, seed=3) == estimate_difficulty(
+        level, episodes=2, seed=3
+    )
@@ -0,0 +1,68 @@
+import math
+import random
+
+from spaceshots.catalogue import LevelCatalogue, level_features, FEATURES
+from spaceshots.cli import build_level
+
+
+def random_features(rng):
+    features = {name: rng.uniform(0, 100) for name in FEATURES}
+    features.update(
+        difficulty=rng.randrange(3),
+        n_planets=rng.randint(1, 3),
+        win_side=rng.randrange(4),
+        win_velocity=rng.choice(range(90, 160, 10)),
+        win_prob=rng.random() if rng.random() < 0.8 else math.nan,
+    )
+    return features
+
+
+def test_queries_match_a_scan(tmp_path):
+    rng = random.Random(0)
+    catalogue = LevelCatalogue(bins=8)
+    rows = [random_features(rng) for _ in range(3000)]
+    for i, features in enumerate(rows):
+        catalogue.add_features(features, 1000 + i)
+
+    queries = [
+        dict(difficulty="hard", n_planets=2, win_velocity=(120, 150)),
+        dict(win_prob=(0.3, 0.5), win_side=["top", "left"]),
+        dict(gas=(10.0, 10.5), difficulty=1),  # selective range
+        dict(thrust=(None, 20), win_velocity=130),
+        dict(n_planets=(1, 3), difficulty=("medium", None)),  # ranges, not sets
+        dict(n_planets={1, 3}, gas=(None, 50)),
+    ]
+    names = dict(hard=2, medium=1, top=1, left=0)
+    for query in queries:
+        expected = []
+        for i, features in enumerate(rows):
+            ok = True
+            for name, value in query.items():
+                if isinstance(value, (list, set)):
+                    ok &= features[name] in [names.get(v, v) for v in value]
+                elif isinstance(value, tuple):
+                    lo, hi = (names.get(v, v) for v in value)
+                    ok &= lo is None or lo <= features[name]
+                    ok &= hi is None or features[name] <= hi
+                else:
+                    ok &= features[name] == names.get(value, value)
+            if ok:
+                expected.append(1000 + i)
+        assert catalogue.query(**query) == expected
+        assert catalogue.count(**query) == len(expected)
+
+    path = str(tmp_path / "levels.cat")
+    catalogue.save(path)
+    loaded = LevelCatalogue.load(path)
+    assert loaded.query(limit=5, **queries[0]) == catalogue.query(**queries[0])[:5]
+    for query in queries:
+        assert loaded.query(**query) == catalogue.query(**query)
+
+
+def test_level_features():
+    scene = build_level("hard", seed=5)
+    catalogue = LevelCatalogue()
+    assert catalogue.add(scene) == 5
+    features = level_features(scene)
+    assert features["difficulty"] == 2 and math.isnan(features["win_prob"])
+    assert catalogue.query(n_planets=len(scene.planets), difficulty="hard") == [5]
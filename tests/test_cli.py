@@ -0,0 +1,61 @@
+import contextlib
+import io
+import json
+
+import pytest
+
+from spaceshots.cli import build_level, main
+from spaceshots.game import Game
+from spaceshots.scene import LevelBuilder, Scene
+
+
+def test_level_roundtrip():
+    scene = build_level("hard", seed=3)
+    assert build_level("hard", seed=3).to_dict() == scene.to_dict()
+
+    copy = Scene.from_dict(json.loads(json.dumps(scene.to_dict())))
+    game, copy_game = Game(scenes=[scene]), Game(scenes=[copy])
+    for tick in range(200):
+        command = (tick // 20) % 5
+        assert game.step(command) == copy_game.step(command)
+        assert (scene.sc.x, scene.sc.y) == (copy.sc.x, copy.sc.y)
+
+
+def test_generate_and_simulate(tmp_path):
+    levels, results = str(tmp_path / "levels.jsonl"), str(tmp_path / "out.jsonl")
+    main(["generate", "-n", "3", "-j", "1", "-q", "-o", levels])
+
+    with open(levels, "a") as f:
+        f.write(json.dumps(dict(id="replay", seed=1, commands=[1] * 30)) + "\n")
+    main(["simulate", levels, "-j", "2", "-q", "--max-ticks", "50", "-o", results])
+
+    with open(results) as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["id"] for row in rows] == [0, 1, 2, "replay"]
+    assert rows[-1]["ticks"] <= 30
+
+
+def test_seeded_levels_ignore_the_clock():
+    # Seed 17 needs hundreds of orbit layouts, more than a zero timeout allows
+    with contextlib.redirect_stdout(io.StringIO()):
+        hurried = LevelBuilder(500, 500, timeout=0).create("hard", 17)
+    assert hurried.to_dict() == build_level("hard", 17).to_dict()
+
+
+def test_bench_without_levels(capsys):
+    main(["bench", "--levels", "0", "-q"])
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["ticks"] == 0 and summary["us_per_tick"] is None
+
+
+def test_generate_msgpack(tmp_path):
+    msgpack = pytest.importorskip("msgpack")
+    packed, plain = str(tmp_path / "levels.msgpack"), str(tmp_path / "levels.jsonl")
+    main(["generate", "-n", "2", "-j", "1", "-q", "-f", "msgpack", "-o", packed])
+    main(["generate", "-n", "2", "-j", "1", "-q", "-o", plain])
+
+    with open(packed, "rb") as f:
+        records = list(msgpack.Unpacker(f))
+    with open(plain) as f:
+        expected = [json.loads(line) for line in f]
+    assert records == expected
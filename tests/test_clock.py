@@ -0,0 +1,35 @@
+from spaceshots.api import Manager
+from spaceshots.clock import FixedStepClock
+
+
+def test_fixed_step_catchup():
+    clock = FixedStepClock(0.1, max_steps=3)
+    clock.reset(0.0)
+    assert clock.advance(0.25) == 2  # 0.05 left over
+    assert abs(clock.alpha - 0.5) < 1e-9
+    assert clock.advance(10.0) == 3  # stall, capped
+    assert clock.dropped > 0
+
+
+def test_game_update_interpolates():
+    game = Manager(500, 500, n_levels=1).game
+    game.clock.reset(0.0)
+    assert len(game.update(0, now=game.dt * 2.5)) == 2
+    state = game.interpolated_state()
+    assert abs(state["alpha"] - 0.5) < 1e-6
+    assert len(state["planets"]) == len(game.current_scene.planets)
+
+
+def test_sleeps_one_step_after_reset(monkeypatch):
+    now, slept = [0.0], []
+
+    def sleep(delay):
+        slept.append(delay)
+        now[0] += delay
+
+    monkeypatch.setattr("spaceshots.clock.time.sleep", sleep)
+    clock = FixedStepClock(0.1, timer=lambda: now[0])
+    clock.reset()
+    for _ in range(3):
+        clock.sleep_until_next()
+    assert [round(delay, 9) for delay in slept] == [0.1, 0.1, 0.1]
@@ -0,0 +1,32 @@
+from spaceshots.cli import build_level
+from spaceshots.deterministic import (
+    ONE,
+    DeterministicScene,
+    check_conformance,
+    fsin,
+    FULL_TURN,
+)
+from spaceshots.game import Game
+
+
+def test_conformance_vectors():
+    assert check_conformance() == []
+
+
+def test_sine_table():
+    assert fsin(0) == 0 and fsin(FULL_TURN // 4) == ONE
+    assert fsin(FULL_TURN // 8) == -fsin(FULL_TURN - FULL_TURN // 8)
+
+
+def test_tracks_float_game():
+    scene = build_level("medium", seed=2)
+    fixed = DeterministicScene.from_scene(scene)
+    game = Game(scenes=[scene])
+
+    commands = [command for command in (1, 2, 3, 4, 0) for _ in range(15)] * 2
+    for command in commands:
+        assert game.step(command) == fixed.step(command)
+
+    assert abs(scene.sc.x - fixed.x / ONE) < 0.1
+    assert abs(scene.sc.y - fixed.y / ONE) < 0.1
+    assert scene.sc.gas_level == fixed.gas
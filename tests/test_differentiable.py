@@ -0,0 +1,36 @@
+import random
+
+from spaceshots.differentiable import TrajectoryModel, target_loss, to_commands
+from spaceshots.scene import LevelBuilder
+
+
+def test_gradient_matches_finite_differences():
+    scene = LevelBuilder(500, 500).create("medium")
+    model = TrajectoryModel(scene, 60)
+    rng = random.Random(0)
+    controls = [(rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(60)]
+    weights = [0.3, -0.7, 0.2, 0.5]
+
+    def f(c):
+        return sum(w * s for w, s in zip(weights, model.final_state(c)))
+
+    _, grads = model.gradient(controls, weights)
+    for k in (0, 30, 59):
+        up, down = list(controls), list(controls)
+        up[k] = (controls[k][0] + 1e-6, controls[k][1])
+        down[k] = (controls[k][0] - 1e-6, controls[k][1])
+        numeric = (f(up) - f(down)) / 2e-6
+        assert abs(numeric - grads[k][0]) < 1e-4 * max(1.0, abs(numeric))
+
+
+def test_optimize_reduces_loss():
+    # Seeded, so the level (and whether 20 steps make progress) doesn't vary
+    scene = LevelBuilder(500, 500).create("easy", 0)
+    model = TrajectoryModel(scene, 120)
+    (x1, y1), (x2, y2) = scene.win_region
+    loss = target_loss((x1 + x2) / 2, (y1 + y2) / 2)
+
+    start, _ = loss(model.final_state([(0.0, 0.0)] * 120))
+    controls, value = model.optimize(loss, steps=20)
+    assert value < start
+    assert set(to_commands(controls)) <= {0, 1, 2, 3, 4}
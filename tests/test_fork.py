@@ -0,0 +1,90 @@
+from spaceshots.cli import build_level
+from spaceshots.game import Game, Race
+from spaceshots.scene import RaceScene
+
+
+def positions(game):
+    scene = game.current_scene
+    return (scene.sc.x, scene.sc.y), [(p.x, p.y) for p in scene.planets]
+
+
+def test_fork_is_independent():
+    game = Game(scenes=[build_level("medium", seed) for seed in range(3)])
+    for _ in range(20):
+        game.step(1)
+
+    fork = game.fork()
+    start = positions(game)
+    assert positions(fork) == start
+
+    # Stepping the fork leaves the parent alone, and both play the same way
+    for _ in range(40):
+        fork.step(4)
+    assert positions(game) == start
+    for _ in range(40):
+        game.step(4)
+    assert positions(game) == positions(fork)
+
+    # Later scenes are separate too
+    fork._scene_won()
+    assert fork.current_index == 1 and game.current_index == 0
+    fork.step(2)
+    assert game.scenes[1].attempts == 0 and game.scenes[1].sc.thrust is False
+    assert game.calc_score() == (0.0, 0.0) and fork.calc_score()[0] > 0
+
+
+def test_fork_stream_and_race():
+    scenes = (build_level("easy", seed) for seed in range(4))
+    game = Game(scenes=scenes)
+    fork = game.fork()
+    fork._scene_won()
+    game._scene_won()
+    assert fork.current_scene is not game.current_scene
+    assert fork.current_scene.to_dict() == game.current_scene.to_dict()
+
+    race = Race(scenes=[RaceScene.from_scene(build_level("easy", 1), 2)])
+    race.step([1, 2])
+    fork = race.fork()
+    fork.step([4, 4])
+    assert race.current_scene.fleet.x != fork.current_scene.fleet.x
+
+
+def test_forks_keep_the_state_at_fork_time():
+    game = Game(scenes=[build_level("medium", seed) for seed in range(3)])
+    later = game.scenes[1]
+    later.attempts, later.sc.gas_level = 2, 100
+    before = later.snapshot()
+
+    fork = game.fork()
+    nested = fork.fork()
+    assert list(fork.scenes.forks) == [0] and list(nested.scenes.forks) == [0]
+
+    # The parent plays on, the forks get to the level as it was
+    game._scene_won()
+    for _ in range(30):
+        game.step(1)
+    for copy in (fork, nested):
+        scene = copy.scenes[1]
+        assert scene is not later and scene.snapshot() == before
+        assert scene.attempts == 2
+    assert list(fork.scenes.forks) == [0, 1]
+
+
+def test_stream_fork_leaves_the_parent_alone():
+    levels = [build_level("easy", seed) for seed in range(4)]
+    game = Game(scenes=iter(levels))
+    fork = game.fork()
+
+    # The stream already holds the next level, the one after comes from the source
+    for _ in range(2):
+        game._scene_won()
+    assert game.current_scene is levels[2]
+    for _ in range(30):
+        game.step(3)
+
+    for _ in range(2):
+        fork._scene_won()
+    assert fork.current_scene is not levels[2]
+    # A reset puts the orbits back, the planets move there on the next step
+    fresh = build_level("easy", 2).snapshot()
+    assert fork.current_scene.snapshot()[:9] == fresh[:9]
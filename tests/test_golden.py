@@ -0,0 +1,46 @@
+from spaceshots.golden import (
+    DEFAULT_TOLERANCES,
+    FixedPointEngine,
+    FleetEngine,
+    GameEngine,
+    check_engine,
+    load,
+)
+
+
+def test_game_matches_corpus():
+    # Recorded with the original engine, today's stays within the default tolerances
+    for report in check_engine(GameEngine, repeat=1):
+        assert report["ok"], report
+        for field, error in report["max_error"].items():
+            assert error <= DEFAULT_TOLERANCES[field]
+
+
+def test_corpus_coverage():
+    statuses = [status for case in load() for status in case["statuses"]]
+    assert [True, False] in statuses and [False, True] in statuses
+    assert any(case["states"][-1][4] == 0 for case in load())  # gas ran out
+
+
+def test_other_engines():
+    assert all(report["ok"] for report in check_engine(FleetEngine, repeat=1))
+
+    reports = check_engine(
+        FixedPointEngine,
+        tolerances=dict(x=1e-6, y=1e-6, vx=1e-6, vy=1e-6),
+        repeat=1,
+    )
+    first = reports[0]["first_divergence"]
+    assert not reports[0]["ok"] and first["tick"] == 0 and first["error"] > 1e-6
+
+
+def test_engines_take_dt():
+    case = load()[1]
+    slow = FleetEngine(case["level"], dt=1 / 30)
+    fast = FleetEngine(case["level"], dt=1 / 60)
+    for _ in range(2):
+        fast.step(1)
+    slow.step(1)
+    # Same time, one step vs two, only close
+    assert abs(slow.state()[1] - fast.state()[1]) < 1
+    assert slow.state() != fast.state()
@@ -0,0 +1,109 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from spaceshots.cli import build_level
+from spaceshots.game import Game, SinkGroup
+from spaceshots.golden import load
+from spaceshots.heatmap import HeatmapAggregator, level_key
+from spaceshots.scene import LevelBuilder, Scene
+
+
+def play(aggregator, seeds, ticks=400):
+    for seed in seeds:
+        game = Game(scenes=[build_level("hard", seed)])
+        game.telemetry = SinkGroup([aggregator])
+        for tick in range(ticks):
+            game.step(4 if tick % 60 < 40 else 1)
+
+
+def key_of(level):
+    return level_key(Game(scenes=[level]))
+
+
+def test_aggregate_and_merge(tmp_path):
+    total = HeatmapAggregator(bins=(16, 12), flush_size=50)
+    play(total, [1, 2, 3])
+
+    part_a, part_b = HeatmapAggregator(bins=(16, 12)), HeatmapAggregator(bins=(16, 12))
+    play(part_a, [1, 2])
+    play(part_b, [3])
+    part_a.save(str(tmp_path / "a.npz"))
+    part_b.save(str(tmp_path / "b.npz"))
+    merged = HeatmapAggregator.merge_files(
+        [str(tmp_path / "a.npz"), str(tmp_path / "b.npz")]
+    )
+
+    keys = [key_of(build_level("hard", seed)) for seed in (1, 2, 3)]
+    assert sorted(merged.levels) == sorted(keys)
+    for key in keys:
+        ours, theirs = total.get(key), merged.get(key)
+        assert ours["visits"].shape == (12, 16)
+        assert ours["visits"].sum() == 400
+        for channel in ours:
+            assert (ours[channel] == theirs[channel]).all()
+
+
+def test_outcomes():
+    aggregator = HeatmapAggregator(
+        bins=(8, 8), key=lambda game: game.current_scene.metadata["case"]
+    )
+    for case in load():
+        game = Game(scenes=[Scene.from_dict(case["level"])])
+        game.current_scene.metadata["case"] = case["name"]
+        game.telemetry = aggregator
+        for command in case["commands"]:
+            game.step(command)
+
+    assert aggregator.get("win")["won"].sum() == 1
+    assert aggregator.get("win")["won"][0].sum() == 1  # top row
+    assert aggregator.get("collision")["collision"].sum() > 0
+    assert aggregator.get("out_of_bounds")["out_of_bounds"].sum() == 1
+    assert aggregator.get("gas_out")["gas_out"].sum() == 1
+
+
+def test_unseeded_levels_apart():
+    aggregator = HeatmapAggregator(bins=(8, 8))
+    levels = [
+        LevelBuilder(500, 500).create("easy"),
+        LevelBuilder(400, 300).create("hard"),
+    ]
+    for level in levels + [Scene.from_dict(levels[0].to_dict())]:
+        game = Game(scenes=[level])
+        game.telemetry = aggregator
+        for _ in range(10):
+            game.step(4)
+
+    assert len(aggregator.levels) == 2
+    first, second = (aggregator.get(key_of(level)) for level in levels)
+    assert first["visits"].sum() == 20
+    assert second["visits"].sum() == 10
+
+
+def test_seed_shared_across_difficulties():
+    aggregator = HeatmapAggregator(bins=(8, 8))
+    levels = [build_level("easy", 1), build_level("hard", 1)]
+    for level in levels:
+        game = Game(scenes=[level])
+        game.telemetry = aggregator
+        game.step(1)
+
+    assert len(aggregator.levels) == 2
+
+
+def test_interleaved_sessions():
+    alone, together = HeatmapAggregator(every=3), HeatmapAggregator(every=3)
+    games = [Game(scenes=[build_level("medium", 5)]) for _ in range(4)]
+    for game, aggregator in zip(games, (alone, alone, together, together)):
+        game.telemetry = aggregator
+
+    for game in games[:2]:
+        for tick in range(100):
+            game.step(1 if tick < 80 else 0)
+    for tick in range(100):
+        for game in games[2:]:
+            game.step(1 if tick < 80 else 0)
+
+    (key,) = alone.levels
+    for channel, counts in alone.get(key).items():
+        assert (counts == together.get(key)[channel]).all()
@@ -0,0 +1,90 @@
+import json
+import time
+
+from spaceshots.api import Manager
+from spaceshots.cli import build_level
+from spaceshots.game import Game
+from spaceshots.host import SessionHost
+from spaceshots.scene import ScaledLevels, normalize_level
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def play(manager, commands):
+    for command in commands:
+        manager.step(command)
+    return manager.get_details()
+
+
+def test_idle_sessions_hibernate_and_come_back(tmp_path):
+
+    clock = FakeClock()
+    host = SessionHost(str(tmp_path), idle_seconds=60, clock=clock)
+    idle = host.create("idle", 500, 500, n_levels=3)
+    busy = host.create("busy", 500, 500, n_levels=3)
+    host.step("idle", 1)
+    twin = Manager.from_dict(idle.to_dict())
+
+    clock.now = 61
+    host.step("busy", 0)  # sweeps
+    assert host.hibernated == {"idle"} and "idle" not in host.sessions
+    assert (tmp_path / "idle.session").exists()
+
+    start = time.perf_counter()
+    restored = host.get("idle")
+    assert time.perf_counter() - start < 1 / 60
+    assert not (tmp_path / "idle.session").exists()
+
+    commands = [1] * 20 + [4] * 20 + [0] * 20
+    assert play(restored, commands) == play(twin, commands)
+    assert len(host) == 2
+
+
+def test_endless_session_round_trip():
+
+    manager = Manager(500, 500, n_levels=None)
+    for _ in range(30):
+        manager.step(2)
+
+    data = manager.to_dict()
+    restored = Manager.from_dict(data)
+    assert restored.to_dict() == data
+    assert restored.game.calc_score() == manager.game.calc_score()
+    assert play(restored, [3] * 30) == play(manager, [3] * 30)
+
+
+def test_every_scene_source_round_trips():
+
+    bank = [normalize_level(build_level("easy", seed).to_dict()) for seed in range(3)]
+    sources = {
+        "queue": None,
+        "stream": None,
+        "list": lambda: [build_level("easy", seed) for seed in range(3)],
+        "scaled": lambda: ScaledLevels(bank, 500, 500),
+    }
+    for source, scenes in sources.items():
+        manager = Manager(500, 500, n_levels=None if source == "stream" else 3)
+        if scenes is not None:
+            manager.game = Game(scenes=scenes())
+        for tick in range(10):
+            manager.submit(tick, 1)
+            manager.tick()
+        manager.submit(12, 4)  # still pending
+        while source == "queue" and not manager.game.scenes.done:
+            time.sleep(0.001)  # so both hold the same levels
+
+        data = json.loads(json.dumps(manager.to_dict()))
+        assert data["source"] == source
+        restored = Manager.from_dict(data)
+        assert json.loads(json.dumps(restored.to_dict())) == data
+        assert restored.inputs.command == 1 and 12 in restored.inputs.pending
+        for _ in range(5):
+            manager.tick()
+            restored.tick()
+        assert restored.get_details() == manager.get_details()
@@ -0,0 +1,72 @@
+import threading
+
+from spaceshots.api import Manager
+from spaceshots.cli import build_level
+from spaceshots.game import Game
+from spaceshots.inputs import InputBuffer
+
+
+def test_commands_run_at_their_tick():
+
+    buffer = InputBuffer()
+    assert buffer.submit(3, 1, server_tick=0)
+    assert buffer.submit(5, 0, server_tick=1)
+    assert not buffer.submit(3, 1, server_tick=2)  # resent
+
+    commands = [buffer.take(tick) for tick in range(7)]
+    assert commands == [None, None, None, 1, None, 0, None]
+    assert buffer.stats()["duplicates"] == 1
+    assert buffer.delay.max == 0
+
+
+def test_late_and_bunched_commands():
+
+    buffer = InputBuffer()
+    buffer.submit(10, 2, server_tick=12)  # late
+    buffer.submit(11, 3, server_tick=12)  # late too, and newer
+    assert buffer.take(12) == 3
+    assert not buffer.submit(9, 4, server_tick=13)  # older than what ran
+
+    stats = buffer.stats()
+    assert stats["late"] == 2 and stats["superseded"] == 1 and stats["stale"] == 1
+    assert stats["delay"]["max"] == 1
+    assert stats["margin"]["n"] == 1 and stats["margin"]["min"] == -1  # applied only
+
+
+def test_manager_applies_buffered_input():
+
+    manager = Manager(500, 500, n_levels=1)
+    manager.game = Game(scenes=[build_level("easy", 0)])  # no crash in 40 ticks
+    sc = manager.game.current_scene.sc
+
+    threads = [
+        threading.Thread(target=manager.submit, args=(tick, tick // 4 % 2))
+        for tick in range(0, 40, 4)
+    ]
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+
+    for tick in range(40):
+        manager.tick()
+        assert sc.thrust == (tick // 4 % 2 == 1)
+
+    assert manager.game.ticks == 40
+    assert manager.latency()["applied"] == 10
+
+
+def test_held_command_survives_a_crash():
+
+    manager = Manager(500, 500, n_levels=1)
+    manager.game = Game(scenes=[build_level("easy", 0)])
+    sc = manager.game.current_scene.sc
+
+    manager.submit(0, 4)
+    manager.tick()
+    assert sc.thrust
+
+    sc.x = -100  # out of bounds on the next tick
+    manager.tick()
+    assert manager.status["fail"] and not sc.thrust  # reset with the attempt
+
+    manager.tick()
+    assert sc.thrust and sc.thrust_direction == "+x"
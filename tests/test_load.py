@@ -14,3 +14,23 @@ def test_basic_build():
     manage.step(2)  # thrust
     manage.step(3)  # thrust
     manage.step(4)  # thrust
+
+
+def test_background_levels():
+    manage = Manager(500, 500, n_levels=3)
+    game = manage.game
+    assert len(game.scenes) == 3
+    assert game.scenes[2] is not None  # blocks until generated
+    assert game.scenes.done
+
+
+def test_details_proximity():
+    manage = Manager(500, 500, n_levels=1)
+    manage.step(1)
+    details = manage.get_details()
+    scene = manage.game.current_scene
+    dists = [p["dist"] for p in details["planets"]]
+    assert details["sc"]["closest_dist_to_planet"] == min(dists)
+    planet, poly = scene.planets[0], scene.sc.poly
+    expected = ((planet.x - poly.x) ** 2 + (planet.y - poly.y) ** 2) ** 0.5
+    assert abs(scene.proximity.dist[0] - expected) < 1e-9
@@ -0,0 +1,27 @@
+from spaceshots.api import Manager
+from spaceshots.scene import LevelBuilder
+
+
+def test_compact_assets():
+
+    builder = LevelBuilder(500, 500)
+    scene = builder.create("medium", 3)
+    for obj in (builder, scene.sc, scene.planets[0], scene.planets[0].orbit):
+        assert not hasattr(obj, "__dict__")
+
+    assert builder.medium == builder.config("medium")
+    orbit = scene.planets[0].orbit
+    assert orbit.poly.tl == (orbit.center_x - orbit.a, orbit.center_y + orbit.b)
+
+
+def test_memory_report():
+
+    manager = Manager(500, 500, n_levels=5)
+    manager.game.scenes[4]  # wait for all the levels
+    for _ in range(10):
+        manager.step(1)
+
+    report = manager.memory_report()
+    assert report["levels"] == 5
+    assert sum(report["by_type"].values()) == report["total"]
+    assert report["total"] < 24 * 1024
@@ -0,0 +1,21 @@
+import math
+
+from spaceshots.physics import Force, Momentum, Velocity, rotate
+from spaceshots.utils import Vec2
+
+
+def test_vec2_ops():
+    v = Vec2(3.0, 4.0)
+    assert v.mag == 5.0
+    assert v + Vec2(1, 1) == (4.0, 5.0)
+    v += Vec2(1, 1)
+    assert v == (4.0, 5.0)
+    assert rotate(math.pi / 2, Vec2(1.0, 0.0)).y == 1.0
+
+
+def test_vectors_keep_their_type():
+    p = Momentum(1.0, 2.0, mass=2)
+    p += Momentum.from_impulse(Force(0.0, 3.0, 6.0), 0.5)
+    assert isinstance(p + p, Momentum)
+    assert p == (2.0, 7.0)
+    assert Velocity(0.0, 0.0).theta == math.pi / 2
@@ -0,0 +1,19 @@
+from spaceshots.game import Game
+from spaceshots.planner import Planner
+from spaceshots.scene import LevelBuilder
+
+
+def test_suggest_keeps_state():
+    game = Game(scenes=[LevelBuilder(500, 500).create("medium")])
+    before = game.current_scene.snapshot()
+    planner = Planner(game, budget=0.005)
+    assert planner.suggest() in range(5)
+    assert game.current_scene.snapshot() == before
+    planner.step()
+
+
+def test_horizon_shrinks_over_budget():
+    game = Game(scenes=[LevelBuilder(500, 500).create("medium")])
+    planner = Planner(game, budget=0.0, horizon=60)
+    assert planner.suggest() in range(5)
+    assert planner.horizon < 60
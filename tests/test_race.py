@@ -0,0 +1,42 @@
+import copy
+import random
+
+from array import array
+from spaceshots.cli import build_level
+from spaceshots.game import Game, Race
+from spaceshots.scene import LevelBuilder, RaceScene
+
+
+def test_race_matches_single_player():
+    scene = LevelBuilder(500, 500).create("medium")
+    solo = Game(scenes=[copy.deepcopy(scene)])
+    race = Race(scenes=[RaceScene.from_scene(scene, 3)])
+    fleet = race.current_scene.fleet
+
+    rng = random.Random(0)
+    for _ in range(300):
+        command = rng.randint(0, 4)
+        won, failed, _ = solo.step(command)
+        statuses = race.step([command, command, 0])
+        assert statuses[0] == statuses[1]
+        assert statuses[0][:2] == (won, failed)
+        if won or failed:
+            # Solo play also resets the planets, a race can't
+            break
+        sc = solo.current_scene.sc
+        assert (fleet.x[0], fleet.y[0]) == (sc.x, sc.y)
+        assert fleet.gas_level[1] == sc.gas_level
+
+
+def test_race_leaves_its_level_alone():
+    level = build_level("medium", 2)
+    before = level.snapshot()
+    race = Race(scenes=[RaceScene.from_scene(level, 4)])
+    for _ in range(30):
+        race.step([1, 2, 3, 4])
+
+    assert level.snapshot() == before
+    assert race.current_scene.planets[0] is not level.planets[0]
+    fleet = race.current_scene.fleet
+    for name in ("x", "gas_level", "thrust", "thrust_direction"):
+        assert isinstance(getattr(fleet, name), array)
@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from spaceshots.raster import (
+    GRAVITY,
+    PLANETS,
+    SPACECRAFT,
+    WIN_REGION,
+    rasterize,
+    rasterize_batch,
+)
+from spaceshots.scene import LevelBuilder, Scene, normalize_level
+
+
+def test_rasterize_batch_matches_single():
+    builder = LevelBuilder(500, 500)
+    scenes = [builder.create("easy"), builder.create("hard")]
+    out = np.zeros((2, 4, 84, 84), np.uint8)
+    rasterize_batch(scenes, out, gravity=True)
+
+    single = rasterize(scenes[1], gravity=True)
+    assert (single[:3] == out[1, :3]).all()
+    assert out[:, SPACECRAFT].sum() > 0
+    assert out[:, WIN_REGION].sum() > 0
+    assert out[:, PLANETS].max() <= 1
+
+    # Integer gravity is scaled to the dtype, not wrapped
+    field = single[GRAVITY] / single[GRAVITY].max() * 255
+    assert out[1, GRAVITY].max() == 255
+    assert np.abs(out[1, GRAVITY] - field).max() <= 1
+
+
+def test_sc_pixel_position():
+    scene = LevelBuilder(500, 500).create("easy")
+    grid = rasterize(scene, resolution=(50, 50))[SPACECRAFT]
+    rows, cols = np.nonzero(grid)
+    assert abs(cols.mean() * 10 + 5 - scene.sc.x) < 20
+    assert abs(500 - rows.mean() * 10 - 5 - scene.sc.y) < 20
+
+
+def test_padding_on_a_tiny_screen():
+    # 1 x 1 levels, the second with fewer planets so its slots are padded
+    build = LevelBuilder(500, 500).create
+    scenes = [
+        Scene.from_dict(normalize_level(build(option, seed).to_dict()))
+        for option, seed in (("medium", 0), ("easy", 1))
+    ]
+    assert [len(scene.planets) for scene in scenes] == [2, 1]
+
+    batch = rasterize_batch(scenes, resolution=(32, 32))
+    assert (batch[1, PLANETS] == rasterize(scenes[1], resolution=(32, 32))[0]).all()
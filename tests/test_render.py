@@ -0,0 +1,20 @@
+import json
+import struct
+
+from spaceshots.render import export_level, level_geometry
+from spaceshots.scene import LevelBuilder
+
+
+def test_export_level(tmp_path):
+    scene = LevelBuilder(500, 500).create("medium")
+    assert level_geometry(scene, 0) is level_geometry(scene, 0)  # cached
+
+    manifest_path, bin_path = export_level(scene, str(tmp_path), "level", lod=0)
+    manifest = json.load(open(manifest_path))["geometry"]
+    blob = open(bin_path, "rb").read()
+
+    goal = manifest["buffers"][-1]
+    assert goal["name"] == "goal"
+    values = struct.unpack_from("<4f", blob, goal["offset"])
+    assert abs(values[0] - scene.win_region[0][0]) < 1e-3
+    assert len(manifest["buffers"]) == 2 * len(scene.planets) + 1
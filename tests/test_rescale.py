@@ -0,0 +1,56 @@
+from spaceshots.cli import build_level
+from spaceshots.game import Game
+from spaceshots.scene import RaceScene, ScaledLevels, Scene, normalize_level
+
+
+def test_uniform_rescale_scales_the_trajectory():
+    scene = build_level("medium", seed=4)
+    big = scene.rescale(1000, 1000)
+    assert big.size == (1000, 1000)
+    assert big.win_min_velocity == scene.win_min_velocity * 2
+    assert big.sc.min_dist_to_planet == 750
+
+    game, big_game = Game(scenes=[scene]), Game(scenes=[big])
+    commands = [command for command in (1, 2, 3, 4, 0) for _ in range(15)] * 3
+    for command in commands:
+        assert game.step(command) == big_game.step(command)
+        assert abs(big.sc.x - 2 * scene.sc.x) < 1e-6
+        assert abs(big.sc.y - 2 * scene.sc.y) < 1e-6
+    assert big.sc.gas_level == scene.sc.gas_level
+
+
+def test_bank_view_at_any_resolution():
+    levels = [build_level("hard", seed) for seed in range(3)]
+    bank = [normalize_level(level.to_dict()) for level in levels]
+
+    for x_size, y_size in ((1280, 720), (500, 500)):
+        view = ScaledLevels(bank, x_size, y_size)
+        game = Game(scenes=view)
+        scene = game.current_scene
+        assert scene.size == (x_size, y_size)
+        for (x, y), (x0, y0) in zip(scene.win_region, levels[0].win_region):
+            assert x in (0, x_size) or y in (0, y_size)
+            assert abs(x / x_size - x0 / 500) < 1e-12
+            assert abs(y / y_size - y0 / 500) < 1e-12
+        assert len(list(view)) == 1  # the rest aren't built until needed
+
+    back = ScaledLevels(bank, 500, 500)[2]
+    assert abs(back.planets[0].mass / levels[2].planets[0].mass - 1) < 1e-9
+    assert abs(back.planets[0].radius - levels[2].planets[0].radius) < 1e-9
+
+
+def test_only_rescaled_levels_skip_rounding():
+    data = build_level("easy", 0).to_dict()
+    data["win_velocity"] = 93.2
+    assert Scene.from_dict(data).win_min_velocity == 90
+
+    small = Scene.from_dict(normalize_level(data))
+    assert small.win_min_velocity == 93.2 / 500
+    assert Scene.from_dict(small.to_dict()).win_min_velocity == 93.2 / 500
+
+
+def test_race_rescale_keeps_the_fleet():
+    race = RaceScene.from_scene(build_level("easy", 1), 3)
+    big = race.rescale(1000, 1000)
+    assert isinstance(big, RaceScene) and big.fleet.n == 3
+    assert list(big.fleet.x) == [2 * x for x in race.fleet.x]
@@ -0,0 +1,96 @@
+import math
+
+from spaceshots.cli import build_level
+from spaceshots.game import Game
+from spaceshots.stepping import AdaptiveStepper
+
+
+def run(level, ticks, stepper=None, advance=False):
+
+    game = Game(scenes=[level.fork()])
+    game.stepper = stepper
+    done = 0
+    while done < ticks:
+        if advance:
+            n, (won, failed, _) = game.advance(0, ticks - done)
+        else:
+            n, (won, failed, _) = 1, game.step(0)
+        done += n
+        if won or failed:
+            return done, None
+
+    sc = game.current_scene.sc
+    return done, (sc.x, sc.y)
+
+
+def test_adaptive_steps_are_accurate_and_cheap():
+
+    fixed_error = adaptive_error = 0.0
+    ticks = steps = 0
+    for difficulty in ("easy", "medium", "hard"):
+        for seed in range(3):
+            level = build_level(difficulty, seed)
+            end, truth = run(level, 300, AdaptiveStepper(1e-7, 4096))
+
+            stepper = AdaptiveStepper()
+            assert run(level, 300, stepper, advance=True)[0] == end
+            ticks += end
+            steps += stepper.steps
+
+            for stepper in (None, AdaptiveStepper()):
+                done, pos = run(level, 300, stepper)
+                if truth is not None and done == end:
+                    error = math.hypot(pos[0] - truth[0], pos[1] - truth[1])
+                    if stepper is None:
+                        fixed_error = max(fixed_error, error)
+                    else:
+                        adaptive_error = max(adaptive_error, error)
+
+    assert adaptive_error < fixed_error / 10
+    assert steps < ticks / 2
+
+
+def test_substeps_near_planets():
+
+    level = build_level("easy", 0)
+    game = Game(scenes=[level])
+    game.stepper = stepper = AdaptiveStepper()
+
+    sc, planet = level.sc, level.planets[0]
+    sc.p = sc.p.set(400 * sc.mass, 0.0)
+
+    sizes = []
+    for gap in (300, 5):
+        sc.x, sc.y = planet.x, planet.y + planet.radius + gap
+        level.proximity.valid = False
+        sizes.append(stepper.step_size(level))
+
+    far, near = sizes
+    assert near < game.dt < far
+    assert game.advance(0, 10)[0] == 1  # no coasting this close
+    assert stepper.steps > 1
+
+
+def test_grazing_pass_fails_on_the_same_tick():
+
+    def graze(stepper, overlap):
+        level = build_level("medium", 2)
+        game = Game(scenes=[level])
+        game.stepper = stepper
+
+        # Fast and level, just dipping into the planet's collision circle
+        sc, planet = level.sc, level.planets[0]
+        sc.x = planet.x - 150
+        sc.y = planet.y + sc.poly.r + planet.poly.r - overlap
+        sc.p = sc.p.set(600 * sc.mass, 0.0)
+        level.proximity.valid = False
+
+        for tick in range(1, 60):
+            won, failed, message = game.step(0)
+            if won or failed:
+                return tick, message
+
+    for overlap in (1, 5, 10):
+        fixed = graze(None, overlap)
+        assert fixed[1] == "Failed: Collision."
+        assert graze(AdaptiveStepper(), overlap) == fixed
@@ -0,0 +1,56 @@
+import threading
+
+from spaceshots.api import Manager
+from spaceshots.game import Game
+from spaceshots.scene import LevelBuilder, SceneStream
+
+
+def play(game, n_won):
+    for i in range(n_won):
+        game.current_scene.attempts += i % 3  # some failed attempts
+        game.current_scene.sc.gas_level -= 10 * i
+        game._scene_won()
+
+
+def test_stream_matches_list():
+    builder = LevelBuilder(500, 500)
+    listed = Game(scenes=list(builder.stream(["easy", "medium"] * 10, seed=7)))
+    streamed = Game(scenes=builder.stream(["easy", "medium"] * 10, seed=7))
+    assert isinstance(streamed.scenes, SceneStream)
+
+    play(listed, 12)
+    play(streamed, 12)
+    assert streamed.current_index == listed.current_index == 12
+    assert len(streamed.scenes.window) <= 3
+    assert streamed.calc_score() == listed.calc_score()
+
+    play(listed, 10)
+    play(streamed, 10)
+    assert streamed.done and listed.done
+    assert streamed.calc_score() == listed.calc_score()
+
+
+def test_endless_manager():
+    manager = Manager(500, 500, n_levels=None)
+    play(manager.game, 5)
+    assert not manager.game.done
+    assert manager.game.current_index == 5
+    assert manager.game.scenes.released == 4
+    manager.step(1)
+
+
+def test_endless_levels_built_in_background(monkeypatch):
+    threads = []
+    create = LevelBuilder.create
+
+    def spy(self, *args, **kwargs):
+        threads.append(threading.current_thread())
+        return create(self, *args, **kwargs)
+
+    monkeypatch.setattr(LevelBuilder, "create", spy)
+    manager = Manager(500, 500, n_levels=None)
+    play(manager.game, 3)
+    manager.step(1)
+
+    assert len(threads) >= 5
+    assert threading.current_thread() not in threads
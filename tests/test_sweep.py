@@ -0,0 +1,100 @@
+import csv
+
+import pytest
+
+from spaceshots.cli import build_level, main
+from spaceshots.sweep import (
+    build_point_level,
+    grid,
+    parse_axis,
+    random_design,
+    run_point,
+)
+
+
+def test_designs():
+
+    points = grid(G=[1, 2], thrust_force=[3, 4, 5])
+    assert len(points) == 6 and points[1] == dict(G=1, thrust_force=4)
+
+    points = random_design(10, seed=1, G=(0.0, 1.0), gas_per_thrust=(2.0, 3.0))
+    # Latin hypercube: one point in each tenth of every range
+    for name, lo in (("G", 0.0), ("gas_per_thrust", 2.0)):
+        assert sorted(int((p[name] - lo) * 10) for p in points) == list(range(10))
+
+
+def test_point_settings():
+
+    level = build_level("medium", 2)
+    point = dict(G=2 * 6.67408e-11, radius_per_kilogram=1e-15, thrust_force=5000.0)
+    point["scene.win_velocity"] = (200, 200)
+    scene = build_point_level(point, "medium", 2)
+
+    for planet, original in zip(scene.planets, level.planets):
+        assert abs(planet.mass / original.mass - 2) < 1e-12
+        assert abs(planet.radius - original.mass * 1e-15) < 1e-9
+        assert planet.poly.r == planet.radius
+    assert scene.sc.thrust_mag == 5000
+    assert scene.win_min_velocity == 200
+
+
+def test_run_point_and_cli(tmp_path):
+
+    options = dict(
+        levels=2, difficulty="mixed", policy="heuristic", seed=0, fps=60, max_ticks=60
+    )
+    options["size"] = (500, 500)
+    row = run_point((3, dict(gas_per_thrust=0.002), options))
+    assert row["point"] == 3 and row["sessions"] == 2
+    assert 0 <= row["win_rate"] <= 1 and row["fuel_used"] >= 0
+
+    out = str(tmp_path / "sweep.csv")
+    args = "sweep --grid G=5e-11,7e-11 --levels 1 --max-ticks 30 -j 1 -q -o"
+    main(args.split() + [out])
+    with open(out) as f:
+        rows = list(csv.DictReader(f))
+    assert [row["G"] for row in rows] == ["5e-11", "7e-11"]
+    assert set(rows[0]) == {
+        "point",
+        "G",
+        "sessions",
+        "win_rate",
+        "fuel_used",
+        "time_to_goal",
+        "attempts",
+    }
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")  # randint with floats
+def test_integer_ranges():
+
+    name, values = parse_axis("planet.n=1,2")
+    assert values == [1, 2] and all(type(value) is int for value in values)
+    assert parse_axis("G=5e-11:7e-11", ":")[1] == [5e-11, 7e-11]
+
+    # Float samples (e.g. from random_design) are rounded for randint ranges
+    for n in (*values, 1.7):
+        scene = build_point_level({"planet.n": n}, "easy", 3)
+        assert len(scene.planets) == round(n)
+
+
+def test_settings_are_checked(capsys):
+
+    with pytest.raises(ValueError, match="'g'.*planet.n"):
+        build_point_level(dict(g=1e-10), "easy", 0)
+
+    for args in ("--grid g=1,2", "--grid G", "--random 2 --range G=1:2:3", ""):
+        with pytest.raises(SystemExit):
+            main(["sweep", "-q"] + args.split())
+        assert "sweep: error:" in capsys.readouterr().err
+
+
+def test_settings_written_exactly(tmp_path):
+
+    out = str(tmp_path / "sweep.csv")
+    args = "sweep --grid gas_per_thrust=0.0012345678 --levels 1 --max-ticks 30 -j 1 -q"
+    main(args.split() + ["-o", out])
+    with open(out) as f:
+        (row,) = csv.DictReader(f)
+    assert row["gas_per_thrust"] == "0.0012345678"
+    assert row["fuel_used"] == "%.4g" % float(row["fuel_used"])
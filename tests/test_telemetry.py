@@ -0,0 +1,56 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from spaceshots.game import Game
+from spaceshots.scene import LevelBuilder
+from spaceshots.telemetry import TelemetryReader, TelemetrySink
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_telemetry_roundtrip(tmp_path, background):
+    game = Game(scenes=[LevelBuilder(500, 500).create("medium")])
+    game.telemetry = TelemetrySink(str(tmp_path), chunk_size=64, background=background)
+
+    for i in range(150):
+        game.step(i % 5)
+        last_x = game.current_scene.sc.x
+    game.telemetry.close()
+
+    reader = TelemetryReader(str(tmp_path))
+    assert len(reader) == 150
+    assert len(reader.shards()) == 3
+    assert list(reader.column("tick")) == list(range(1, 151))
+    assert reader[-1]["status"] or abs(reader[-1]["x"] - last_x) < 1e-3
+
+
+def test_telemetry_mixed_planet_counts(tmp_path):
+    two = LevelBuilder(500, 500).create("medium", 0)
+    one = LevelBuilder(500, 500).create("easy", 1)
+    assert (len(two.planets), len(one.planets)) == (2, 1)
+
+    sink = TelemetrySink(str(tmp_path), chunk_size=4)
+    for scene in (two, one):
+        game = Game(scenes=[scene])
+        for _ in range(4):
+            sink.record(game)
+    sink.close()
+
+    planets = TelemetryReader(str(tmp_path)).column("planets")
+    assert not np.isnan(planets[:4]).any()
+    assert not np.isnan(planets[4:, 0]).any()
+    assert np.isnan(planets[4:, 1]).all()
+
+
+def test_background_write_errors_are_raised(tmp_path):
+    game = Game(scenes=[LevelBuilder(500, 500).create("easy", 1)])
+    sink = TelemetrySink(str(tmp_path), chunk_size=2, background=True)
+    sink.directory = str(tmp_path / "missing")  # every write fails
+
+    with pytest.raises(OSError):
+        for _ in range(40):  # more chunks than the queue holds
+            sink.record(game)
+        sink.close()
+    with pytest.raises(OSError):
+        sink.close()
+    assert not sink._writer.is_alive()